@@ -0,0 +1,154 @@
+"""
+Comprobación de las métricas por bloque (``src.integration.blocks``) frente a
+una referencia con un bucle por muestra.
+
+Genera series sintéticas con huecos (NaN), saltos en ``leq_utc`` entre
+cubos y dentro de un cubo, y rachas que cruzan esos saltos, y compara
+``calcular_metricas_bloques`` (tramos fijos y cubos de tiempo) y
+``calcular_metricas_noches`` con un recorrido muestra a muestra que acumula
+energía, extremos, tiempo sobre cada umbral y eventos (una racha se corta
+en un NaN o en un salto de más de 1.5·dt).
+
+Uso:
+    python comprobacion_bloques.py        # código de salida 1 si falla
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import sys
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+UMBRALES_DB = (65.0, 75.0)
+RTOL = 1e-9
+
+
+def serie_sintetica(n: int = 20_000, dt: float = 1.0,
+                    semilla: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Niveles en dB y marcas ``leq_utc`` (ms) con huecos y saltos.
+
+    Las marcas avanzan ``dt`` salvo en unos saltos de minutos a horas; los
+    niveles alternan tramos altos y bajos para que haya rachas que crucen
+    los saltos y los límites de bloque.
+    """
+    rng = np.random.default_rng(semilla)
+    db = 60 + 12 * np.sin(np.arange(n) / 40) + rng.normal(0, 3, n)
+    db[rng.choice(n, n // 200, replace=False)] = np.nan
+    pasos = np.full(n, int(dt * 1000), dtype=np.int64)
+    saltos = rng.choice(np.arange(1, n), 40, replace=False)
+    pasos[saltos] = rng.integers(2, 4 * 3600, saltos.size) * 1000
+    leq_utc = 1_763_000_000_000 + np.cumsum(pasos)
+    return db, leq_utc
+
+
+def referencia(db: np.ndarray, claves: list, dt: float,
+               leq_utc: np.ndarray | None, incluir: np.ndarray | None = None) -> dict:
+    """
+    Métricas por clave de bloque con un bucle por muestra.
+
+    ``claves[i]`` es el bloque de la muestra i; ``incluir`` limita las
+    muestras que cuentan (las demás solo deciden si una racha viene de
+    antes).
+    """
+    bloques: dict = {}
+    sobre_previo = [False] * len(UMBRALES_DB)
+    for i, nivel in enumerate(db):
+        contigua = i > 0 and (leq_utc is None or leq_utc[i] - leq_utc[i - 1] <= 1.5 * dt * 1000)
+        sobre = [not math.isnan(nivel) and nivel > u for u in UMBRALES_DB]
+        if incluir is None or incluir[i]:
+            b = bloques.setdefault(claves[i], {
+                "n": 0, "energia": 0.0, "max": -math.inf, "min": math.inf,
+                "eventos": [0] * len(UMBRALES_DB), "t_sobre": [0.0] * len(UMBRALES_DB)})
+            if not math.isnan(nivel):
+                b["n"] += 1
+                b["energia"] += 10 ** (nivel / 10)
+                b["max"] = max(b["max"], nivel)
+                b["min"] = min(b["min"], nivel)
+            for j, s in enumerate(sobre):
+                if s:
+                    b["t_sobre"][j] += dt
+                    if not (contigua and sobre_previo[j]):
+                        b["eventos"][j] += 1
+        sobre_previo = sobre
+    return bloques
+
+
+def comparar(nombre: str, tabla, clave: str, esperado: dict, dt: float) -> list[str]:
+    """Diferencias entre la tabla vectorizada y la referencia."""
+    fallos = []
+    claves = tabla[clave].to_list()
+    if claves != list(esperado):
+        return [f"{nombre}: bloques {claves[:5]}..., esperados {list(esperado)[:5]}..."]
+    for fila, (k, b) in zip(tabla.iter_rows(named=True), esperado.items()):
+        valores = {
+            "n_muestras": b["n"],
+            "laeq_db": 10 * math.log10(b["energia"] / b["n"]) if b["n"] else math.nan,
+            "sel_db": 10 * math.log10(b["energia"] * dt) if b["n"] else math.nan,
+            "lamax_db": b["max"] if b["n"] else math.nan,
+            "lamin_db": b["min"] if b["n"] else math.nan,
+        }
+        for j, u in enumerate(UMBRALES_DB):
+            valores[f"eventos_{u:g}"] = b["eventos"][j]
+            valores[f"t_sobre_{u:g}_s"] = b["t_sobre"][j]
+        for columna, v in valores.items():
+            obtenido = fila[columna]
+            iguales = (math.isnan(v) and math.isnan(obtenido)) or math.isclose(
+                obtenido, v, rel_tol=RTOL, abs_tol=1e-12)
+            if not iguales:
+                fallos.append(f"{nombre} {clave}={k}: {columna} {obtenido}, esperado {v}")
+    return fallos
+
+
+def ejecutar() -> bool:
+    """
+    Ejecuta la comprobación completa.
+
+    Returns
+    -------
+    bool
+        True si todas las comprobaciones pasan.
+    """
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from src.integration.blocks import calcular_metricas_bloques, calcular_metricas_noches
+    from src.integration.indicators import clasificar_periodos
+
+    fallos: list[str] = []
+    for dt in (1.0, 0.125):
+        db, leq_utc = serie_sintetica(dt=dt)
+        bloque_s = 600.0
+
+        tabla = calcular_metricas_bloques(db, dt, bloque_s, umbrales_db=UMBRALES_DB)
+        por_bloque = int(round(bloque_s / dt))
+        claves = [i // por_bloque for i in range(len(db))]
+        fallos += comparar(f"tramos (dt={dt:g})", tabla, "bloque",
+                           referencia(db, claves, dt, None), dt)
+
+        tabla = calcular_metricas_bloques(db, dt, bloque_s, leq_utc=leq_utc,
+                                          umbrales_db=UMBRALES_DB)
+        bloque_ms = int(bloque_s * 1000)
+        claves = [int(t) // bloque_ms * bloque_ms for t in leq_utc]
+        fallos += comparar(f"cubos (dt={dt:g})", tabla, "inicio_utc",
+                           referencia(db, claves, dt, leq_utc), dt)
+
+        tabla = calcular_metricas_noches(db, leq_utc, dt, umbrales_db=UMBRALES_DB)
+        dia, periodo = clasificar_periodos(leq_utc)
+        esperado = referencia(db, [int(d) for d in dia], dt, leq_utc, periodo == 2)
+        tabla = tabla.with_columns(tabla["noche"].cast(int).alias("noche_dia"))
+        fallos += comparar(f"noches (dt={dt:g})", tabla, "noche_dia", esperado, dt)
+
+    for fallo in fallos[:20]:
+        print(f"FALLO {fallo}")
+    if not fallos:
+        print("Métricas por bloque, cubo de tiempo y noche = referencia por muestra: OK")
+    return not fallos
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    sys.exit(0 if ejecutar() else 1)
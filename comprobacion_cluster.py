@@ -0,0 +1,221 @@
+"""
+Comprobación en localhost del procesamiento distribuido (``src.service.cluster``).
+
+Levanta un coordinador en 127.0.0.1 con un plazo corto sobre un archivo
+sintético (exportaciones zip generadas en un directorio temporal, más tres
+corruptas) y simula:
+
+- un trabajador que pide un lote y se desconecta sin responder (pérdida
+  del trabajador: el lote vuelve a la cola al cerrarse la conexión);
+- un trabajador que pide un lote y se queda callado sin renovar (el plazo
+  vence y el lote se reasigna);
+- dos trabajadores reales que procesan el resto.
+
+Comprueba que cada exportación válida se guarda exactamente una vez, que
+los lotes cedidos a los trabajadores perdidos se completan, que los fallos
+quedan registrados por exportación (``fallidos[(lote, ruta)]``) y que el
+resultado remoto coincide con el procesamiento local. Además comprueba, sin
+red, que los mensajes de una cesión caducada no devuelven, fallan ni
+completan un lote cedido de nuevo, y que un lote completado sale de la cola.
+
+Uso:
+    python comprobacion_cluster.py        # código de salida 1 si falla
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+META_REFERENCIA = os.path.join(RAIZ, "data", "meta.properties")
+N_EXPORTACIONES = 10
+N_MUESTRAS = 2000
+LEASE_S = 1.0
+
+
+def crear_archivo(destino: str) -> tuple[list[str], set[str]]:
+    """
+    Escribe las exportaciones sintéticas en ``destino``.
+
+    Returns
+    -------
+    tuple[list[str], set[str]]
+        Rutas en el orden de reparto y rutas corruptas.
+    """
+    rng = np.random.default_rng(0)
+    with open(META_REFERENCIA, "r", encoding="utf-8") as f:
+        meta = f.read()
+    validas = []
+    for k in range(N_EXPORTACIONES):
+        features = [{"type": "Feature",
+                     "geometry": {"type": "Point", "coordinates": [-74.0, 4.6]},
+                     "properties": {"leq_mean": round(float(60 + rng.normal(0, 5)), 2),
+                                    "leq_utc": 1_763_009_542_403 + i * 1000}}
+                    for i in range(N_MUESTRAS)]
+        ruta = os.path.join(destino, f"exp{k:02d}.zip")
+        with zipfile.ZipFile(ruta, "w") as z:
+            z.writestr("meta.properties",
+                       re.sub(r"(?m)^uuid=.*$", f"uuid=comprobacion-{k:04d}", meta))
+            z.writestr("track.geojson", json.dumps({"type": "FeatureCollection",
+                                                    "features": features}))
+        validas.append(ruta)
+    rotas = []
+    for nombre in ("roto_a.zip", "roto_b.zip", "roto_c.zip"):
+        ruta = os.path.join(destino, nombre)
+        with open(ruta, "wb") as f:
+            f.write(b"no es un zip")
+        rotas.append(ruta)
+    # Lotes de 2: [0,1] [2,3] [4,a] [5,6] [7,8] [9,b] [c]
+    rutas = validas[:5] + rotas[:1] + validas[5:] + rotas[1:]
+    return rutas, set(rotas)
+
+
+async def _trabajador_perdido(puerto: int, nombre: str, callado: bool) -> int:
+    """
+    Pide un lote y no lo devuelve: se desconecta enseguida o, si
+    ``callado``, sigue conectado sin renovar hasta que el coordinador cierra.
+    """
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    escritor.write(json.dumps({"tipo": "pedir", "trabajador": nombre}).encode() + b"\n")
+    await escritor.drain()
+    lote = json.loads(await lector.readline())["id"]
+    if callado:
+        await lector.read()
+    escritor.close()
+    return lote
+
+
+async def _ejecutar(rutas: list[str], ruta_base: str):
+    from src.service.cluster import Coordinador, trabajar
+
+    coordinador = Coordinador(rutas, tam_lote=2, lease_s=LEASE_S, max_intentos=3,
+                              puerto=0, ruta_base=ruta_base)
+    tarea = asyncio.create_task(coordinador.ejecutar())
+    while coordinador.puerto == 0:
+        await asyncio.sleep(0.01)
+
+    # Pérdida: se desconecta enseguida. Callado: sigue conectado sin renovar
+    # hasta el final, así que su lote solo vuelve a la cola al vencer el plazo
+    desconectado = await _trabajador_perdido(coordinador.puerto, "desconectado", False)
+    callado = asyncio.create_task(_trabajador_perdido(coordinador.puerto, "callado", True))
+    await asyncio.sleep(0.1)
+    lotes_trabajadores = await asyncio.gather(
+        trabajar("127.0.0.1", coordinador.puerto, "a"),
+        trabajar("127.0.0.1", coordinador.puerto, "b"))
+    resumen = await tarea
+    lote_callado = await callado
+    return coordinador, resumen, desconectado, lote_callado, lotes_trabajadores
+
+
+async def _comprobar_cesiones() -> list[str]:
+    """Mensajes de cesiones caducadas sobre un coordinador sin servidor."""
+    from src.service.cluster import Coordinador
+
+    fallos = []
+    coordinador = Coordinador(["a", "b"], tam_lote=1, lease_s=0.0, max_intentos=5)
+    lote, vieja = coordinador._ceder("x")
+    await asyncio.sleep(0.01)
+    coordinador._revisar_plazos()
+    lote_y, nueva = coordinador._ceder("y")
+    if lote_y == lote:
+        fallos.append("el plazo vencido no reencola el lote al final de la cola")
+    lote_y, nueva = coordinador._ceder("y")
+    if lote_y != lote:
+        fallos.append("el lote vencido no se vuelve a ceder")
+    coordinador._fallar(lote, vieja, "tardío")
+    await coordinador._completar(lote, vieja, [{"origen": "tardío"}], {})
+    if not coordinador._vigente(lote, nueva) or coordinador.resultados:
+        fallos.append("un mensaje de una cesión caducada alteró el lote cedido de nuevo")
+    await coordinador._completar(lote, nueva, [], {})
+    if lote not in coordinador._completados:
+        fallos.append("la cesión vigente no completa el lote")
+
+    # Resultado tardío de un lote vencido que sigue en cola: se acepta y sale de ella
+    otro = next(i for i in coordinador.lotes if i != lote)
+    coordinador._cedidos.pop(otro, None)
+    coordinador._pendientes.append(otro)
+    await coordinador._completar(otro, 1, [], {})
+    if otro in coordinador._pendientes or not coordinador.terminado:
+        fallos.append("un lote completado sigue en la cola")
+    return fallos
+
+
+def ejecutar() -> bool:
+    """
+    Ejecuta la comprobación completa.
+
+    Returns
+    -------
+    bool
+        True si todas las comprobaciones pasan.
+    """
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from src.io import abrir_base_resultados, cargar_tabla_grabaciones
+    from src.service.cluster import resumir_exportacion
+
+    destino = tempfile.mkdtemp(prefix="cluster_")
+    fallos: list[str] = []
+    try:
+        rutas, rotas = crear_archivo(destino)
+        ruta_base = os.path.join(destino, "resultados.sqlite")
+        coordinador, resumen, desconectado, callado, lotes = asyncio.run(
+            _ejecutar(rutas, ruta_base))
+        validas = [r for r in rutas if r not in rotas]
+
+        origenes = [r["origen"] for r in coordinador.resultados]
+        if sorted(origenes) != sorted(validas):
+            fallos.append(f"exportaciones guardadas {len(origenes)}, esperadas {len(validas)} "
+                          f"(sin duplicados)")
+        for nombre, lote in (("desconectado", desconectado), ("callado", callado)):
+            perdidas = [r for r in coordinador.lotes[lote] if r not in rotas]
+            if not set(perdidas) <= set(origenes):
+                fallos.append(f"lote {lote} del trabajador {nombre} no reasignado")
+        esperados = {(lote, ruta) for lote, rutas_lote in coordinador.lotes.items()
+                     for ruta in rutas_lote if ruta in rotas}
+        if set(resumen["fallidos"]) != esperados:
+            fallos.append(f"fallidos {sorted(resumen['fallidos'])}, esperados {sorted(esperados)}")
+        if resumen["lotes_fallidos"] != 1:
+            fallos.append(f"lotes fallidos {resumen['lotes_fallidos']}, esperado 1")
+
+        con = abrir_base_resultados(ruta_base)
+        try:
+            filas = cargar_tabla_grabaciones(con, "completo").height
+        finally:
+            con.close()
+        if filas != len(validas):
+            fallos.append(f"filas en la base {filas}, esperadas {len(validas)}")
+
+        local = resumir_exportacion(validas[0])
+        remoto = next(r for r in coordinador.resultados if r["origen"] == validas[0])
+        if local != remoto:
+            fallos.append("el resultado remoto difiere del local")
+
+        fallos.extend(asyncio.run(_comprobar_cesiones()))
+
+        print(f"lotes: {resumen['lotes']} (desconectado: {desconectado}, callado: {callado}); "
+              f"lotes por trabajador: {lotes}; {resumen['segundos']:.2f} s")
+    finally:
+        shutil.rmtree(destino, ignore_errors=True)
+
+    for fallo in fallos:
+        print(f"FALLO {fallo}")
+    if not fallos:
+        print("Cluster en localhost: plazo vencido, trabajador perdido, cesiones caducadas "
+              "y fallos por exportación: OK")
+    return not fallos
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    sys.exit(0 if ejecutar() else 1)
@@ -4,7 +4,7 @@ Pipeline principal para el procesamiento de datos acústicos.
 Este módulo orquesta el flujo de trabajo de extremo a extremo:
 - Lectura y transformación de datos (truncado al formato 25 + 6k, reducción porcentual).
 - Conversión dB a intensidad.
-- Cálculo de integrales numéricas, errores y estadísticos.
+- Cálculo de integrales numéricas, errores, estadísticos y métricas por bloque horario.
 - Exportación de resultados y generación de gráficos.
 - Cálculo de LAeq y dosis.
 
@@ -14,10 +14,11 @@ mejor trazabilidad del proceso.
 from __future__ import annotations
 
 import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
 from typing import Dict, Any
 
-import polars as pl
-
 # Configuración de logging global
 logging.basicConfig(
     level=logging.INFO,
@@ -27,89 +28,162 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from src.graphics import plot_and_save
-from src.io import leer_csv, exportar_resultados, exportar_estadisticos
+from src.io import (
+    abrir_base_resultados,
+    exportar_resultados,
+    exportar_estadisticos,
+    exportar_bloques,
+    guardar_lote,
+    leer_meta_properties,
+)
 from src.integration import (
-    db_a_intensidad,
-    calcular_laeq_y_dosis,
+    calcular_laeq_y_dosis_grabacion,
     calcular_errores,
     calcular_estadisticos,
     calcular_metodos_integracion,
+    calcular_metricas_bloques,
     mejor_metodo,
 )
-from src.utils import quitar_porcentaje_homogeneo, truncar_a_25_6k
+from src.utils import Grabacion, calcular_laeq_ventanas, ejecutar_grafo
 
 
-def _log_dataframe_info(nombre: str, df: pl.DataFrame) -> None:
-    """Registra información básica de un DataFrame para trazabilidad.
+def _log_grabacion_info(nombre: str, grabacion: Grabacion) -> None:
+    """Registra información básica de una grabación para trazabilidad.
 
     Parámetros:
-        nombre: Alias del DataFrame para el log.
-        df: DataFrame de polars.
+        nombre: Alias de la grabación para el log.
+        grabacion: Grabación (o vista) a describir.
     """
-    logger.info("DF %s -> filas=%d, columnas=%d", nombre, df.height, df.width)
-    logger.debug("DF %s columnas: %s", nombre, df.columns)
+    logger.info("Serie %s -> muestras=%d", nombre, len(grabacion))
+    logger.debug("Serie %s: %r", nombre, grabacion)
 
 
-def _exportar_y_graficar(
-    df: pl.DataFrame,
-    resultados: Dict[str, Any],
+def _tareas_escenario(
+    grabacion: Grabacion,
     ruta_prefix: str,
     objetivo_w_m2: float,
+    ruta_export_intensidad: str,
     ruta_export_resultados: str,
     ruta_export_estadisticos: str,
     ruta_export_laeq_dosis: str,
-) -> None:
-    """Exporta resultados, estadísticos, grafica series y calcula LAeq/dosis.
+    ruta_export_bloques: str,
+    escenario: str = "completo",
+    executor_graficos: Executor | None = None,
+) -> Dict[str, Any]:
+    """Grafo de tareas de un escenario: integración, exportaciones, gráficos y LAeq/dosis.
+
+    Las tareas se nombran ``"<escenario>/<etapa>"``; la tarea
+    ``"<escenario>/registro"`` devuelve los argumentos de
+    ``guardar_grabacion`` para la base de resultados.
 
     Parámetros:
-        df: DataFrame con columnas ["Tiempo (s)", "intensidad"].
-        resultados: Diccionario de resultados de métodos de integración.
+        grabacion: Grabación cuya intensidad y serie validada (cacheadas) se
+            exportan, integran y grafican.
         ruta_prefix: Prefijo para nombres de gráficos.
         objetivo_w_m2: Valor objetivo para cálculo de errores.
-        ruta_export_resultados: Ruta CSV para resultados completos.
-        ruta_export_estadisticos: Ruta CSV para estadísticos completos.
+        ruta_export_intensidad: Ruta CSV para la serie de intensidad.
+        ruta_export_resultados: Ruta CSV para resultados.
+        ruta_export_estadisticos: Ruta CSV para estadísticos.
         ruta_export_laeq_dosis: Ruta CSV para LAeq y dosis.
+        ruta_export_bloques: Ruta CSV para las métricas por bloque horario.
+        escenario: Nombre del escenario en la base de resultados.
+        executor_graficos: Pool de procesos para los gráficos (opcional). El
+            render de matplotlib retiene el GIL, así que en hilos no se solapa.
+
+    Retorna:
+        Diccionario ``nombre -> (funcion, dependencias)`` para ``ejecutar_grafo``.
     """
-    logger.info("Exportando resultados a %s", ruta_export_resultados)
-    errores = calcular_errores(resultados, objetivo_w_m2, df.height)
-    estadisticos = calcular_estadisticos(df["intensidad"].to_numpy())
-
-    exportar_resultados(resultados, errores, ruta_export_resultados)
-    exportar_estadisticos(estadisticos, ruta_export_estadisticos)
-
-    logger.info("Generando gráficos con prefijo '%s'", ruta_prefix)
-    plot_and_save(
-        df["Tiempo (s)"].to_numpy(),
-        df["intensidad"].to_numpy(),
-        resultados,
-        prefix=ruta_prefix,
-    )
-
-    logger.info("Calculando LAeq y dosis -> %s", ruta_export_laeq_dosis)
-    # Persistimos primero la serie de intensidad requerida por la función
-    df_intensidad_path = (
-        ruta_export_laeq_dosis.replace("laeq_dosis", "intensidad")
-    )
-    df.write_csv(df_intensidad_path)
-
-    energia = resultados[mejor_metodo(errores)]
-
-    calcular_laeq_y_dosis(
-        csv_path=df_intensidad_path,
-        columna_intensidad="intensidad",
-        dt=1.0,
-        energia_total=energia,
-        output_path=ruta_export_laeq_dosis,
-    )
-
-
-def main() -> None:
+    def intensidad() -> Grabacion:
+        logger.info("Convirtiendo dB a intensidad (%s)", escenario)
+        # La serie validada se construye aquí, antes de que las tareas que
+        # dependen de esta la lean en paralelo (la caché no tiene cerrojo)
+        grabacion.serie
+        return grabacion
+
+    def exportar_intensidad(g: Grabacion) -> None:
+        g.a_dataframe().write_csv(ruta_export_intensidad)
+
+    def integrar(g: Grabacion) -> Dict[str, Any]:
+        logger.info("Calculando métodos de integración (%s)", escenario)
+        return calcular_metodos_integracion(g)
+
+    def errores(resultados: Dict[str, Any]) -> Dict[str, Any]:
+        return calcular_errores(resultados, objetivo_w_m2, len(grabacion))
+
+    def exportar_res(resultados: Dict[str, Any], errores_: Dict[str, Any]) -> None:
+        logger.info("Exportando resultados a %s", ruta_export_resultados)
+        exportar_resultados(resultados, errores_, ruta_export_resultados)
+
+    def graficar(g: Grabacion, resultados: Dict[str, Any]) -> None:
+        logger.info("Generando gráficos con prefijo '%s'", ruta_prefix)
+        if executor_graficos is None:
+            plot_and_save(g, results=resultados, prefix=ruta_prefix)
+        else:
+            executor_graficos.submit(plot_and_save, g.tiempo, g.intensidad,
+                                     resultados, ruta_prefix).result()
+
+    def laeq_dosis(g: Grabacion, resultados: Dict[str, Any], errores_: Dict[str, Any]) -> tuple:
+        logger.info("Calculando LAeq y dosis -> %s", ruta_export_laeq_dosis)
+        return calcular_laeq_y_dosis_grabacion(
+            g,
+            energia_total=resultados[mejor_metodo(errores_)],
+            output_path=ruta_export_laeq_dosis,
+        )
+
+    def registro(resultados, errores_, estadisticos, laeq_dosis_, ventanas) -> Dict[str, Any]:
+        laeq, dosis, T_horas = laeq_dosis_
+        return dict(
+            meta=grabacion.meta,
+            escenario=escenario,
+            resultados=resultados,
+            errores=errores_,
+            estadisticos=estadisticos,
+            laeq=laeq,
+            dosis=dosis,
+            T_horas=T_horas,
+            niveles_db=grabacion.db,
+            ventanas=ventanas,
+        )
+
+    e = f"{escenario}/"
+    return {
+        e + "intensidad": (intensidad, ()),
+        e + "intensidad_csv": (exportar_intensidad, (e + "intensidad",)),
+        e + "integracion": (integrar, (e + "intensidad",)),
+        e + "errores": (errores, (e + "integracion",)),
+        e + "estadisticos": (calcular_estadisticos, (e + "intensidad",)),
+        e + "resultados_csv": (exportar_res, (e + "integracion", e + "errores")),
+        e + "estadisticos_csv": (lambda est: exportar_estadisticos(est, ruta_export_estadisticos),
+                                 (e + "estadisticos",)),
+        e + "bloques": (lambda g: calcular_metricas_bloques(g, bloque_s=3600.0), (e + "intensidad",)),
+        e + "bloques_csv": (lambda b: exportar_bloques(b, ruta_export_bloques), (e + "bloques",)),
+        e + "graficos": (graficar, (e + "intensidad", e + "integracion")),
+        e + "laeq_dosis": (laeq_dosis, (e + "intensidad", e + "integracion", e + "errores")),
+        e + "ventanas": (lambda g: calcular_laeq_ventanas(g, g.dt, 60.0), (e + "intensidad",)),
+        e + "registro": (registro, (e + "integracion", e + "errores", e + "estadisticos",
+                                    e + "laeq_dosis", e + "ventanas")),
+    }
+
+
+def main(max_trabajadores: int | None = None) -> None:
     """Ejecuta el pipeline principal de procesamiento de datos acústicos.
 
     Flujo resumido:
     1) Truncado 25 + 6k del archivo de entrada.
-    2) Cálculo de intensidad y resultados completos.
-    3) Reducción homogénea al 80% y resultados reducidos.
+    2) Escenario completo: intensidad, integración, exportaciones, gráficos y LAeq/dosis.
+    3) Escenario reducido al 80%, con las mismas etapas.
+
+    La serie en dB se lee una sola vez; el truncado y la reducción son vistas
+    sobre el mismo buffer y la intensidad se calcula una vez por escenario.
+    Las etapas de ambos escenarios forman un grafo de dependencias que se
+    ejecuta en un pool de hilos (los gráficos, en un pool de procesos): las
+    escrituras y los gráficos independientes se solapan. Los resultados se
+    guardan en la base en una sola transacción al final. El pool de procesos
+    usa el arranque "spawn": se alimenta desde los hilos del grafo y un
+    ``fork`` con hilos activos puede heredar bloqueos tomados.
+
+    Parámetros:
+        max_trabajadores: Tamaño del pool (``1`` = ejecución secuencial).
 
     Manejo de errores:
     - Cualquier excepción es registrada y relanzada con contexto adicional.
@@ -117,91 +191,64 @@ def main() -> None:
     try:
         logger.info("Iniciando el pipeline de procesamiento de datos acústicos.")
 
+        ruta_entrada = "data/datos.csv"
+        grabacion = Grabacion.desde_csv(ruta_entrada, columna="leq_mean")
+        ruta_meta = "data/meta.properties"
+        if os.path.exists(ruta_meta):
+            grabacion.meta = leer_meta_properties(ruta_meta)
+        _log_grabacion_info("entrada", grabacion)
+
         # 1) Truncado 25 + 6k
         logger.info("Truncando datos al formato 25 + 6k.")
-        ruta_entrada = "data/datos.csv"
-        ruta_truncado = "data/resultados/truncado_25_6k.csv"
-        if not truncar_a_25_6k(
-            ruta_entrada,
-            columna_y="leq_mean",
-            output_path=ruta_truncado,
-        ):  # No se truncó
-            logger.info("No se realizó truncado; usando archivo original.")
-            ruta_truncado = ruta_entrada
-
-        df_trunc = leer_csv(ruta_truncado)  # Evitar fila vacía final si existe
-        _log_dataframe_info("truncado_25_6k", df_trunc)
-
-        # 2) Serie completa
-        logger.info("Convirtiendo dB a intensidad (serie completa)")
-        intensidad = db_a_intensidad(df_trunc["leq_mean"].to_numpy())
-        df_completo = pl.DataFrame(
-            {
-                "Tiempo (s)": pl.Series(range(1, df_trunc.height + 1)),
-                "intensidad": intensidad,
-            }
-        )
-        ruta_intensidad_completa = "data/resultados/intensidad_completa.csv"
-        df_completo.write_csv(ruta_intensidad_completa)
-        _log_dataframe_info("intensidad_completa", df_completo)
-
-        logger.info("Calculando métodos de integración (serie completa)")
-        res_completo = calcular_metodos_integracion(
-            df_completo["Tiempo (s)"].to_numpy(),
-            df_completo["intensidad"].to_numpy(),
-        )
+        g_completo = grabacion.truncar_25_6k()
+        if len(g_completo) == len(grabacion):
+            logger.info("No se realizó truncado; usando serie original.")
+        _log_grabacion_info("truncado_25_6k", g_completo)
 
-        _exportar_y_graficar(
-            df=df_completo,
-            resultados=res_completo,
+        # Reducción homogénea al 80%
+        logger.info("Generando conjunto de datos reducido al 80%.")
+        g_red = g_completo.reducir(porcentaje=20.0)
+        _log_grabacion_info("reducido_80", g_red)
+
+        # 2) y 3) Grafo de tareas de ambos escenarios
+        executor_graficos = (ProcessPoolExecutor(max_workers=2, mp_context=get_context("spawn"))
+                             if max_trabajadores != 1 and (os.cpu_count() or 1) > 1 else None)
+        tareas = _tareas_escenario(
+            grabacion=g_completo,
             ruta_prefix="grafico_completo",
             objetivo_w_m2=90.4,
+            ruta_export_intensidad="data/resultados/intensidad_completa.csv",
             ruta_export_resultados="data/resultados/resultados_completos.csv",
             ruta_export_estadisticos="data/resultados/estadisticos_completos.csv",
             ruta_export_laeq_dosis="data/resultados/laeq_dosis_completo.csv",
+            ruta_export_bloques="data/resultados/bloques_completos.csv",
+            escenario="completo",
+            executor_graficos=executor_graficos,
         )
-
-        logger.info("Datos procesados y resultados guardados (serie completa)")
-
-        # 3) Reducción homogénea al 80%
-        logger.info("Generando conjunto de datos reducido al 80%.")
-        ruta_reducido = "data/resultados/reducido_80.csv"
-        quitar_porcentaje_homogeneo(
-            ruta_truncado,
-            columna_y="leq_mean",
-            porcentaje=20.0,
-            output_path=ruta_reducido,
-        )
-
-        df_red = leer_csv(ruta_reducido)
-        _log_dataframe_info("reducido_80", df_red)
-
-        logger.info("Convirtiendo dB a intensidad (reducido 80%%)")
-        df_red_int = pl.DataFrame(
-            {
-                "Tiempo (s)": pl.Series(range(1, df_red.height + 1)),
-                "intensidad": db_a_intensidad(df_red["leq_mean"].to_numpy()),
-            }
-        )
-        ruta_int_reducido = "data/resultados/intensidad_reducido_80.csv"
-        df_red_int.write_csv(ruta_int_reducido)
-        _log_dataframe_info("intensidad_reducido_80", df_red_int)
-
-        logger.info("Calculando métodos de integración (reducido 80%%)")
-        res_red = calcular_metodos_integracion(
-            df_red_int["Tiempo (s)"].to_numpy(),
-            df_red_int["intensidad"].to_numpy(),
-        )
-
-        _exportar_y_graficar(
-            df=df_red_int,
-            resultados=res_red,
+        tareas.update(_tareas_escenario(
+            grabacion=g_red,
             ruta_prefix="grafico_reducido_80",
             objetivo_w_m2=90.4,
+            ruta_export_intensidad="data/resultados/intensidad_reducido_80.csv",
             ruta_export_resultados="data/resultados/resultados_reducido_80.csv",
             ruta_export_estadisticos="data/resultados/estadisticos_reducido_80.csv",
             ruta_export_laeq_dosis="data/resultados/laeq_dosis_reducido_80.csv",
-        )
+            ruta_export_bloques="data/resultados/bloques_reducido_80.csv",
+            escenario="reducido_80",
+            executor_graficos=executor_graficos,
+        ))
+        try:
+            salidas = ejecutar_grafo(tareas, max_trabajadores=max_trabajadores)
+        finally:
+            if executor_graficos is not None:
+                executor_graficos.shutdown()
+        logger.info("Datos procesados y resultados guardados (ambos escenarios)")
+
+        con = abrir_base_resultados("data/resultados/resultados.sqlite")
+        try:
+            guardar_lote(con, [salidas["completo/registro"], salidas["reducido_80/registro"]])
+        finally:
+            con.close()
 
         logger.info("Pipeline completado.")
 
@@ -211,4 +258,10 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline de procesamiento de datos acústicos.")
+    parser.add_argument("--trabajadores", type=int, default=None,
+                        help="Hilos para las etapas independientes (1 = secuencial)")
+    args = parser.parse_args()
+    main(max_trabajadores=args.trabajadores)
@@ -0,0 +1,324 @@
+"""
+Regresión de extremo a extremo contra las salidas de referencia.
+
+Ejecuta el pipeline de ``main.py`` sobre una entrada fija en un directorio
+temporal, de forma secuencial y con dos trabajadores, y compara cada tabla
+generada con su versión de referencia en ``data/resultados/`` (tolerancia
+numérica relativa) y cada gráfico con ``IMG/`` (dimensiones y diferencia RMS
+de píxeles). Además mide cada etapa (tiempo de reloj y pico de memoria con
+``tracemalloc``) frente a un presupuesto.
+
+La entrada fija es ``data/regresion/datos.csv``: la columna ``leq_mean`` en
+bruto (dB con 6 decimales), versionada aparte de las referencias, de modo
+que ``--actualizar`` nunca altera la entrada. Su longitud (19974) no es de la
+forma 25 + 6k, así que las tablas de referencia cubren también el truncado
+del escenario completo; ``ejecutar`` falla si deja de ser así.
+
+El render se normaliza con ``ESTILO_GRAFICOS`` (backend Agg, DPI, fuente
+DejaVu Sans incluida en matplotlib, sin formato local): se aplica en el
+proceso y, mediante un ``matplotlibrc`` y ``MATPLOTLIBRC``, en los procesos
+de gráficos del pipeline. Así la tolerancia RMS puede ser estricta (un PNG
+en blanco da ~0.10).
+
+Uso:
+    python regression.py                  # comprueba; código de salida 1 si falla
+    python regression.py --factor-tiempo 3
+    python regression.py --actualizar     # reescribe las referencias
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import polars as pl
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIR_REFERENCIA = os.path.join(RAIZ, "data", "resultados")
+DIR_IMG_REFERENCIA = os.path.join(RAIZ, "IMG")
+ENTRADA = os.path.join(RAIZ, "data", "regresion", "datos.csv")
+
+TABLAS = (
+    "intensidad_completa.csv",
+    "resultados_completos.csv",
+    "estadisticos_completos.csv",
+    "laeq_dosis_completo.csv",
+    "bloques_completos.csv",
+    "intensidad_reducido_80.csv",
+    "resultados_reducido_80.csv",
+    "estadisticos_reducido_80.csv",
+    "laeq_dosis_reducido_80.csv",
+    "bloques_reducido_80.csv",
+)
+GRAFICOS = (
+    "grafico_completo_serie.png",
+    "grafico_completo_comparacion.png",
+    "grafico_reducido_80_serie.png",
+    "grafico_reducido_80_comparacion.png",
+)
+
+ESTILO_GRAFICOS = {
+    "backend": "agg",
+    "figure.dpi": 100,
+    "savefig.dpi": 100,
+    "font.family": "DejaVu Sans",
+    "font.size": 10,
+    "text.hinting": "force_autohint",
+    "text.hinting_factor": 8,
+    "text.antialiased": True,
+    "axes.formatter.use_locale": False,
+    "path.simplify": True,
+}
+
+# Presupuesto por etapa: (segundos, MB de pico de tracemalloc). Con margen
+# amplio sobre lo medido (20k muestras) para que valgan en cualquier máquina
+# Linux; ``--factor-tiempo`` los escala en máquinas lentas.
+PRESUPUESTOS = {
+    "lectura": (0.2, 5.0),
+    "intensidad": (0.05, 2.0),
+    "integracion": (0.1, 5.0),
+    "estadisticos": (0.1, 5.0),
+    "laeq_dosis": (0.1, 2.0),
+    "exportacion": (0.3, 5.0),
+    "graficos": (10.0, 50.0),
+    "pipeline": (20.0, 100.0),
+    "pipeline_2_trabajadores": (20.0, 100.0),
+}
+# Ejecuciones completas de main.py: (etapa, max_trabajadores)
+EJECUCIONES = (("pipeline", 1), ("pipeline_2_trabajadores", 2))
+
+logger = logging.getLogger("regression")
+
+
+@dataclass
+class Medida:
+    """Tiempo de reloj y pico de memoria de una etapa."""
+
+    etapa: str
+    segundos: float
+    pico_mb: float
+
+
+def medir(etapa: str, funcion: Callable, *args, **kwargs):
+    """Ejecuta ``funcion`` midiendo tiempo y pico de memoria."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        segundos = time.perf_counter() - t0
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return resultado, Medida(etapa, segundos, pico / 1e6)
+
+
+def normalizar_graficos(destino: str) -> None:
+    """
+    Fija ``ESTILO_GRAFICOS`` en este proceso y en los que se lancen después
+    (``matplotlibrc`` en ``destino`` y variable ``MATPLOTLIBRC``).
+    """
+    import matplotlib
+
+    with open(os.path.join(destino, "matplotlibrc"), "w", encoding="utf-8") as f:
+        f.writelines(f"{clave}: {valor}\n" for clave, valor in ESTILO_GRAFICOS.items())
+    os.environ["MATPLOTLIBRC"] = destino
+    os.environ["MPLBACKEND"] = "agg"
+    matplotlib.rcdefaults()
+    matplotlib.rcParams.update(ESTILO_GRAFICOS)
+
+
+def preparar_directorio(destino: str) -> str:
+    """Crea la estructura de ``main.py`` con la entrada fija en ``destino``."""
+    os.makedirs(os.path.join(destino, "data", "resultados"), exist_ok=True)
+    os.makedirs(os.path.join(destino, "IMG"), exist_ok=True)
+    ruta = os.path.join(destino, "data", "datos.csv")
+    shutil.copy(ENTRADA, ruta)
+    return ruta
+
+
+def medir_etapas(ruta_entrada: str, destino: str) -> list[Medida]:
+    """Ejecuta las etapas del escenario completo por separado y las mide."""
+    from src.graphics import plot_and_save
+    from src.integration import (
+        calcular_errores,
+        calcular_estadisticos,
+        calcular_laeq_y_dosis_grabacion,
+        calcular_metodos_integracion,
+        mejor_metodo,
+    )
+    from src.io import exportar_estadisticos, exportar_resultados
+    from src.utils import Grabacion
+
+    medidas = []
+    grabacion, m = medir("lectura", lambda: Grabacion.desde_csv(ruta_entrada).truncar_25_6k())
+    medidas.append(m)
+    _, m = medir("intensidad", lambda: grabacion.intensidad)
+    medidas.append(m)
+    resultados, m = medir("integracion", calcular_metodos_integracion, grabacion)
+    medidas.append(m)
+    estadisticos, m = medir("estadisticos", calcular_estadisticos, grabacion)
+    medidas.append(m)
+    errores = calcular_errores(resultados, 90.4, len(grabacion))
+    salida = os.path.join(destino, "etapas")
+    os.makedirs(os.path.join(salida, "IMG"), exist_ok=True)
+    _, m = medir("laeq_dosis", calcular_laeq_y_dosis_grabacion, grabacion,
+                 resultados[mejor_metodo(errores)], os.path.join(salida, "laeq_dosis.csv"))
+    medidas.append(m)
+
+    def exportar():
+        grabacion.a_dataframe().write_csv(os.path.join(salida, "intensidad.csv"))
+        exportar_resultados(resultados, errores, os.path.join(salida, "resultados.csv"))
+        exportar_estadisticos(estadisticos, os.path.join(salida, "estadisticos.csv"))
+
+    _, m = medir("exportacion", exportar)
+    medidas.append(m)
+
+    def graficar():
+        anterior = os.getcwd()
+        os.chdir(salida)
+        try:
+            plot_and_save(grabacion, results=resultados, prefix="etapas")
+        finally:
+            os.chdir(anterior)
+
+    _, m = medir("graficos", graficar)
+    medidas.append(m)
+    return medidas
+
+
+def comparar_tabla(nombre: str, generado: str, referencia: str, rtol: float) -> list[str]:
+    """Compara dos CSV columna a columna; devuelve la lista de fallos."""
+    if not os.path.exists(generado):
+        return [f"{nombre}: no se generó"]
+    a, b = pl.read_csv(generado), pl.read_csv(referencia)
+    if a.columns != b.columns:
+        return [f"{nombre}: columnas {a.columns} != {b.columns}"]
+    if a.height != b.height:
+        return [f"{nombre}: {a.height} filas != {b.height}"]
+    fallos = []
+    for col in a.columns:
+        if a[col].dtype.is_numeric():
+            x = a[col].cast(pl.Float64).to_numpy()
+            y = b[col].cast(pl.Float64).to_numpy()
+            if not np.allclose(x, y, rtol=rtol, atol=0.0, equal_nan=True):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    peor = np.nanmax(np.abs(x - y) / np.abs(y))
+                fallos.append(f"{nombre}[{col}]: error relativo máximo {peor:.3e} > {rtol:.0e}")
+        elif not a[col].equals(b[col]):
+            fallos.append(f"{nombre}[{col}]: valores distintos")
+    return fallos
+
+
+def comparar_grafico(nombre: str, generado: str, referencia: str, max_rms: float) -> list[str]:
+    """Compara dos PNG por dimensiones y diferencia RMS de píxeles."""
+    import matplotlib.image as mpimg
+
+    if not os.path.exists(generado):
+        return [f"{nombre}: no se generó"]
+    a, b = mpimg.imread(generado), mpimg.imread(referencia)
+    if a.shape != b.shape:
+        return [f"{nombre}: dimensiones {a.shape} != {b.shape}"]
+    rms = float(np.sqrt(np.mean((a - b) ** 2)))
+    logger.info(f"{nombre}: RMS de píxeles {rms:.3f}")
+    return [f"{nombre}: RMS de píxeles {rms:.3f} > {max_rms}"] if rms > max_rms else []
+
+
+def ejecutar(rtol: float = 1e-9,
+             max_rms: float = 0.02,
+             factor_tiempo: float = 1.0,
+             actualizar: bool = False) -> bool:
+    """
+    Ejecuta la regresión completa.
+
+    Returns
+    -------
+    bool
+        True si todas las comprobaciones pasan.
+    """
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from src.utils.validations import max_filas_validas
+
+    destino = tempfile.mkdtemp(prefix="regresion_")
+    anterior = os.getcwd()
+    fallos: list[str] = []
+    n_entrada = pl.read_csv(ENTRADA).height
+    if max_filas_validas(n_entrada) == n_entrada:
+        fallos.append(f"la entrada tiene {n_entrada} filas (25 + 6k): no ejercita el truncado")
+    try:
+        normalizar_graficos(destino)
+        etapas = os.path.join(destino, "etapas")
+        medidas = medir_etapas(preparar_directorio(etapas), etapas)
+
+        for etapa, trabajadores in EJECUCIONES:
+            directorio = os.path.join(destino, etapa)
+            preparar_directorio(directorio)
+            os.chdir(directorio)
+            import main  # su log va al data/ del primer directorio
+            _, m = medir(etapa, main.main, max_trabajadores=trabajadores)
+            medidas.append(m)
+            os.chdir(anterior)
+
+        for m in medidas:
+            limite_s, limite_mb = PRESUPUESTOS[m.etapa]
+            limite_s *= factor_tiempo
+            estado = "ok"
+            if m.segundos > limite_s:
+                fallos.append(f"etapa {m.etapa}: {m.segundos:.3f} s > {limite_s:.3f} s")
+                estado = "FALLO"
+            if m.pico_mb > limite_mb:
+                fallos.append(f"etapa {m.etapa}: {m.pico_mb:.1f} MB > {limite_mb:.1f} MB")
+                estado = "FALLO"
+            print(f"{m.etapa:<24} {m.segundos:8.3f} s / {limite_s:7.2f} s  "
+                  f"{m.pico_mb:7.1f} MB / {limite_mb:6.1f} MB  {estado}")
+
+        secuencial = os.path.join(destino, EJECUCIONES[0][0])
+        if actualizar:
+            for nombre in TABLAS:
+                shutil.copy(os.path.join(secuencial, "data", "resultados", nombre), DIR_REFERENCIA)
+            for nombre in GRAFICOS:
+                shutil.copy(os.path.join(secuencial, "IMG", nombre), DIR_IMG_REFERENCIA)
+            print("Referencias actualizadas.")
+            return not fallos
+
+        for etapa, _ in EJECUCIONES:
+            directorio = os.path.join(destino, etapa)
+            for nombre in TABLAS:
+                fallos += comparar_tabla(f"{etapa}/{nombre}",
+                                         os.path.join(directorio, "data", "resultados", nombre),
+                                         os.path.join(DIR_REFERENCIA, nombre), rtol)
+            for nombre in GRAFICOS:
+                fallos += comparar_grafico(f"{etapa}/{nombre}",
+                                           os.path.join(directorio, "IMG", nombre),
+                                           os.path.join(DIR_IMG_REFERENCIA, nombre), max_rms)
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(destino, ignore_errors=True)
+
+    for fallo in fallos:
+        print(f"FALLO: {fallo}")
+    print(f"{len(TABLAS)} tablas y {len(GRAFICOS)} gráficos comparados en "
+          f"{len(EJECUCIONES)} ejecuciones: "
+          f"{'OK' if not fallos else f'{len(fallos)} fallos'}")
+    return not fallos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regresión contra las salidas de referencia.")
+    parser.add_argument("--rtol", type=float, default=1e-9, help="Tolerancia relativa de las tablas")
+    parser.add_argument("--max-rms", type=float, default=0.02, help="RMS máximo de píxeles (0-1)")
+    parser.add_argument("--factor-tiempo", type=float, default=1.0,
+                        help="Escala los presupuestos de tiempo (máquinas lentas)")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="Reescribe las referencias con la salida actual")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+    sys.exit(0 if ejecutar(args.rtol, args.max_rms, args.factor_tiempo, args.actualizar) else 1)
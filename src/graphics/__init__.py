@@ -1,5 +1,12 @@
 """Visualización de datos."""
 
+from .report import plot_comparacion_grabaciones
+from .spectrogram import agregar_espectrograma, plot_espectrograma
 from .viewer import plot_and_save
 
-__all__ = ["plot_and_save"]
+__all__ = [
+    "agregar_espectrograma",
+    "plot_and_save",
+    "plot_comparacion_grabaciones",
+    "plot_espectrograma",
+]
@@ -0,0 +1,105 @@
+"""Figura resumen de la comparación entre grabaciones."""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import polars as pl
+from matplotlib.figure import Figure
+
+from ..integration.comparison import DIAS, agregar_por, preparar_comparacion
+
+logger = logging.getLogger(__name__)
+
+
+def plot_comparacion_grabaciones(tabla: pl.DataFrame,
+                                 prefix: str | None = None,
+                                 zona: str = "America/Bogota",
+                                 max_grupos: int = 15) -> str:
+    """
+    Genera y guarda ``IMG/{prefix}_comparacion_grabaciones.png``.
+
+    Cuatro paneles: distribución de LAeq por etiqueta (las ``max_grupos``
+    con más grabaciones), LAeq energético y dosis media por día de la
+    semana, L90 frente a LAeq coloreado por dosis y eventos por hora por
+    dispositivo.
+
+    Parameters
+    ----------
+    tabla : pl.DataFrame
+        Salida de ``cargar_tabla_grabaciones``.
+    prefix : str, optional
+        Prefijo del fichero, como en ``plot_and_save``.
+    zona : str, optional
+        Zona horaria local para el día de la semana.
+    max_grupos : int, optional
+        Número máximo de etiquetas y dispositivos mostrados.
+
+    Returns
+    -------
+    str
+        Ruta de la imagen guardada.
+    """
+    preparada = preparar_comparacion(tabla, zona)
+    fig = Figure(figsize=(16, 10))
+    ejes = fig.subplots(2, 2)
+
+    # Distribución de LAeq por etiqueta
+    ax = ejes[0, 0]
+    por_etiqueta = (preparada.explode("etiquetas").drop_nulls("etiquetas")
+                    .group_by("etiquetas").agg(pl.col("laeq_db"), n=pl.len())
+                    .sort("n", descending=True).head(max_grupos))
+    if por_etiqueta.height:
+        ax.boxplot(por_etiqueta["laeq_db"].to_list(), vert=False)
+        ax.set_yticks(np.arange(1, por_etiqueta.height + 1), por_etiqueta["etiquetas"].to_list())
+    ax.set_title("LAeq por etiqueta")
+    ax.set_xlabel("LAeq (dB(A))")
+    ax.grid(axis="x", linestyle="--", alpha=0.4)
+
+    # LAeq y dosis por día de la semana
+    ax = ejes[0, 1]
+    dias = agregar_por(preparada, "dia_semana")
+    orden = {d: i for i, d in enumerate(DIAS)}
+    dias = dias.with_columns(pl.col("valor").replace_strict(orden, return_dtype=pl.Int64)
+                             .alias("orden")).sort("orden")
+    x = np.arange(dias.height)
+    ax.bar(x, dias["laeq_db"].to_numpy(), color="teal", label="LAeq energético")
+    ax.set_xticks(x, dias["valor"].to_list())
+    ax.set_ylabel("LAeq (dB(A))")
+    ax.set_title("LAeq y dosis media por día de la semana")
+    ax2 = ax.twinx()
+    ax2.plot(x, dias["dosis_media_pct"].to_numpy(), color="crimson", marker="o", label="Dosis media")
+    ax2.set_ylabel("Dosis media (%)")
+    if dias.height:
+        minimo = np.nanmin(dias["laeq_db"].to_numpy())
+        ax.set_ylim(bottom=max(minimo - 10, 0))
+
+    # L90 frente a LAeq
+    ax = ejes[1, 0]
+    puntos = ax.scatter(preparada["laeq_db"].to_numpy(), preparada["l90_db"].to_numpy(),
+                        c=preparada["dosis_pct"].to_numpy(), cmap="viridis", s=12, alpha=0.7)
+    fig.colorbar(puntos, ax=ax, label="Dosis (%)")
+    ax.set_title("Ruido de fondo (L90) frente a LAeq")
+    ax.set_xlabel("LAeq (dB(A))")
+    ax.set_ylabel("L90 (dB(A))")
+    ax.grid(True, linestyle="--", alpha=0.4)
+
+    # Eventos por hora por dispositivo
+    ax = ejes[1, 1]
+    dispositivos = (agregar_por(preparada, "device_model")
+                    .sort("eventos_por_hora", descending=True, nulls_last=True).head(max_grupos))
+    y = np.arange(dispositivos.height)
+    ax.barh(y, dispositivos["eventos_por_hora"].fill_null(0).to_numpy(), color="orange")
+    ax.set_yticks(y, dispositivos["valor"].fill_null("desconocido").to_list())
+    ax.invert_yaxis()
+    ax.set_title("Eventos por hora por dispositivo")
+    ax.set_xlabel("Eventos / h")
+    ax.grid(axis="x", linestyle="--", alpha=0.4)
+
+    fig.suptitle(f"Comparación de {tabla.height} grabaciones")
+    fig.tight_layout()
+    ruta = f"IMG/{prefix}_comparacion_grabaciones.png"
+    fig.savefig(ruta)
+    logger.info(f"Figura de comparación guardada en {ruta}")
+    return ruta
@@ -0,0 +1,179 @@
+"""Espectrograma (tiempo × banda) de grabaciones largas.
+
+La matriz de niveles por banda se agrega en columnas del ancho de un píxel
+con media energética vectorizada (``np.add.reduceat`` sobre la matriz) y se dibuja
+como una única imagen (``imshow``), sin un artista por muestra. Los huecos
+de la grabación quedan en blanco.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+
+def agregar_espectrograma(leq_bandas: np.ndarray,
+                          leq_utc: np.ndarray | None = None,
+                          columnas: int = 1200) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Agrega una matriz ``(n_bandas, n_muestras)`` de niveles en columnas de
+    tiempo con media energética.
+
+    Parameters
+    ----------
+    leq_bandas : np.ndarray
+        Niveles en dB por banda y muestra. Los NaN se ignoran.
+    leq_utc : np.ndarray, optional
+        Marcas de tiempo en ms (epoch UTC). Si se indican, las columnas
+        cubren el intervalo de tiempo real (los huecos quedan vacíos); si
+        no, se reparte el índice de muestra.
+    columnas : int, optional
+        Número de columnas (píxeles) de la imagen.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Niveles ``(n_bandas, columnas)`` (NaN en columnas sin datos) y
+        bordes de las columnas (ms UTC o índice de muestra), de longitud
+        ``columnas + 1``.
+    """
+    leq_bandas = np.asarray(leq_bandas)
+    n = leq_bandas.shape[1]
+    eje = np.arange(n) if leq_utc is None else np.asarray(leq_utc, dtype=np.int64)
+    inicio, fin = int(eje.min()), int(eje.max()) + 1
+    columnas = max(min(columnas, fin - inicio), 1)
+    columna = ((eje - inicio) * columnas // (fin - inicio)).astype(np.int64)
+    bordes = inicio + np.arange(columnas + 1) * (fin - inicio) / columnas
+
+    # exp(x·ln10/10) es más rápido que 10**(x/10) sobre la matriz completa
+    energia = np.exp(leq_bandas * (np.log(10) / 10))
+    validos = ~np.isnan(energia)
+    hay_nan = not validos.all()
+    if hay_nan:
+        energia[~validos] = 0.0
+
+    niveles = np.full((leq_bandas.shape[0], columnas), np.nan)
+    if np.all(columna[1:] >= columna[:-1]):
+        # Serie ordenada: una sola reducción por columnas no vacías
+        inicios = np.searchsorted(columna, np.arange(columnas))
+        ocupadas = np.flatnonzero(np.diff(np.append(inicios, n)) > 0)
+        suma = np.add.reduceat(energia, inicios[ocupadas], axis=1)
+        if hay_nan:
+            cuentas = np.add.reduceat(validos, inicios[ocupadas], axis=1, dtype=np.int64)
+        else:
+            cuentas = np.diff(np.append(inicios[ocupadas], n))[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            niveles[:, ocupadas] = 10 * np.log10(suma / cuentas)
+    else:
+        for i in range(leq_bandas.shape[0]):
+            suma = np.bincount(columna, weights=energia[i], minlength=columnas)
+            cuentas = np.bincount(columna, weights=validos[i], minlength=columnas)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                niveles[i] = 10 * np.log10(suma / cuentas)
+    return niveles, bordes
+
+
+def plot_espectrograma(datos,
+                       bandas_hz: np.ndarray | None = None,
+                       leq_utc: np.ndarray | None = None,
+                       prefix: str | None = None,
+                       columnas: int = 1200,
+                       rango_db: tuple[float, float] | None = None) -> str:
+    """
+    Genera y guarda ``IMG/{prefix}_espectrograma.png``.
+
+    ``datos`` puede ser una ``ExportacionNoiseCapture``; en ese caso se
+    usan sus ``leq_bandas``, ``bandas_hz`` y ``leq_utc`` y los demás
+    argumentos de datos no se usan.
+
+    Parameters
+    ----------
+    datos : np.ndarray | ExportacionNoiseCapture
+        Niveles ``(n_bandas, n_muestras)`` en dB.
+    bandas_hz : np.ndarray, optional
+        Frecuencias centrales de las bandas.
+    leq_utc : np.ndarray, optional
+        Marcas de tiempo en ms (epoch UTC); el eje x se muestra en horas
+        desde el inicio.
+    prefix : str, optional
+        Prefijo del fichero, como en ``plot_and_save``.
+    columnas : int, optional
+        Resolución temporal de la imagen en píxeles.
+    rango_db : tuple[float, float], optional
+        Límites de la escala de color (por defecto percentiles 1 y 99).
+
+    Returns
+    -------
+    str
+        Ruta de la imagen guardada.
+    """
+    if hasattr(datos, "leq_bandas"):
+        datos, bandas_hz, leq_utc = datos.leq_bandas, datos.bandas_hz, datos.leq_utc
+    if bandas_hz is None:
+        bandas_hz = np.arange(datos.shape[0])
+
+    niveles, bordes = agregar_espectrograma(datos, leq_utc, columnas)
+    if leq_utc is None:
+        extent_x, etiqueta_x = (bordes[0], bordes[-1]), "Muestra"
+    else:
+        extent_x, etiqueta_x = (0.0, (bordes[-1] - bordes[0]) / 3_600_000), "Tiempo desde el inicio (h)"
+    if rango_db is None and np.isfinite(niveles).any():
+        rango_db = tuple(np.nanpercentile(niveles, [1, 99]))
+    vmin, vmax = rango_db or (None, None)
+
+    fig = Figure(figsize=(14, 6))
+    ax = fig.add_subplot(1, 1, 1)
+    imagen = ax.imshow(np.ma.masked_invalid(niveles), aspect="auto", origin="lower",
+                       interpolation="nearest", cmap="magma", vmin=vmin, vmax=vmax,
+                       extent=(*extent_x, -0.5, len(bandas_hz) - 0.5))
+    paso = max(len(bandas_hz) // 12, 1)
+    ax.set_yticks(np.arange(0, len(bandas_hz), paso))
+    ax.set_yticklabels([f"{f:g}" for f in np.asarray(bandas_hz)[::paso]])
+    ax.set_title("Espectrograma por bandas de tercio de octava")
+    ax.set_xlabel(etiqueta_x)
+    ax.set_ylabel("Frecuencia central (Hz)")
+    fig.colorbar(imagen, ax=ax, label="Nivel equivalente (dB)")
+    fig.tight_layout()
+
+    ruta = f"IMG/{prefix}_espectrograma.png"
+    fig.savefig(ruta)
+    logger.info(f"Espectrograma guardado en {ruta}")
+    return ruta
+
+
+if __name__ == "__main__":
+    # Benchmark: una semana a 1 s con 31 bandas
+    import argparse
+    import os
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark del espectrograma de una semana.")
+    parser.add_argument("--salida", default=None,
+                        help="Directorio donde escribir IMG/ (por defecto, uno temporal)")
+    args = parser.parse_args()
+
+    n, bandas = 7 * 86_400, np.array([20 * 2 ** (i / 3) for i in range(31)]).round()
+    rng = np.random.default_rng(0)
+    hora = (np.arange(n) / 3600) % 24
+    base = 55 + 10 * np.cos(2 * np.pi * (hora - 14) / 24)
+    matriz = (base[None, :] - 0.3 * np.arange(31)[:, None]
+              + rng.normal(0, 3, (31, n))).astype(np.float64)
+    utc = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 1000
+
+    # No se escribe en el IMG/ del repositorio
+    salida = args.salida or tempfile.mkdtemp(prefix="espectrograma_")
+    os.makedirs(os.path.join(salida, "IMG"), exist_ok=True)
+    os.chdir(salida)
+    t0 = time.perf_counter()
+    agregar_espectrograma(matriz, utc)
+    t1 = time.perf_counter()
+    ruta = plot_espectrograma(matriz, bandas, utc, prefix="benchmark_semana")
+    t2 = time.perf_counter()
+    print(f"muestras: {n} x {len(bandas)} bandas")
+    print(f"agregación: {(t1 - t0) * 1000:.0f} ms; agregación + render + PNG: {(t2 - t1) * 1000:.0f} ms")
+    print(f"figura: {os.path.abspath(ruta)}")
@@ -2,10 +2,15 @@
 
 from .metods import trapezoidal_rule, simpson_1_3_rule, simpson_3_8_rule
 from .dB_to_intensity import db_a_intensidad
-from .analize import calcular_laeq_y_dosis
+from .analize import analizar_grabacion, calcular_laeq_y_dosis, calcular_laeq_y_dosis_grabacion
 from .errors import calcular_errores, mejor_metodo, error_en_metodo
 from .statisticists import calcular_estadisticos
+from .blocks import calcular_metricas_bloques, calcular_metricas_noches, metricas_segmentos
 from .calculations import calcular_metodos_integracion
+from .merge import SerieFusionada, fusionar_grabaciones
+from .indicators import calcular_indicadores_lden, clasificar_periodos
+from .noise_map import MapaRuido
+from .comparison import agregar_por, comparar_grabaciones, preparar_comparacion
 
 __all__ = [
     "trapezoidal_rule",
@@ -13,9 +18,22 @@ __all__ = [
     "simpson_3_8_rule",
     "db_a_intensidad",
     "calcular_laeq_y_dosis",
+    "calcular_laeq_y_dosis_grabacion",
+    "analizar_grabacion",
     "calcular_errores",
     "mejor_metodo",
     "error_en_metodo",
     "calcular_estadisticos",
+    "calcular_metricas_bloques",
+    "calcular_metricas_noches",
+    "metricas_segmentos",
     "calcular_metodos_integracion",
+    "SerieFusionada",
+    "fusionar_grabaciones",
+    "calcular_indicadores_lden",
+    "clasificar_periodos",
+    "MapaRuido",
+    "agregar_por",
+    "comparar_grabaciones",
+    "preparar_comparacion",
 ]
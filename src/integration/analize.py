@@ -8,7 +8,10 @@ Guarda el resultado en:
 import polars as pl
 import os
 import logging
-from ..utils import calcular_laeq_t, calcular_dosis
+from ..utils import Grabacion, calcular_laeq_t, calcular_dosis
+from .calculations import calcular_metodos_integracion
+from .errors import calcular_errores, mejor_metodo
+from .statisticists import calcular_estadisticos
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -17,7 +20,7 @@ def calcular_laeq_y_dosis(csv_path: str,
                           columna_intensidad: str,
                           dt: float,
                           energia_total: float,
-                          output_path: str = "data/laeq_dosis.csv") -> None:
+                          output_path: str = "data/laeq_dosis.csv") -> tuple[float, float, float]:
     """
     Calcula LAeq,T y dosis de ruido desde intensidad.
 
@@ -31,6 +34,11 @@ def calcular_laeq_y_dosis(csv_path: str,
         Intervalo entre muestras en segundos.
     output_path : str, optional
         Ruta de salida.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        LAeq,T en dB(A), dosis en % y duración en horas.
     """
     logging.info(f"Leyendo archivo: {csv_path}")
     df = pl.read_csv(csv_path)
@@ -39,6 +47,37 @@ def calcular_laeq_y_dosis(csv_path: str,
         raise ValueError(f"Columna '{columna_intensidad}' no encontrada.")
 
     intensidades = df[columna_intensidad].to_numpy()
+    return _guardar_laeq_y_dosis(intensidades, dt, energia_total, output_path)
+
+
+def calcular_laeq_y_dosis_grabacion(grabacion: Grabacion,
+                                    energia_total: float,
+                                    output_path: str = "data/laeq_dosis.csv"
+                                    ) -> tuple[float, float, float]:
+    """
+    Calcula LAeq,T y dosis de una grabación ya cargada, sin releer disco.
+
+    Parameters
+    ----------
+    grabacion : Grabacion
+        Grabación cuya intensidad validada (``grabacion.serie``) y ``dt`` se
+        usan.
+    energia_total : float
+        Integral de la intensidad (mejor método).
+    output_path : str, optional
+        Ruta de salida.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        LAeq,T en dB(A), dosis en % y duración en horas.
+    """
+    return _guardar_laeq_y_dosis(grabacion.serie.y, grabacion.dt, energia_total, output_path)
+
+
+def _guardar_laeq_y_dosis(intensidades, dt: float, energia_total: float,
+                          output_path: str) -> tuple[float, float, float]:
+    """LAeq,T y dosis de una serie de intensidad; escribe el CSV de una fila."""
     T_seg = len(intensidades) * dt
     T_horas = T_seg / 3600
 
@@ -57,6 +96,49 @@ def calcular_laeq_y_dosis(csv_path: str,
     logging.info(f"LAeq,T = {laeq:.2f} dB(A)")
     logging.info(f"Dosis = {dosis:.2f}%")
     logging.info(f"Resultados guardados en: {output_path}")
+    return laeq, dosis, T_horas
+
+
+def analizar_grabacion(grabacion: Grabacion,
+                       objetivo_w_m2: float = 90.4,
+                       truncar: bool = True) -> dict:
+    """
+    Ejecuta en memoria la cadena truncado 25 + 6k -> intensidad ->
+    integración -> errores/estadísticos -> LAeq y dosis, sin escribir disco.
+
+    Parameters
+    ----------
+    grabacion : Grabacion
+        Serie en dB.
+    objetivo_w_m2 : float, optional
+        Nivel de referencia para el cálculo de errores.
+    truncar : bool, optional
+        Si se trunca al formato 25 + 6k antes de integrar.
+
+    Returns
+    -------
+    dict
+        Claves ``resultados``, ``errores``, ``estadisticos``, ``laeq``,
+        ``dosis``, ``T_horas`` y ``n`` (muestras analizadas).
+    """
+    g = grabacion.truncar_25_6k() if truncar else grabacion
+    # Una sola validación: todas las etapas usan g.serie
+    resultados = calcular_metodos_integracion(g.serie)
+    errores = calcular_errores(resultados, objetivo_w_m2, len(g))
+    estadisticos = calcular_estadisticos(g)
+
+    T_horas = len(g) * g.dt / 3600
+    laeq = calcular_laeq_t(g, g.dt, resultados[mejor_metodo(errores)])
+    dosis = calcular_dosis(laeq, T_horas)
+    return {
+        "resultados": {m: None if v is None else float(v) for m, v in resultados.items()},
+        "errores": errores,
+        "estadisticos": estadisticos,
+        "laeq": float(laeq),
+        "dosis": float(dosis),
+        "T_horas": T_horas,
+        "n": len(g),
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+"""
+Métricas por bloque: LAeq, LAmax, SEL y eventos sobre umbrales.
+
+La serie se segmenta en bloques (longitud fija, cubos de tiempo sobre
+``leq_utc`` o noches de evaluación) y todas las métricas se obtienen
+con unas pocas pasadas de ``ufunc.reduceat`` sobre los índices de inicio de
+cada bloque, sin bucles por muestra ni por bloque:
+
+- ``np.fmax/fmin.reduceat`` para LAmax y LAmin (ignoran NaN),
+- ``np.add.reduceat`` de la energía para LAeq y SEL,
+- ``np.add.reduceat`` de una matriz (umbral × muestra) de inicios de evento
+  y de muestras sobre el umbral.
+
+Un evento es una racha de muestras por encima del umbral; se cuenta en el
+bloque en que empieza. Un hueco (NaN) o una discontinuidad en ``leq_utc``
+(salto de más de 1.5·dt) corta la racha. SEL = 10·log10(Σ 10^(L/10)·dt / 1 s).
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import polars as pl
+
+from ..utils import Grabacion
+from .indicators import clasificar_periodos
+
+logger = logging.getLogger(__name__)
+
+UMBRALES_EVENTO_DB = (65.0, 75.0, 85.0)
+_LN10_10 = np.log(10) / 10
+# Salto entre marcas, en múltiplos de dt, a partir del cual la serie no es contigua
+_SALTO_DISCONTINUIDAD = 1.5
+
+
+def _niveles(datos) -> tuple[np.ndarray, float | None]:
+    """dB float de una ``Grabacion`` (y su ``dt``) o de un array."""
+    if isinstance(datos, Grabacion):
+        return np.asarray(datos.db), datos.dt
+    return np.asarray(datos), None
+
+
+def _discontinuidades(leq_utc: np.ndarray, dt: float) -> np.ndarray:
+    """True en cada muestra separada de la anterior por más de 1.5·dt."""
+    return np.r_[False, np.diff(leq_utc) > _SALTO_DISCONTINUIDAD * dt * 1000]
+
+
+def metricas_segmentos(db: np.ndarray,
+                       inicios: np.ndarray,
+                       dt: float = 1.0,
+                       umbrales_db: tuple[float, ...] = UMBRALES_EVENTO_DB,
+                       previos_db: np.ndarray | None = None,
+                       cortes: np.ndarray | None = None) -> dict[str, np.ndarray]:
+    """
+    Métricas de los segmentos ``db[inicios[i]:inicios[i + 1]]``.
+
+    Parameters
+    ----------
+    db : np.ndarray
+        Niveles en dB. Los NaN (huecos) no cuentan en ningún bloque.
+    inicios : np.ndarray
+        Índices de inicio de cada segmento, estrictamente crecientes.
+    dt : float, optional
+        Duración de cada muestra en segundos.
+    umbrales_db : tuple[float, ...], optional
+        Umbrales para el recuento de eventos y el tiempo por encima.
+    previos_db : np.ndarray, optional
+        Nivel de la muestra anterior a cada segmento en la serie original
+        (NaN si no hay). Solo hace falta si los segmentos no son contiguos
+        en el tiempo; por defecto se usa la muestra anterior de ``db``.
+    cortes : np.ndarray, optional
+        Booleano por muestra: True si no es contigua en el tiempo a la
+        anterior de ``db`` (la racha se corta ahí, como con un NaN).
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        ``n_muestras``, ``laeq_db``, ``lamax_db``, ``lamin_db``, ``sel_db``
+        y, por umbral ``u``, ``eventos_{u}`` y ``t_sobre_{u}_s``.
+    """
+    db = np.asarray(db)
+    inicios = np.asarray(inicios, dtype=np.intp)
+
+    validos = ~np.isnan(db)
+    hay_nan = not validos.all()
+    energia = np.exp(db.astype(np.float64, copy=False) * _LN10_10)
+    if hay_nan:
+        energia[~validos] = 0.0
+        n = np.add.reduceat(validos, inicios, dtype=np.int64)
+    else:
+        n = np.diff(np.append(inicios, db.shape[0]))
+
+    suma = np.add.reduceat(energia, inicios)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        laeq = 10 * np.log10(suma / n)
+        sel = 10 * np.log10(suma * dt)
+    metricas = {
+        "n_muestras": n,
+        "laeq_db": laeq,
+        "lamax_db": np.fmax.reduceat(db, inicios),
+        "lamin_db": np.fmin.reduceat(db, inicios),
+        "sel_db": sel,
+    }
+
+    if umbrales_db:
+        # Matriz (umbral, muestra): NaN compara como False, así que un hueco
+        # corta la racha
+        umbrales = np.asarray(umbrales_db, dtype=np.float64)[:, None]
+        sobre = db[None, :] > umbrales
+        inicio_evento = sobre.copy()
+        continua = sobre[:, :-1]
+        if cortes is not None:
+            continua = continua & ~np.asarray(cortes, dtype=bool)[None, 1:]
+        inicio_evento[:, 1:] &= ~continua
+        if previos_db is not None:
+            previo_sobre = np.asarray(previos_db)[None, :] > umbrales
+            inicio_evento[:, inicios] = sobre[:, inicios] & ~previo_sobre
+        eventos = np.add.reduceat(inicio_evento, inicios, axis=1, dtype=np.int64)
+        t_sobre = np.add.reduceat(sobre, inicios, axis=1, dtype=np.int64) * dt
+        for i, u in enumerate(umbrales_db):
+            metricas[f"eventos_{u:g}"] = eventos[i]
+            metricas[f"t_sobre_{u:g}_s"] = t_sobre[i]
+    return metricas
+
+
+def calcular_metricas_bloques(datos,
+                              dt: float | None = None,
+                              bloque_s: float = 3600.0,
+                              leq_utc: np.ndarray | None = None,
+                              umbrales_db: tuple[float, ...] = UMBRALES_EVENTO_DB
+                              ) -> pl.DataFrame:
+    """
+    Métricas por bloques de duración fija.
+
+    Parameters
+    ----------
+    datos : np.ndarray | Grabacion
+        Niveles en dB o una grabación (se usan sus dB y su ``dt``).
+    dt : float, optional
+        Intervalo entre muestras en segundos (por defecto el de la
+        grabación, o 1.0).
+    bloque_s : float, optional
+        Duración de cada bloque en segundos.
+    leq_utc : np.ndarray, optional
+        Marcas de tiempo en ms (epoch UTC). Si se indican, los bloques son
+        cubos de tiempo alineados a múltiplos de ``bloque_s`` desde epoch y
+        los cubos sin muestras no aparecen; un salto entre marcas de más de
+        1.5·dt corta las rachas de eventos. Si no, son tramos de
+        ``bloque_s / dt`` muestras desde el inicio.
+    umbrales_db : tuple[float, ...], optional
+        Umbrales de evento en dB.
+
+    Returns
+    -------
+    pl.DataFrame
+        Una fila por bloque: ``bloque``, ``inicio_s`` (o ``inicio_utc`` en
+        ms), ``duracion_s`` y las métricas de ``metricas_segmentos``.
+    """
+    db, dt_grabacion = _niveles(datos)
+    dt = dt if dt is not None else (dt_grabacion or 1.0)
+    n = db.shape[0]
+    if n == 0:
+        raise ValueError("La serie está vacía.")
+
+    cortes = None
+    if leq_utc is None:
+        por_bloque = max(int(round(bloque_s / dt)), 1)
+        inicios = np.arange(0, n, por_bloque)
+        columnas = {"inicio_s": inicios * dt}
+    else:
+        leq_utc = np.asarray(leq_utc, dtype=np.int64)
+        if np.any(leq_utc[1:] < leq_utc[:-1]):
+            orden = np.argsort(leq_utc, kind="stable")
+            db, leq_utc = db[orden], leq_utc[orden]
+        bloque_ms = int(round(bloque_s * 1000))
+        cubo = leq_utc // bloque_ms
+        inicios = np.flatnonzero(np.r_[True, cubo[1:] != cubo[:-1]])
+        columnas = {"inicio_utc": cubo[inicios] * bloque_ms}
+        cortes = _discontinuidades(leq_utc, dt)
+
+    metricas = metricas_segmentos(db, inicios, dt, umbrales_db, cortes=cortes)
+    tabla = pl.DataFrame({
+        "bloque": np.arange(inicios.shape[0]),
+        **columnas,
+        "duracion_s": metricas["n_muestras"] * dt,
+        **metricas,
+    })
+    logger.info(f"Métricas de {tabla.height} bloques de {bloque_s:g} s ({n} muestras)")
+    return tabla
+
+
+def calcular_metricas_noches(db: np.ndarray,
+                             leq_utc: np.ndarray,
+                             dt: float = 1.0,
+                             zona: str = "America/Bogota",
+                             horas_inicio: tuple[int, int, int] = (7, 19, 23),
+                             umbrales_db: tuple[float, ...] = UMBRALES_EVENTO_DB
+                             ) -> pl.DataFrame:
+    """
+    Métricas por noche de evaluación (periodo nocturno de
+    ``clasificar_periodos``, 23-07 h por defecto).
+
+    Una racha que empieza antes del inicio de la noche no cuenta como
+    evento nocturno, salvo que haya una discontinuidad en ``leq_utc`` justo
+    antes (salto de más de 1.5·dt), que corta la racha.
+
+    Parameters
+    ----------
+    db : np.ndarray
+        Niveles en dB.
+    leq_utc : np.ndarray
+        Marcas de tiempo en ms (epoch UTC), ordenadas.
+    dt : float, optional
+        Duración de cada muestra en segundos.
+    zona, horas_inicio : optional
+        Como en ``clasificar_periodos``.
+    umbrales_db : tuple[float, ...], optional
+        Umbrales de evento en dB.
+
+    Returns
+    -------
+    pl.DataFrame
+        Una fila por noche: ``noche`` (fecha local de inicio),
+        ``duracion_s`` y las métricas de ``metricas_segmentos``.
+    """
+    db = np.asarray(db)
+    dia, periodo = clasificar_periodos(leq_utc, zona, horas_inicio)
+    nocturno = np.flatnonzero(periodo == 2)
+    if nocturno.size == 0:
+        return pl.DataFrame()
+
+    # Las noches concatenadas no son contiguas: la racha al inicio de cada
+    # noche se decide con la muestra anterior en la serie completa
+    noches = dia[nocturno]
+    inicios = np.flatnonzero(np.r_[True, noches[1:] != noches[:-1]])
+    cortes = _discontinuidades(np.asarray(leq_utc, dtype=np.int64), dt)[nocturno]
+    previo = nocturno[inicios] - 1
+    previos_db = np.where((previo >= 0) & ~cortes[inicios], db[np.maximum(previo, 0)], np.nan)
+    metricas = metricas_segmentos(db[nocturno], inicios, dt, umbrales_db, previos_db,
+                                  cortes=cortes)
+
+    tabla = pl.DataFrame({
+        "noche": pl.Series(noches[inicios]).cast(pl.Int32).cast(pl.Date),
+        "duracion_s": metricas["n_muestras"] * dt,
+        **metricas,
+    })
+    logger.info(f"Métricas de {tabla.height} noches ({nocturno.size} muestras nocturnas)")
+    return tabla
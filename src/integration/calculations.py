@@ -3,38 +3,51 @@
 from .metods import trapezoidal_rule, simpson_1_3_rule, simpson_3_8_rule
 import numpy as np
 import logging
+from ..utils import Grabacion, SerieValidada, validar_serie
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def calcular_metodos_integracion(x: np.ndarray,
-                                 y: np.ndarray) -> dict[str, float | None]:
+def calcular_metodos_integracion(x: np.ndarray | Grabacion | SerieValidada,
+                                 y: np.ndarray | None = None) -> dict[str, float | None]:
     """
     Calcula la integral de y respecto a x usando varios
     métodos de integración numérica.
 
+    La serie se valida una sola vez (``validar_serie``, o la serie guardada
+    en la grabación) y los tres métodos reciben la ``SerieValidada``, sin
+    repetir sus comprobaciones.
+
     Parameters
     ----------
-    x : np.ndarray
-        Valores del eje independiente.
-    y : np.ndarray
-        Valores del eje dependiente.
+    x : np.ndarray | Grabacion | SerieValidada
+        Valores del eje independiente, una grabación (se integran su
+        tiempo e intensidad) o una serie ya validada.
+    y : np.ndarray, optional
+        Valores del eje dependiente (solo con arrays).
 
     Returns
     -------
     dict
         Diccionario con los resultados de cada método de integración.
     """
+    if isinstance(x, Grabacion):
+        serie = x.serie
+    elif isinstance(x, SerieValidada):
+        serie = x
+    else:
+        serie = validar_serie(x, y)
+
     resultados = {}
-    resultados['Trapecios'] = trapezoidal_rule(x, y)
+    resultados['Trapecios'] = trapezoidal_rule(serie)
     try:
-        resultados['Simpson 1/3'] = simpson_1_3_rule(x, y)
+        resultados['Simpson 1/3'] = simpson_1_3_rule(serie)
     except ValueError as e:
         logging.warning(f"Simpson 1/3 no se pudo calcular: {e}")
         resultados['Simpson 1/3'] = None
     try:
-        resultados['Simpson 3/8'] = simpson_3_8_rule(x, y)
+        resultados['Simpson 3/8'] = simpson_3_8_rule(serie)
     except ValueError as e:
         logging.warning(f"Simpson 3/8 no se pudo calcular: {e}")
         resultados['Simpson 3/8'] = None
@@ -0,0 +1,162 @@
+"""
+Comparación entre grabaciones a partir de la base de resultados.
+
+Los resultados de N grabaciones se cargan en una única tabla columnar
+(``cargar_tabla_grabaciones``) y se agregan con ``group_by`` de polars por
+dispositivo, etiqueta (``tags`` de ``meta.properties``; una grabación con
+varias etiquetas cuenta en cada una), día de la semana y fecha. Los niveles
+se promedian en energía; la salida es una tabla larga con una fila por
+(grupo, valor) ordenada por LAeq.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+GRUPOS = ("device_model", "etiqueta", "dia_semana", "fecha")
+DIAS = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+
+
+def preparar_comparacion(tabla: pl.DataFrame, zona: str = "America/Bogota") -> pl.DataFrame:
+    """
+    Añade las columnas de agrupación a la tabla de grabaciones.
+
+    Parameters
+    ----------
+    tabla : pl.DataFrame
+        Salida de ``cargar_tabla_grabaciones``.
+    zona : str, optional
+        Zona horaria local para el día de la semana y la fecha.
+
+    Returns
+    -------
+    pl.DataFrame
+        Tabla con ``etiquetas`` (lista), ``dia_semana`` (nombre), ``fecha``
+        local y ``energia`` (10^(LAeq/10)).
+    """
+    local = pl.from_epoch(pl.col("record_utc"), time_unit="ms").dt.replace_time_zone("UTC") \
+        .dt.convert_time_zone(zona)
+    return tabla.with_columns(
+        etiquetas=pl.col("tags").fill_null("").str.split(",")
+        .list.eval(pl.element().str.strip_chars().filter(pl.element() != "")),
+        dia_semana=local.dt.weekday().replace_strict(dict(enumerate(DIAS, 1)),
+                                                     return_dtype=pl.Utf8),
+        fecha=local.dt.date().cast(pl.Utf8),
+        energia=10 ** (pl.col("laeq_db") / 10),
+    )
+
+
+def agregar_por(tabla: pl.DataFrame, grupo: str) -> pl.DataFrame:
+    """
+    Agrega la tabla preparada por una columna de agrupación.
+
+    Parameters
+    ----------
+    tabla : pl.DataFrame
+        Salida de ``preparar_comparacion``.
+    grupo : str
+        ``"device_model"``, ``"etiqueta"``, ``"dia_semana"``, ``"fecha"`` u
+        otra columna de la tabla.
+
+    Returns
+    -------
+    pl.DataFrame
+        Una fila por valor del grupo: número de grabaciones, horas, LAeq
+        energético y máximo, dosis media y máxima, mediana de L90, eventos
+        totales y por hora, y posición en el ranking por LAeq.
+    """
+    if grupo == "etiqueta":
+        tabla = tabla.explode("etiquetas").rename({"etiquetas": "etiqueta"}) \
+            .filter(pl.col("etiqueta").is_not_null())
+    return (
+        tabla.group_by(grupo)
+        .agg(
+            n_grabaciones=pl.len(),
+            horas=pl.col("t_horas").sum(),
+            laeq_db=10 * (pl.col("energia") * pl.col("t_horas")).sum().log10()
+            - 10 * pl.col("t_horas").sum().log10(),
+            laeq_max_db=pl.col("laeq_db").max(),
+            dosis_media_pct=pl.col("dosis_pct").mean(),
+            dosis_max_pct=pl.col("dosis_pct").max(),
+            l90_mediana_db=pl.col("l90_db").median(),
+            eventos=pl.col("n_eventos").sum(),
+        )
+        .with_columns(eventos_por_hora=pl.col("eventos") / pl.col("horas"))
+        .sort("laeq_db", descending=True, nulls_last=True)
+        .with_columns(ranking=pl.int_range(1, pl.len() + 1, dtype=pl.UInt32))
+        .rename({grupo: "valor"})
+        .with_columns(pl.col("valor").cast(pl.Utf8), grupo=pl.lit(grupo))
+    )
+
+
+def comparar_grabaciones(tabla: pl.DataFrame,
+                         grupos: tuple[str, ...] = GRUPOS,
+                         zona: str = "America/Bogota") -> pl.DataFrame:
+    """
+    Calcula los agregados de todos los grupos en una tabla larga.
+
+    Parameters
+    ----------
+    tabla : pl.DataFrame
+        Salida de ``cargar_tabla_grabaciones``.
+    grupos : tuple[str, ...], optional
+        Columnas de agrupación.
+    zona : str, optional
+        Zona horaria local.
+
+    Returns
+    -------
+    pl.DataFrame
+        Columnas ``grupo``, ``valor``, ``ranking`` y los agregados de
+        ``agregar_por``.
+
+    Raises
+    ------
+    ValueError
+        Si la tabla está vacía.
+    """
+    if tabla.height == 0:
+        raise ValueError("No hay grabaciones que comparar.")
+    preparada = preparar_comparacion(tabla, zona)
+    resumen = pl.concat([agregar_por(preparada, g) for g in grupos], how="vertical_relaxed")
+    columnas = ["grupo", "valor", "ranking"]
+    resumen = resumen.select(columnas + [c for c in resumen.columns if c not in columnas])
+    logger.info(f"Comparación de {tabla.height} grabaciones en {len(grupos)} agrupaciones "
+                f"({resumen.height} filas)")
+    return resumen
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from ..graphics import plot_comparacion_grabaciones
+    from ..io import abrir_base_resultados, cargar_tabla_grabaciones
+    from ..io.database import RUTA_BASE
+
+    parser = argparse.ArgumentParser(description="Informe comparativo entre grabaciones.")
+    parser.add_argument("--base", default=RUTA_BASE, help="Base SQLite de resultados")
+    parser.add_argument("--escenario", default="completo")
+    parser.add_argument("--prefijo", default="informe", help="Prefijo de la figura en IMG/")
+    parser.add_argument("--salida", default="data/resultados/comparacion_grabaciones.csv")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+    t0 = time.perf_counter()
+    con = abrir_base_resultados(args.base)
+    tabla = cargar_tabla_grabaciones(con, args.escenario)
+    con.close()
+    resumen = comparar_grabaciones(tabla)
+    os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+    resumen.write_csv(args.salida)
+    plot_comparacion_grabaciones(tabla, prefix=args.prefijo)
+    with pl.Config(tbl_rows=20, tbl_cols=8):
+        print(resumen.filter(pl.col("ranking") <= 5))
+    print(f"{tabla.height} grabaciones comparadas en {time.perf_counter() - t0:.2f} s "
+          f"(tabla: {args.salida})")
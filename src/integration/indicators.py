@@ -0,0 +1,171 @@
+"""
+Indicadores día/tarde/noche: Lday, Levening, Lnight y Lden.
+
+Las marcas ``leq_utc`` se pasan a hora local (con cambios de horario) y se
+clasifican en periodos de forma vectorizada. La energía de cada
+(día, periodo) se acumula con ``np.bincount``, sin bucles por muestra.
+Por defecto se usan los periodos de la Directiva 2002/49/CE: día 07-19 h,
+tarde 19-23 h y noche 23-07 h, con penalizaciones de +5 dB (tarde) y
++10 dB (noche). La noche se asigna al día en que comienza.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone, tzinfo
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+PERIODOS = ("dia", "tarde", "noche")
+PENALIZACIONES_DB = (0.0, 5.0, 10.0)
+_MS_HORA = 3_600_000
+_S_DIA = 86_400
+
+
+def _desfases_ms(leq_utc: np.ndarray, zona: tzinfo) -> np.ndarray:
+    """Desfase local-UTC (ms) por muestra, consultando la zona una vez por hora UTC."""
+    horas, inversa = np.unique(leq_utc // _MS_HORA, return_inverse=True)
+    desfases = np.array([
+        datetime.fromtimestamp(int(h) * 3600, tz=timezone.utc)
+        .astimezone(zona).utcoffset().total_seconds() * 1000
+        for h in horas
+    ], dtype=np.int64)
+    return desfases[inversa]
+
+
+def clasificar_periodos(leq_utc: np.ndarray,
+                        zona: str | tzinfo = "America/Bogota",
+                        horas_inicio: tuple[int, int, int] = (7, 19, 23)
+                        ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Asigna a cada marca UTC su día de evaluación y su periodo local.
+
+    Parameters
+    ----------
+    leq_utc : np.ndarray
+        Marcas de tiempo en ms (epoch UTC).
+    zona : str | tzinfo, optional
+        Zona horaria local.
+    horas_inicio : tuple, optional
+        Hora local de inicio de día, tarde y noche.
+
+    Returns
+    -------
+    tuple
+        ``(dia, periodo)``: día de evaluación en días desde epoch (un día
+        empieza a la hora de inicio del periodo diurno) y código de periodo
+        (0 = día, 1 = tarde, 2 = noche).
+    """
+    if isinstance(zona, str):
+        zona = ZoneInfo(zona)
+    leq_utc = np.asarray(leq_utc, dtype=np.int64)
+    local_s = (leq_utc + _desfases_ms(leq_utc, zona)) // 1000
+
+    ini_dia, ini_tarde, ini_noche = (h * 3600 for h in horas_inicio)
+    # Segundos desde el inicio del día de evaluación (07:00 por defecto)
+    desplazado = local_s - ini_dia
+    dia = desplazado // _S_DIA
+    segundo = desplazado % _S_DIA
+
+    periodo = np.full(leq_utc.shape, 2, dtype=np.int8)
+    periodo[segundo < ini_noche - ini_dia] = 1
+    periodo[segundo < ini_tarde - ini_dia] = 0
+    return dia, periodo
+
+
+def _lden(niveles: np.ndarray, horas: np.ndarray) -> np.ndarray:
+    """Lden a partir de los niveles (..., 3) por periodo."""
+    penalizado = niveles + np.asarray(PENALIZACIONES_DB)
+    return 10 * np.log10(np.sum(horas * 10 ** (penalizado / 10), axis=-1) / 24)
+
+
+def calcular_indicadores_lden(leq_utc: np.ndarray,
+                              leq_db: np.ndarray,
+                              dt: float = 1.0,
+                              zona: str | tzinfo = "America/Bogota",
+                              horas_inicio: tuple[int, int, int] = (7, 19, 23)
+                              ) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Calcula Lday, Levening, Lnight y Lden por día y agregados.
+
+    Parameters
+    ----------
+    leq_utc : np.ndarray
+        Marcas de tiempo en ms (epoch UTC); pueden abarcar varios días y
+        varias grabaciones concatenadas.
+    leq_db : np.ndarray
+        Niveles en dB(A). Los NaN se ignoran.
+    dt : float, optional
+        Duración de cada muestra en segundos (para la cobertura).
+    zona : str | tzinfo, optional
+        Zona horaria local.
+    horas_inicio : tuple, optional
+        Hora local de inicio de día, tarde y noche.
+
+    Returns
+    -------
+    tuple[pl.DataFrame, pl.DataFrame]
+        Tabla por día (``fecha``, niveles por periodo, ``Lden_dB`` y
+        cobertura en %) y tabla agregada de una fila con la media
+        energética de cada periodo sobre todos los días. ``Lden_dB`` es NaN
+        si falta algún periodo.
+
+    Raises
+    ------
+    ValueError
+        Si los arrays difieren en longitud o no hay muestras válidas.
+    """
+    leq_utc = np.asarray(leq_utc)
+    leq_db = np.asarray(leq_db, dtype=np.float64)
+    if leq_utc.shape != leq_db.shape:
+        raise ValueError("leq_utc y leq_db deben tener la misma longitud.")
+    validos = ~np.isnan(leq_db)
+    if not validos.any():
+        raise ValueError("No hay muestras válidas para calcular indicadores.")
+
+    dia, periodo = clasificar_periodos(leq_utc[validos], zona, horas_inicio)
+    energia = 10 ** (leq_db[validos] / 10)
+
+    dia0 = dia.min()
+    n_dias = int(dia.max() - dia0) + 1
+    clave = (dia - dia0) * 3 + periodo
+    e_sum = np.bincount(clave, weights=energia, minlength=3 * n_dias).reshape(n_dias, 3)
+    cuentas = np.bincount(clave, minlength=3 * n_dias).reshape(n_dias, 3)
+
+    ini_dia, ini_tarde, ini_noche = horas_inicio
+    horas = np.array([ini_tarde - ini_dia, ini_noche - ini_tarde, 24 - (ini_noche - ini_dia)],
+                     dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        niveles = 10 * np.log10(e_sum / cuentas)
+        lden = _lden(niveles, horas)
+        niveles_agr = 10 * np.log10(e_sum.sum(axis=0) / cuentas.sum(axis=0))
+        lden_agr = _lden(niveles_agr, horas)
+    cobertura = 100 * cuentas * dt / (horas * 3600)
+
+    con_datos = cuentas.sum(axis=1) > 0
+    fechas = (np.arange(n_dias) + dia0).astype("datetime64[D]")[con_datos]
+    por_dia = pl.DataFrame({
+        "fecha": fechas,
+        "Lday_dB": niveles[con_datos, 0],
+        "Levening_dB": niveles[con_datos, 1],
+        "Lnight_dB": niveles[con_datos, 2],
+        "Lden_dB": lden[con_datos],
+        "cobertura_dia_%": cobertura[con_datos, 0],
+        "cobertura_tarde_%": cobertura[con_datos, 1],
+        "cobertura_noche_%": cobertura[con_datos, 2],
+    })
+    agregado = pl.DataFrame({
+        "dias": [int(con_datos.sum())],
+        "Lday_dB": [niveles_agr[0]],
+        "Levening_dB": [niveles_agr[1]],
+        "Lnight_dB": [niveles_agr[2]],
+        "Lden_dB": [float(lden_agr)],
+    })
+    logger.info(f"Indicadores Lden: {int(con_datos.sum())} días, "
+                f"Lden agregado = {float(lden_agr):.2f} dB(A)")
+    return por_dia, agregado
@@ -0,0 +1,268 @@
+"""
+Fusión sincronizada de varias grabaciones sobre una rejilla UTC común.
+
+Cada dispositivo aporta pares (``leq_utc`` en ms, ``leq_mean`` en dB). Las
+muestras se asignan al segundo UTC que les corresponde y se acumulan
+energéticamente en arrays del tamaño de la salida, procesando cada
+dispositivo por bloques. La memoria crece con la duración cubierta, no con
+el número de dispositivos.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+import polars as pl
+
+from ..utils import Grabacion
+
+logger = logging.getLogger(__name__)
+
+MODOS_FUSION = ("media", "suma")
+# Hueco máximo (s) sin cobertura que se rellena interpolando: uno mayor no se
+# inventa, sino que separa la serie en segmentos
+MAX_HUECO_S = 60
+# Duración máxima de la rejilla (s): por encima, las marcas son sospechosas
+MAX_DURACION_S = 400 * 86_400
+
+
+@dataclass(slots=True)
+class SerieFusionada:
+    """
+    Serie combinada en una rejilla de 1 s.
+
+    Attributes
+    ----------
+    t0_utc : int
+        Inicio de la rejilla en ms (epoch), múltiplo de 1000.
+    leq : np.ndarray
+        Nivel combinado en dB por segundo (NaN sin cobertura).
+    n_dispositivos : np.ndarray
+        Dispositivos con muestra en cada segundo.
+    rango_db : np.ndarray
+        Diferencia máx - mín entre dispositivos (0 con un solo dispositivo).
+    discrepancia : np.ndarray
+        True donde ``rango_db`` supera el umbral de discrepancia.
+    """
+
+    t0_utc: int
+    leq: np.ndarray
+    n_dispositivos: np.ndarray
+    rango_db: np.ndarray
+    discrepancia: np.ndarray
+
+    def __len__(self) -> int:
+        return self.leq.shape[0]
+
+    @property
+    def leq_utc(self) -> np.ndarray:
+        """Marca UTC (ms) de cada segundo de la rejilla."""
+        return self.t0_utc + 1000 * np.arange(len(self), dtype=np.int64)
+
+    def a_dataframe(self) -> pl.DataFrame:
+        """DataFrame con una fila por segundo de la rejilla."""
+        return pl.DataFrame({
+            "leq_utc": self.leq_utc,
+            "leq_mean": self.leq,
+            "n_dispositivos": self.n_dispositivos,
+            "rango_db": self.rango_db,
+            "discrepancia": self.discrepancia,
+        })
+
+    def segmentos(self, max_hueco_s: int = MAX_HUECO_S) -> list[slice]:
+        """
+        Tramos de la rejilla separados por huecos sin cobertura de más de
+        ``max_hueco_s`` segundos; cada tramo empieza y acaba con cobertura.
+        """
+        posiciones = np.flatnonzero(~np.isnan(self.leq))
+        if not len(posiciones):
+            return []
+        cortes = np.flatnonzero(np.diff(posiciones) - 1 > max_hueco_s)
+        inicios = posiciones[np.r_[0, cortes + 1]]
+        finales = posiciones[np.r_[cortes, len(posiciones) - 1]] + 1
+        return [slice(int(i), int(f)) for i, f in zip(inicios, finales)]
+
+    def _grabacion(self, tramo: slice, meta) -> Grabacion:
+        db = self.leq[tramo]
+        validos = ~np.isnan(db)
+        huecos = len(db) - int(validos.sum())
+        if huecos:
+            logger.warning(f"Tramo de la serie fusionada con {huecos} segundos sin cobertura; "
+                           f"se interpolan.")
+            posiciones = np.flatnonzero(validos)
+            db = np.interp(np.arange(len(db)), posiciones, db[posiciones])
+        return Grabacion(db, dt=1.0, meta=meta)
+
+    def a_grabacion(self, meta=None, max_hueco_s: int = MAX_HUECO_S) -> Grabacion:
+        """
+        Convierte la serie en una ``Grabacion`` (dt = 1 s) para los cálculos
+        de integración y LAeq/dosis.
+
+        Los huecos sin cobertura de hasta ``max_hueco_s`` segundos se
+        rellenan interpolando linealmente en dB; los mayores no se rellenan
+        (inventarían exposición): use ``a_grabaciones``.
+
+        Raises
+        ------
+        ValueError
+            Si ningún segundo tiene cobertura o hay un hueco mayor que
+            ``max_hueco_s``.
+        """
+        tramos = self.segmentos(max_hueco_s)
+        if not tramos:
+            raise ValueError("La serie fusionada no contiene muestras.")
+        if len(tramos) > 1:
+            raise ValueError(f"La serie fusionada tiene huecos de más de {max_hueco_s} s "
+                             f"({len(tramos)} tramos); use a_grabaciones.")
+        return self._grabacion(tramos[0], meta)
+
+    def a_grabaciones(self, meta=None,
+                      max_hueco_s: int = MAX_HUECO_S) -> list[tuple[int, Grabacion]]:
+        """
+        Una ``Grabacion`` por tramo de ``segmentos(max_hueco_s)``, con los
+        huecos cortos interpolados como en ``a_grabacion``.
+
+        Returns
+        -------
+        list[tuple[int, Grabacion]]
+            Inicio UTC (ms) de cada tramo y su grabación.
+        """
+        return [(self.t0_utc + 1000 * tramo.start, self._grabacion(tramo, meta))
+                for tramo in self.segmentos(max_hueco_s)]
+
+
+def _columnas(grabacion) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Extrae (leq_utc, leq_mean) de una exportación o de una tupla, sin las
+    muestras con marca no positiva (ausente o centinela).
+    """
+    if hasattr(grabacion, "leq_utc"):
+        utc, db = np.asarray(grabacion.leq_utc), np.asarray(grabacion.leq_mean)
+    else:
+        utc, db = (np.asarray(c) for c in grabacion)
+    validas = utc > 0
+    if not validas.all():
+        utc, db = utc[validas], db[validas]
+    return utc, db
+
+
+def _bloques_por_segundo(utc: np.ndarray, bloque: int) -> Iterable[slice]:
+    """Parte ``utc`` (ordenado) en bloques que no dividen un mismo segundo."""
+    n = len(utc)
+    ini = 0
+    while ini < n:
+        fin = min(ini + bloque, n)
+        if fin < n:
+            segundo = utc[fin] - utc[fin] % 1000
+            corte = ini + int(np.searchsorted(utc[ini:fin], segundo))
+            if corte == ini:  # el bloque entero cae en un mismo segundo
+                corte = ini + int(np.searchsorted(utc[ini:], segundo + 1000))
+            fin = corte
+        yield slice(ini, fin)
+        ini = fin
+
+
+def fusionar_grabaciones(grabaciones: Sequence,
+                         modo: str = "media",
+                         umbral_discrepancia_db: float = 6.0,
+                         bloque: int = 1 << 16,
+                         max_duracion_s: int = MAX_DURACION_S) -> SerieFusionada:
+    """
+    Alinea N grabaciones en una rejilla UTC de 1 s y las combina
+    energéticamente.
+
+    Parameters
+    ----------
+    grabaciones : Sequence
+        ``ExportacionNoiseCapture`` o tuplas ``(leq_utc_ms, leq_db)``.
+    modo : str, optional
+        ``"media"`` (media energética entre dispositivos) o ``"suma"``
+        (suma de potencias).
+    umbral_discrepancia_db : float, optional
+        Diferencia máx - mín entre dispositivos a partir de la cual se marca
+        el segundo como discrepante.
+    bloque : int, optional
+        Muestras por bloque al recorrer cada dispositivo.
+    max_duracion_s : int, optional
+        Duración máxima de la rejilla; evita reservar arrays gigantes por
+        una marca temporal errónea.
+
+    Returns
+    -------
+    SerieFusionada
+        Serie combinada desde el primer al último segundo cubierto.
+
+    Raises
+    ------
+    ValueError
+        Si el modo no es válido, no hay muestras con marca temporal o la
+        rejilla supera ``max_duracion_s``.
+    """
+    if modo not in MODOS_FUSION:
+        raise ValueError(f"Modo de fusión '{modo}' no válido; use {MODOS_FUSION}.")
+
+    # Primera pasada: extremos de la rejilla (O(1) memoria adicional)
+    inicio, final = None, None
+    for k, g in enumerate(grabaciones):
+        utc, _ = _columnas(g)
+        total = len(g.leq_utc if hasattr(g, "leq_utc") else g[0])
+        if len(utc) < total:
+            logger.warning(f"Dispositivo {k}: {total - len(utc)} muestras sin marca temporal "
+                           f"válida descartadas")
+        if len(utc):
+            inicio = utc.min() if inicio is None else min(inicio, utc.min())
+            final = utc.max() if final is None else max(final, utc.max())
+    if inicio is None:
+        raise ValueError("No hay muestras con marca temporal para fusionar.")
+
+    t0 = int(inicio) - int(inicio) % 1000
+    n = (int(final) - t0) // 1000 + 1
+    if n > max_duracion_s:
+        raise ValueError(f"La rejilla cubriría {n} s (> {max_duracion_s} s); "
+                         f"revise las marcas leq_utc.")
+    energia = np.zeros(n, dtype=np.float64)
+    n_disp = np.zeros(n, dtype=np.int32)
+    l_min = np.full(n, np.inf, dtype=np.float32)
+    l_max = np.full(n, -np.inf, dtype=np.float32)
+
+    for k, g in enumerate(grabaciones):
+        utc, db = _columnas(g)
+        if len(utc) > 1 and np.any(utc[1:] < utc[:-1]):
+            orden = np.argsort(utc, kind="stable")
+            utc, db = utc[orden], db[orden]
+
+        for s in _bloques_por_segundo(utc, bloque):
+            validos = ~np.isnan(db[s])
+            idx = (utc[s][validos] - t0) // 1000
+            if not len(idx):
+                continue
+            e = 10 ** (db[s][validos] / 10)
+            # Un valor por segundo y dispositivo: media energética de sus muestras
+            segundos, primeros, cuentas = np.unique(idx, return_index=True, return_counts=True)
+            e_seg = np.add.reduceat(e, primeros) / cuentas
+            l_seg = 10 * np.log10(e_seg)
+
+            energia[segundos] += e_seg
+            n_disp[segundos] += 1
+            l_min[segundos] = np.minimum(l_min[segundos], l_seg)
+            l_max[segundos] = np.maximum(l_max[segundos], l_seg)
+        logger.info(f"Dispositivo {k}: {len(utc)} muestras acumuladas")
+
+    cubiertos = n_disp > 0
+    leq = np.full(n, np.nan)
+    if modo == "media":
+        leq[cubiertos] = 10 * np.log10(energia[cubiertos] / n_disp[cubiertos])
+    else:
+        leq[cubiertos] = 10 * np.log10(energia[cubiertos])
+
+    rango = np.zeros(n, dtype=np.float32)
+    rango[cubiertos] = l_max[cubiertos] - l_min[cubiertos]
+    discrepancia = rango > umbral_discrepancia_db
+
+    logger.info(f"Fusión de {len(grabaciones)} dispositivos: {n} s, "
+                f"{int((~cubiertos).sum())} sin cobertura, "
+                f"{int(discrepancia.sum())} con discrepancia > {umbral_discrepancia_db} dB")
+    return SerieFusionada(t0, leq, n_disp, rango, discrepancia)
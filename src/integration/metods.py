@@ -1,47 +1,67 @@
-"""Métodos de integración numérica: trapecios, Simpson 1/3 y 3/8."""
+"""Métodos de integración numérica: trapecios, Simpson 1/3 y 3/8.
+
+Cada método acepta ``(x, y)`` o una ``SerieValidada`` en lugar de ``x``; en
+el segundo caso las longitudes y el paso ya están comprobados y solo queda
+una verificación O(1) del número de puntos.
+"""
 
 import numpy as np
 import logging
 
+from ..utils.transforms import suma_compensada
+from ..utils.validations import SerieValidada
+
 logger = logging.getLogger(__name__)
 
 
-def trapezoidal_rule(x: np.ndarray, y: np.ndarray) -> float:
+def trapezoidal_rule(x: np.ndarray | SerieValidada, y: np.ndarray | None = None) -> float:
     """
     Calcula la integral usando la regla del trapecio.
 
+    Con una serie validada equiespaciada la suma se acumula en float64 con
+    compensación (``suma_compensada``); en los demás casos se usa la suma
+    por pares de NumPy en el tipo de ``y``.
+
     Parameters
     ----------
-    x : np.ndarray
-        Valores del eje independiente.
-    y : np.ndarray
-        Valores del eje dependiente.
+    x : np.ndarray | SerieValidada
+        Valores del eje independiente, o una serie ya validada.
+    y : np.ndarray, optional
+        Valores del eje dependiente (no se usa con una serie validada).
 
     Returns
     -------
     float
         Valor de la integral.
     """
+    if isinstance(x, SerieValidada):
+        # Paso constante: h·(Σy − (y0 + yn)/2) con suma compensada en float64
+        result = (x.h * (suma_compensada(x.y) - (float(x.y[0]) + float(x.y[-1])) / 2)
+                  if x.h is not None else np.trapezoid(x.y, x.x))
+        logger.info(f"Integral Trapecios: {result:.6f}")
+        return result
+
     if len(x) != len(y):
         raise ValueError("Los arrays x e y deben tener la misma longitud.")
     if len(x) < 2:
         raise ValueError("Se requieren al menos 2 puntos para la regla del trapecio.")
 
-    result = np.trapz(y, x)
+    result = np.trapezoid(y, x)
     logger.info(f"Integral Trapecios: {result:.6f}")
     return result
 
 
-def simpson_1_3_rule(x: np.ndarray, y: np.ndarray) -> float:
+def simpson_1_3_rule(x: np.ndarray | SerieValidada, y: np.ndarray | None = None) -> float:
     """
     Calcula la integral usando Simpson 1/3.
 
     Parameters
     ----------
-    x : np.ndarray
-        Valores del eje independiente (deben ser equiespaciados).
-    y : np.ndarray
-        Valores del eje dependiente.
+    x : np.ndarray | SerieValidada
+        Valores del eje independiente (deben ser equiespaciados), o una
+        serie ya validada.
+    y : np.ndarray, optional
+        Valores del eje dependiente (no se usa con una serie validada).
 
     Returns
     -------
@@ -53,35 +73,44 @@ def simpson_1_3_rule(x: np.ndarray, y: np.ndarray) -> float:
     ValueError
         Si el número de puntos no es impar, menor que 3, o los puntos no son equiespaciados.
     """
-    if len(x) != len(y):
-        raise ValueError("Los arrays x e y deben tener la misma longitud.")
-    n = len(x)
-    if n < 3:
-        raise ValueError("Se requieren al menos 3 puntos para Simpson 1/3.")
-    if n % 2 == 0:
-        raise ValueError("Simpson 1/3 requiere un número impar de puntos (n_puntos >= 3).")
-
-    # Verificar que los puntos estén equiespaciados
-    dx = np.diff(x)
-    if not np.allclose(dx, dx[0]):
-        raise ValueError("Simpson 1/3 requiere puntos equiespaciados.")
-
-    h = dx[0]
-    result = (h / 3) * (y[0] + y[-1] + 4 * np.sum(y[1:-1:2]) + 2 * np.sum(y[2:-1:2]))
+    if isinstance(x, SerieValidada):
+        if not x.admite_simpson_1_3:
+            raise ValueError("Simpson 1/3 requiere un número impar de puntos (n_puntos >= 3).")
+        if x.h is None:
+            raise ValueError("Simpson 1/3 requiere puntos equiespaciados.")
+        h, y = x.h, x.y
+    else:
+        if len(x) != len(y):
+            raise ValueError("Los arrays x e y deben tener la misma longitud.")
+        n = len(x)
+        if n < 3:
+            raise ValueError("Se requieren al menos 3 puntos para Simpson 1/3.")
+        if n % 2 == 0:
+            raise ValueError("Simpson 1/3 requiere un número impar de puntos (n_puntos >= 3).")
+
+        # Verificar que los puntos estén equiespaciados
+        dx = np.diff(x)
+        if not np.allclose(dx, dx[0]):
+            raise ValueError("Simpson 1/3 requiere puntos equiespaciados.")
+        h = dx[0]
+
+    result = (h / 3) * (y[0] + y[-1] + 4 * np.sum(y[1:-1:2], dtype=np.float64)
+                       + 2 * np.sum(y[2:-1:2], dtype=np.float64))
     logger.info(f"Integral Simpson 1/3: {result:.6f}")
     return result
 
 
-def simpson_3_8_rule(x: np.ndarray, y: np.ndarray) -> float:
+def simpson_3_8_rule(x: np.ndarray | SerieValidada, y: np.ndarray | None = None) -> float:
     """
     Calcula la integral usando Simpson 3/8.
 
     Parameters
     ----------
-    x : np.ndarray
-        Valores del eje independiente (deben ser equiespaciados).
-    y : np.ndarray
-        Valores del eje dependiente.
+    x : np.ndarray | SerieValidada
+        Valores del eje independiente (deben ser equiespaciados), o una
+        serie ya validada.
+    y : np.ndarray, optional
+        Valores del eje dependiente (no se usa con una serie validada).
 
     Returns
     -------
@@ -93,26 +122,63 @@ def simpson_3_8_rule(x: np.ndarray, y: np.ndarray) -> float:
     ValueError
         Si (n_puntos - 1) no es múltiplo de 3, o los puntos no son equiespaciados.
     """
-    if len(x) != len(y):
-        raise ValueError("Los arrays x e y deben tener la misma longitud.")
-    n = len(x)
-    if n < 4:
-        raise ValueError("Se requieren al menos 4 puntos para Simpson 3/8.")
-    if (n - 1) % 3 != 0:
-        raise ValueError("Simpson 3/8 requiere que el número de subintervalos sea múltiplo de 3 "
-                         "(es decir, n_puntos ≡ 1 mod 3).")
-
-    # Verificar que los puntos estén equiespaciados
-    dx = np.diff(x)
-    if not np.allclose(dx, dx[0]):
-        raise ValueError("Simpson 3/8 requiere puntos equiespaciados.")
-
-    h = dx[0]
+    if isinstance(x, SerieValidada):
+        if not x.admite_simpson_3_8:
+            raise ValueError("Simpson 3/8 requiere que el número de subintervalos sea múltiplo de 3 "
+                             "(es decir, n_puntos ≡ 1 mod 3).")
+        if x.h is None:
+            raise ValueError("Simpson 3/8 requiere puntos equiespaciados.")
+        h, y, n = x.h, x.y, len(x)
+    else:
+        if len(x) != len(y):
+            raise ValueError("Los arrays x e y deben tener la misma longitud.")
+        n = len(x)
+        if n < 4:
+            raise ValueError("Se requieren al menos 4 puntos para Simpson 3/8.")
+        if (n - 1) % 3 != 0:
+            raise ValueError("Simpson 3/8 requiere que el número de subintervalos sea múltiplo "
+                             "de 3 (es decir, n_puntos ≡ 1 mod 3).")
+
+        # Verificar que los puntos estén equiespaciados
+        dx = np.diff(x)
+        if not np.allclose(dx, dx[0]):
+            raise ValueError("Simpson 3/8 requiere puntos equiespaciados.")
+        h = dx[0]
+
     # Construir coeficientes: 1, 3, 3, 2, 3, 3, 2, ..., 3, 3, 1
     coef = np.ones(n)
     coef[1:-1] = 3  # Todos los internos empiezan con 3
     coef[3:-1:3] = 2  # Cada tercer índice interno (3, 6, 9, ...) se corrige a 2
 
-    result = (3 * h / 8) * np.dot(coef, y)
+    result = (3 * h / 8) * np.dot(coef, y.astype(np.float64, copy=False))
     logger.info(f"Integral Simpson 3/8: {result:.6f}")
     return result
+
+
+if __name__ == "__main__":
+    # Benchmark: lote de series largas, comprobaciones por llamada frente a
+    # una sola validación
+    import time
+
+    from ..utils.validations import validar_serie
+
+    logger.setLevel(logging.WARNING)
+    n_series, n = 200, 25 + 6 * 50_000
+    rng = np.random.default_rng(0)
+    x = np.arange(1, n + 1)
+    lote = [10 ** ((60 + rng.normal(0, 5, n)) / 10) * 1e-12 for _ in range(n_series)]
+    metodos = (trapezoidal_rule, simpson_1_3_rule, simpson_3_8_rule)
+
+    t0 = time.perf_counter()
+    por_llamada = [[m(x, y) for m in metodos] for y in lote]
+    t1 = time.perf_counter()
+    series = [validar_serie(x, y, h=1.0) for y in lote]
+    t2 = time.perf_counter()
+    validadas = [[m(s) for m in metodos] for s in series]
+    t3 = time.perf_counter()
+
+    assert np.allclose(por_llamada, validadas, rtol=1e-12)
+    print(f"{n_series} series x {n} muestras")
+    print(f"comprobaciones en cada método: {(t1 - t0) * 1000:.0f} ms")
+    print(f"validación única: {(t2 - t1) * 1000:.0f} ms + métodos: {(t3 - t2) * 1000:.0f} ms "
+          f"= {(t3 - t1) * 1000:.0f} ms")
@@ -0,0 +1,323 @@
+"""
+Mapa de ruido: agregación espacial de tracks en una rejilla regular.
+
+Cada muestra geolocalizada se asigna a una celda de ``tamano_celda_m``
+metros (proyección equirectangular alrededor de una latitud de referencia
+fija). Dos índices con los mismos parámetros comparten rejilla, así que los
+índices construidos por separado (por ejemplo, uno por dispositivo) se
+pueden fusionar.
+
+Por celda se acumulan la energía, el número de muestras y un histograma de
+niveles, de modo que los tracks se incorporan de forma incremental y los
+niveles percentiles (L10, L50, L90) y las consultas por umbral se responden
+desde el índice sin volver a leer los datos.
+
+Las filas por celda solo crecen por el final (capacidad que se duplica) y
+un índice ordenado de claves -> fila localiza las celdas ya existentes, que
+se actualizan en su sitio: incorporar un track cuesta O(celdas del track ×
+clases) más un O(celdas) en enteros por las celdas nuevas. El histograma
+usa uint16 y pasa a uint32 solo si alguna clase lo desborda.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+_M_POR_GRADO = 111_320.0
+_DESPLAZAMIENTO = np.int64(1) << 31
+
+
+class MapaRuido:
+    """
+    Índice de rejilla con energía, recuento e histograma de niveles por celda.
+
+    Parameters
+    ----------
+    tamano_celda_m : float, optional
+        Lado de la celda en metros.
+    lat_ref : float, optional
+        Latitud de referencia de la proyección (por defecto 0: rejilla global
+        con celdas de ``tamano_celda_m`` en el ecuador). Para celdas de lado
+        exacto en una zona, se indica su latitud; los índices que se vayan a
+        fusionar deben usar la misma.
+    max_accuracy_m : float, optional
+        Precisión de localización máxima admitida (``accuracy``); las
+        muestras menos precisas se descartan. Una precisión desconocida
+        (NaN) no descarta la muestra.
+    rango_db : tuple[float, float], optional
+        Rango del histograma de niveles.
+    resolucion_db : float, optional
+        Anchura de las clases del histograma.
+    """
+
+    def __init__(self,
+                 tamano_celda_m: float = 25.0,
+                 lat_ref: float = 0.0,
+                 max_accuracy_m: float = 20.0,
+                 rango_db: tuple[float, float] = (20.0, 140.0),
+                 resolucion_db: float = 1.0):
+        self.tamano_celda_m = tamano_celda_m
+        self.lat_ref = lat_ref
+        self.max_accuracy_m = max_accuracy_m
+        self.rango_db = rango_db
+        self.resolucion_db = resolucion_db
+        n_clases = int(round((rango_db[1] - rango_db[0]) / resolucion_db)) + 1
+        self._n = 0
+        self._claves = np.empty(0, dtype=np.int64)
+        self._energia = np.empty(0, dtype=np.float64)
+        self._muestras = np.empty(0, dtype=np.int64)
+        self._histograma = np.empty((0, n_clases), dtype=np.uint16)
+        # Índice ordenado: claves ordenadas y fila de cada una
+        self._ordenadas = np.empty(0, dtype=np.int64)
+        self._orden = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def claves(self) -> np.ndarray:
+        """Clave de cada celda (en orden de incorporación)."""
+        return self._claves[:self._n]
+
+    @property
+    def energia(self) -> np.ndarray:
+        """Suma de 10^(L/10) por celda."""
+        return self._energia[:self._n]
+
+    @property
+    def muestras(self) -> np.ndarray:
+        """Número de muestras por celda."""
+        return self._muestras[:self._n]
+
+    @property
+    def histograma(self) -> np.ndarray:
+        """Histograma de niveles ``(n_celdas, n_clases)``."""
+        return self._histograma[:self._n]
+
+    def _pasos_grados(self) -> tuple[float, float]:
+        dlat = self.tamano_celda_m / _M_POR_GRADO
+        dlon = self.tamano_celda_m / (_M_POR_GRADO * np.cos(np.radians(self.lat_ref)))
+        return dlon, dlat
+
+    def _claves_celda(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        dlon, dlat = self._pasos_grados()
+        ix = np.floor(lon / dlon).astype(np.int64)
+        iy = np.floor(lat / dlat).astype(np.int64)
+        return (ix << 32) + (iy + _DESPLAZAMIENTO)
+
+    def _indices(self) -> tuple[np.ndarray, np.ndarray]:
+        """Índices (ix, iy) de las celdas."""
+        return self.claves >> 32, (self.claves & 0xFFFFFFFF) - _DESPLAZAMIENTO
+
+    def agregar(self,
+                lon: np.ndarray,
+                lat: np.ndarray,
+                leq_db: np.ndarray,
+                accuracy: np.ndarray | None = None) -> int:
+        """
+        Incorpora muestras al índice.
+
+        Parameters
+        ----------
+        lon, lat : np.ndarray
+            Coordenadas en grados (WGS84). Las muestras sin posición (NaN)
+            se descartan.
+        leq_db : np.ndarray
+            Niveles en dB(A).
+        accuracy : np.ndarray, optional
+            Precisión de localización en metros (NaN si es desconocida).
+
+        Returns
+        -------
+        int
+            Número de muestras incorporadas.
+        """
+        validos = np.isfinite(lon) & np.isfinite(lat) & np.isfinite(leq_db)
+        if accuracy is not None:
+            validos &= ~(accuracy > self.max_accuracy_m)
+        if not validos.any():
+            return 0
+        lon, lat, db = lon[validos], lat[validos], leq_db[validos]
+
+        claves, inversa = np.unique(self._claves_celda(lon, lat), return_inverse=True)
+        n_clases = self._histograma.shape[1]
+        clases = np.clip(((db - self.rango_db[0]) / self.resolucion_db).round().astype(np.int64),
+                         0, n_clases - 1)
+        energia = np.bincount(inversa, weights=10 ** (db / 10), minlength=len(claves))
+        muestras = np.bincount(inversa, minlength=len(claves))
+        histograma = np.bincount(inversa * n_clases + clases,
+                                 minlength=len(claves) * n_clases).reshape(-1, n_clases)
+
+        self._fusionar_arrays(claves, energia, muestras, histograma)
+        return int(validos.sum())
+
+    def agregar_exportacion(self, exportacion) -> int:
+        """Incorpora una ``ExportacionNoiseCapture``."""
+        return self.agregar(exportacion.lon, exportacion.lat,
+                            exportacion.leq_mean, exportacion.accuracy)
+
+    def fusionar(self, otro: MapaRuido) -> None:
+        """
+        Incorpora otro índice con la misma rejilla.
+
+        Raises
+        ------
+        ValueError
+            Si la rejilla (celda o ``lat_ref``) o el histograma no coinciden.
+        """
+        if (otro.tamano_celda_m, otro.lat_ref, otro.rango_db, otro.resolucion_db) != (
+                self.tamano_celda_m, self.lat_ref, self.rango_db, self.resolucion_db):
+            raise ValueError("Los mapas tienen rejillas o histogramas distintos.")
+        self._fusionar_arrays(otro.claves, otro.energia, otro.muestras, otro.histograma)
+
+    def _reservar(self, n: int) -> None:
+        """Garantiza capacidad para ``n`` celdas, duplicando la actual."""
+        capacidad = self._claves.shape[0]
+        if n <= capacidad:
+            return
+        capacidad = max(n, 2 * capacidad, 1024)
+        for nombre in ("_claves", "_energia", "_muestras", "_histograma"):
+            actual = getattr(self, nombre)
+            nuevo = np.zeros((capacidad, *actual.shape[1:]), dtype=actual.dtype)
+            nuevo[:self._n] = actual[:self._n]
+            setattr(self, nombre, nuevo)
+
+    def _fusionar_arrays(self, claves, energia, muestras, histograma) -> None:
+        """Suma por celda (``claves`` únicas); las celdas nuevas se añaden al final."""
+        pos = np.searchsorted(self._ordenadas, claves)
+        existe = pos < self._ordenadas.shape[0]
+        existe[existe] = self._ordenadas[pos[existe]] == claves[existe]
+        filas = np.empty(claves.shape[0], dtype=np.int64)
+        filas[existe] = self._orden[pos[existe]]
+
+        nuevas = ~existe
+        if (m := int(np.count_nonzero(nuevas))):
+            self._reservar(self._n + m)
+            claves_nuevas = claves[nuevas]
+            filas_nuevas = np.arange(self._n, self._n + m)
+            filas[nuevas] = filas_nuevas
+            self._claves[filas_nuevas] = claves_nuevas
+            orden = np.argsort(claves_nuevas)
+            insercion = np.searchsorted(self._ordenadas, claves_nuevas[orden])
+            self._ordenadas = np.insert(self._ordenadas, insercion, claves_nuevas[orden])
+            self._orden = np.insert(self._orden, insercion, filas_nuevas[orden])
+            self._n += m
+
+        self._energia[filas] += energia
+        self._muestras[filas] += muestras
+        suma = self._histograma[filas].astype(np.int64) + histograma
+        if suma.max(initial=0) > np.iinfo(self._histograma.dtype).max:
+            logger.info("Histograma del mapa ampliado a uint32")
+            self._histograma = self._histograma.astype(np.uint32)
+        self._histograma[filas] = suma
+
+    @property
+    def leq_db(self) -> np.ndarray:
+        """Nivel medio energético por celda."""
+        return 10 * np.log10(self.energia / self.muestras)
+
+    def percentiles(self, niveles: tuple[int, ...] = (10, 50, 90),
+                    mascara: np.ndarray | None = None) -> np.ndarray:
+        """
+        Niveles estadísticos Lx (superados el x % del tiempo) por celda,
+        a partir del histograma (centro de clase).
+
+        Returns
+        -------
+        np.ndarray
+            Array ``(n_celdas, len(niveles))`` (solo las celdas de
+            ``mascara`` si se indica).
+        """
+        histograma, muestras = self.histograma, self.muestras
+        if mascara is not None:
+            histograma, muestras = histograma[mascara], muestras[mascara]
+        acumulado = np.cumsum(histograma, axis=1, dtype=np.uint32)
+        resultado = np.empty((len(muestras), len(niveles)))
+        for j, x in enumerate(niveles):
+            necesarias = np.ceil(muestras * (1 - x / 100)).astype(np.uint32)
+            clase = np.argmax(acumulado >= necesarias[:, None], axis=1)
+            resultado[:, j] = self.rango_db[0] + clase * self.resolucion_db
+        return resultado
+
+    def tabla(self, niveles: tuple[int, ...] = (10, 50, 90),
+              mascara: np.ndarray | None = None) -> pl.DataFrame:
+        """
+        Tabla por celda: índices, centro (lon, lat), muestras, nivel medio
+        energético y niveles percentiles.
+        """
+        ix, iy = self._indices()
+        if mascara is None:
+            mascara = np.ones(len(self), dtype=bool)
+        dlon, dlat = self._pasos_grados()
+        lx = self.percentiles(niveles, mascara)
+        columnas = {
+            "celda_x": ix[mascara],
+            "celda_y": iy[mascara],
+            "lon": (ix[mascara] + 0.5) * dlon,
+            "lat": (iy[mascara] + 0.5) * dlat,
+            "muestras": self.muestras[mascara],
+            "leq_db": self.leq_db[mascara],
+        }
+        for j, x in enumerate(niveles):
+            columnas[f"L{x}_db"] = lx[:, j]
+        return pl.DataFrame(columnas)
+
+    def celdas_sobre(self, umbral_db: float, min_muestras: int = 1) -> pl.DataFrame:
+        """Celdas cuyo nivel medio energético supera ``umbral_db``."""
+        return self.tabla(mascara=(self.leq_db > umbral_db) & (self.muestras >= min_muestras))
+
+    def guardar(self, ruta: str) -> None:
+        """Guarda el índice en un ``.npz``."""
+        np.savez_compressed(
+            ruta,
+            claves=self.claves, energia=self.energia, muestras=self.muestras,
+            histograma=self.histograma,
+            parametros=np.array([self.tamano_celda_m, self.lat_ref,
+                                 self.max_accuracy_m, *self.rango_db, self.resolucion_db]),
+        )
+        logger.info(f"Mapa de ruido ({len(self)} celdas) guardado en {ruta}")
+
+    @classmethod
+    def cargar(cls, ruta: str) -> MapaRuido:
+        """Carga un índice guardado con ``guardar``."""
+        with np.load(ruta) as datos:
+            tam, lat_ref, max_acc, lo, hi, res = datos["parametros"]
+            # Índices antiguos sin celdas guardaban lat_ref = NaN
+            mapa = cls(float(tam), 0.0 if np.isnan(lat_ref) else float(lat_ref),
+                       float(max_acc), (float(lo), float(hi)), float(res))
+            mapa._claves = datos["claves"]
+            mapa._energia = datos["energia"]
+            mapa._muestras = datos["muestras"]
+            mapa._histograma = datos["histograma"]
+        mapa._n = mapa._claves.shape[0]
+        mapa._orden = np.argsort(mapa._claves)
+        mapa._ordenadas = mapa._claves[mapa._orden]
+        return mapa
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from ..io import leer_exportacion_noisecapture
+
+    parser = argparse.ArgumentParser(description="Agrega exportaciones NoiseCapture en un mapa de ruido.")
+    parser.add_argument("indice", help="Fichero .npz del índice (se actualiza si existe)")
+    parser.add_argument("exportaciones", nargs="*", help="Zips o directorios a incorporar")
+    parser.add_argument("--celda", type=float, default=25.0, help="Tamaño de celda en metros")
+    parser.add_argument("--lat-ref", type=float, default=0.0,
+                        help="Latitud de referencia de la rejilla (igual en los índices a fusionar)")
+    parser.add_argument("--umbral", type=float, default=65.0, help="Umbral de consulta en dB")
+    args = parser.parse_args()
+
+    mapa = MapaRuido.cargar(args.indice) if os.path.exists(args.indice) else MapaRuido(args.celda, args.lat_ref)
+    for ruta in args.exportaciones:
+        mapa.agregar_exportacion(leer_exportacion_noisecapture(ruta))
+    if args.exportaciones:
+        mapa.guardar(args.indice)
+    print(mapa.celdas_sobre(args.umbral))
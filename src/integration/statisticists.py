@@ -3,6 +3,8 @@
 
 import numpy as np
 
+from ..utils import como_intensidad
+
 
 def calcular_estadisticos(y: np.ndarray) -> dict:
     """
@@ -10,17 +12,19 @@ def calcular_estadisticos(y: np.ndarray) -> dict:
 
     Parameters
     ----------
-    y : np.ndarray
-        Array de valores.
+    y : np.ndarray | Grabacion
+        Array de valores (para una grabación, su intensidad). Media y
+        desviación se acumulan en float64 aunque ``y`` sea float32.
 
     Returns
     -------
     dict
         Diccionario con media, desviación estándar, min, max y mediana.
     """
+    y = como_intensidad(y)
     return {
-        "media": float(np.mean(y)),
-        "desv_std": float(np.std(y)),
+        "media": float(np.mean(y, dtype=np.float64)),
+        "desv_std": float(np.std(y, dtype=np.float64)),
         "min": float(np.min(y)),
         "max": float(np.max(y)),
         "mediana": float(np.median(y)),
@@ -1,6 +1,33 @@
 """Entrada/salida de datos."""
 
-from .exportCSV import exportar_estadisticos, exportar_resultados
+from .exportCSV import exportar_bloques, exportar_estadisticos, exportar_resultados
 from .read import leer_csv
+from .database import (
+    abrir_base_resultados,
+    cargar_tabla_grabaciones,
+    consultar_laeq_dosis,
+    guardar_grabacion,
+    guardar_lote,
+)
+from .noisecapture import (
+    ExportacionNoiseCapture,
+    MetaGrabacion,
+    leer_exportacion_noisecapture,
+    leer_meta_properties,
+)
 
-__all__ = ["leer_csv", "exportar_resultados", "exportar_estadisticos"]
+__all__ = [
+    "leer_csv",
+    "exportar_resultados",
+    "exportar_estadisticos",
+    "exportar_bloques",
+    "ExportacionNoiseCapture",
+    "MetaGrabacion",
+    "leer_exportacion_noisecapture",
+    "leer_meta_properties",
+    "abrir_base_resultados",
+    "guardar_grabacion",
+    "guardar_lote",
+    "consultar_laeq_dosis",
+    "cargar_tabla_grabaciones",
+]
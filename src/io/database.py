@@ -0,0 +1,350 @@
+"""
+Almacén local de resultados en SQLite.
+
+Cada ejecución del pipeline añade (o reemplaza, si la grabación y el
+escenario ya existen) sus resultados en lugar de sobrescribir un conjunto
+fijo de CSV. El esquema guarda:
+- grabaciones: metadatos de ``meta.properties``.
+- integraciones: integral y errores por método (``exportar_resultados``).
+- estadisticos: estadísticos de intensidad, niveles L10/L50/L90 y eventos.
+- laeq_dosis: LAeq,T, dosis y duración.
+- ventanas: serie opcional de LAeq por ventana.
+
+Las inserciones de cada grabación (o lote) se hacen en una sola
+transacción con ``executemany``, y hay índices por dispositivo, fecha y
+uuid para las consultas entre grabaciones.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+RUTA_BASE = "data/resultados/resultados.sqlite"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS grabaciones (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT UNIQUE,
+    device_manufacturer TEXT,
+    device_model TEXT,
+    device_product TEXT,
+    record_utc INTEGER,
+    fecha TEXT,
+    time_length INTEGER,
+    leq_mean REAL,
+    tags TEXT,
+    pleasantness INTEGER,
+    version_name TEXT,
+    origen TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_grabaciones_dispositivo ON grabaciones(device_model, record_utc);
+CREATE INDEX IF NOT EXISTS idx_grabaciones_fecha ON grabaciones(fecha);
+CREATE INDEX IF NOT EXISTS idx_grabaciones_record_utc ON grabaciones(record_utc);
+
+CREATE TABLE IF NOT EXISTS integraciones (
+    grabacion_id INTEGER NOT NULL REFERENCES grabaciones(id) ON DELETE CASCADE,
+    escenario TEXT NOT NULL,
+    metodo TEXT NOT NULL,
+    integral REAL,
+    error_relativo REAL,
+    error_porcentual REAL,
+    PRIMARY KEY (grabacion_id, escenario, metodo)
+);
+
+CREATE TABLE IF NOT EXISTS estadisticos (
+    grabacion_id INTEGER NOT NULL REFERENCES grabaciones(id) ON DELETE CASCADE,
+    escenario TEXT NOT NULL,
+    media REAL,
+    desv_std REAL,
+    min REAL,
+    max REAL,
+    mediana REAL,
+    l10_db REAL,
+    l50_db REAL,
+    l90_db REAL,
+    n_eventos INTEGER,
+    PRIMARY KEY (grabacion_id, escenario)
+);
+
+CREATE TABLE IF NOT EXISTS laeq_dosis (
+    grabacion_id INTEGER NOT NULL REFERENCES grabaciones(id) ON DELETE CASCADE,
+    escenario TEXT NOT NULL,
+    laeq_db REAL,
+    dosis_pct REAL,
+    t_horas REAL,
+    PRIMARY KEY (grabacion_id, escenario)
+);
+CREATE INDEX IF NOT EXISTS idx_laeq_dosis_dosis ON laeq_dosis(escenario, dosis_pct);
+
+CREATE TABLE IF NOT EXISTS ventanas (
+    grabacion_id INTEGER NOT NULL REFERENCES grabaciones(id) ON DELETE CASCADE,
+    escenario TEXT NOT NULL,
+    inicio_s REAL NOT NULL,
+    laeq_db REAL,
+    PRIMARY KEY (grabacion_id, escenario, inicio_s)
+) WITHOUT ROWID;
+"""
+
+
+def abrir_base_resultados(ruta: str = RUTA_BASE) -> sqlite3.Connection:
+    """
+    Abre (y crea si no existe) la base de resultados.
+
+    Parameters
+    ----------
+    ruta : str, optional
+        Ruta al fichero SQLite (``":memory:"`` para una base temporal).
+
+    Returns
+    -------
+    sqlite3.Connection
+        Conexión con el esquema e índices creados.
+    """
+    if ruta != ":memory:" and os.path.dirname(ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    con = sqlite3.connect(ruta)
+    con.execute("PRAGMA foreign_keys = ON")
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA synchronous = NORMAL")
+    con.executescript(_ESQUEMA)
+    return con
+
+
+def _fila_grabacion(meta, origen: str | None) -> dict:
+    """Columnas de ``grabaciones`` a partir de una ``MetaGrabacion``."""
+    record_utc = getattr(meta, "record_utc", None)
+    fecha = None
+    if record_utc is not None:
+        fecha = datetime.fromtimestamp(record_utc / 1000, tz=timezone.utc).date().isoformat()
+    return {
+        "uuid": getattr(meta, "uuid", None) or None,
+        "device_manufacturer": getattr(meta, "device_manufacturer", None),
+        "device_model": getattr(meta, "device_model", None),
+        "device_product": getattr(meta, "device_product", None),
+        "record_utc": record_utc,
+        "fecha": fecha,
+        "time_length": getattr(meta, "time_length", None),
+        "leq_mean": getattr(meta, "leq_mean", None),
+        "tags": ",".join(getattr(meta, "tags", ()) or ()),
+        "pleasantness": getattr(meta, "pleasantness", None),
+        "version_name": getattr(meta, "version_name", None),
+        "origen": origen,
+    }
+
+
+def _niveles_estadisticos(niveles_db: np.ndarray | None,
+                          umbral_evento_db: float) -> tuple:
+    """L10, L50, L90 y número de eventos (cruces ascendentes del umbral)."""
+    if niveles_db is None or len(niveles_db) == 0:
+        return None, None, None, None
+    l90, l50, l10 = np.nanpercentile(niveles_db, [10, 50, 90])
+    sobre = niveles_db > umbral_evento_db
+    eventos = int(sobre[0]) + int(np.count_nonzero(sobre[1:] & ~sobre[:-1]))
+    return float(l10), float(l50), float(l90), eventos
+
+
+def guardar_grabacion(con: sqlite3.Connection,
+                      meta=None,
+                      escenario: str = "completo",
+                      resultados: dict | None = None,
+                      errores: dict | None = None,
+                      estadisticos: dict | None = None,
+                      laeq: float | None = None,
+                      dosis: float | None = None,
+                      T_horas: float | None = None,
+                      niveles_db: np.ndarray | None = None,
+                      ventanas: tuple[np.ndarray, np.ndarray] | None = None,
+                      umbral_evento_db: float = 65.0,
+                      origen: str | None = None,
+                      _transaccion: bool = True) -> int:
+    """
+    Guarda los resultados de una grabación y escenario.
+
+    Si la grabación (por ``uuid``) ya existe, se actualizan sus metadatos y
+    se reemplazan los resultados de ese escenario.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        Conexión de ``abrir_base_resultados``.
+    meta : MetaGrabacion, optional
+        Metadatos; sin uuid se crea siempre una grabación nueva.
+    escenario : str, optional
+        Nombre del escenario (``"completo"``, ``"reducido_80"``, ...).
+    resultados, errores : dict, optional
+        Integrales por método y errores (como en ``exportar_resultados``).
+    estadisticos : dict, optional
+        Salida de ``calcular_estadisticos``.
+    laeq, dosis, T_horas : float, optional
+        LAeq,T en dB(A), dosis en % y duración en horas.
+    niveles_db : np.ndarray, optional
+        Serie en dB para L10/L50/L90 y recuento de eventos.
+    ventanas : tuple, optional
+        ``(inicio_s, laeq_db)`` de la serie de LAeq por ventana.
+    umbral_evento_db : float, optional
+        Umbral para contar eventos.
+    origen : str, optional
+        Ruta de la que proceden los datos.
+
+    Returns
+    -------
+    int
+        Identificador de la grabación.
+    """
+    fila = _fila_grabacion(meta, origen)
+    columnas = ", ".join(fila)
+    marcadores = ", ".join(f":{c}" for c in fila)
+    actualizacion = ", ".join(f"{c} = excluded.{c}" for c in fila if c != "uuid")
+
+    def escribir() -> int:
+        grabacion_id = con.execute(
+            f"INSERT INTO grabaciones ({columnas}) VALUES ({marcadores}) "
+            f"ON CONFLICT(uuid) DO UPDATE SET {actualizacion} RETURNING id",
+            fila,
+        ).fetchone()[0]
+        clave = (grabacion_id, escenario)
+        for tabla in ("integraciones", "estadisticos", "laeq_dosis", "ventanas"):
+            con.execute(f"DELETE FROM {tabla} WHERE grabacion_id = ? AND escenario = ?", clave)
+
+        if resultados:
+            errores_ = errores or {}
+            con.executemany(
+                "INSERT INTO integraciones VALUES (?, ?, ?, ?, ?, ?)",
+                [(*clave, m, None if v is None else float(v),
+                  errores_.get(m), errores_.get(m + "_pct"))
+                 for m, v in resultados.items()],
+            )
+        if estadisticos is not None or niveles_db is not None:
+            est = estadisticos or {}
+            con.execute(
+                "INSERT INTO estadisticos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*clave, est.get("media"), est.get("desv_std"), est.get("min"),
+                 est.get("max"), est.get("mediana"),
+                 *_niveles_estadisticos(niveles_db, umbral_evento_db)),
+            )
+        if laeq is not None:
+            con.execute("INSERT INTO laeq_dosis VALUES (?, ?, ?, ?, ?)",
+                        (*clave, float(laeq), dosis, T_horas))
+        if ventanas is not None:
+            inicio, valores = ventanas
+            con.executemany(
+                "INSERT INTO ventanas VALUES (?, ?, ?, ?)",
+                zip([grabacion_id] * len(inicio), [escenario] * len(inicio),
+                    np.asarray(inicio, dtype=float).tolist(),
+                    np.asarray(valores, dtype=float).tolist()),
+            )
+        return grabacion_id
+
+    if not _transaccion:
+        return escribir()
+    with con:
+        grabacion_id = escribir()
+    logger.info(f"Resultados de grabación {grabacion_id} ({escenario}) guardados en la base")
+    return grabacion_id
+
+
+def guardar_lote(con: sqlite3.Connection, registros: Iterable[dict]) -> list[int]:
+    """
+    Guarda varios registros (argumentos de ``guardar_grabacion``) en una
+    única transacción.
+
+    Returns
+    -------
+    list[int]
+        Identificadores de las grabaciones.
+    """
+    with con:
+        ids = [guardar_grabacion(con, _transaccion=False, **r) for r in registros]
+    logger.info(f"Lote de {len(ids)} registros guardado en la base")
+    return ids
+
+
+def cargar_tabla_grabaciones(con: sqlite3.Connection,
+                             escenario: str = "completo") -> pl.DataFrame:
+    """
+    Carga en una sola consulta una fila por grabación con metadatos,
+    LAeq, dosis, niveles L10/L50/L90 y número de eventos.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        Conexión a la base.
+    escenario : str, optional
+        Escenario a cargar.
+
+    Returns
+    -------
+    pl.DataFrame
+        Tabla columnar de grabaciones (sin filas para grabaciones que no
+        tienen LAeq en ese escenario).
+    """
+    cursor = con.execute(
+        "SELECT g.id, g.uuid, g.device_model, g.record_utc, g.fecha, g.tags, "
+        "g.pleasantness, d.laeq_db, d.dosis_pct, d.t_horas, "
+        "e.l10_db, e.l50_db, e.l90_db, e.n_eventos "
+        "FROM laeq_dosis d JOIN grabaciones g ON g.id = d.grabacion_id "
+        "LEFT JOIN estadisticos e ON e.grabacion_id = d.grabacion_id AND e.escenario = d.escenario "
+        "WHERE d.escenario = ? ORDER BY g.record_utc",
+        (escenario,),
+    )
+    esquema = {
+        "id": pl.Int64, "uuid": pl.Utf8, "device_model": pl.Utf8, "record_utc": pl.Int64,
+        "fecha": pl.Utf8, "tags": pl.Utf8, "pleasantness": pl.Int64, "laeq_db": pl.Float64,
+        "dosis_pct": pl.Float64, "t_horas": pl.Float64, "l10_db": pl.Float64,
+        "l50_db": pl.Float64, "l90_db": pl.Float64, "n_eventos": pl.Int64,
+    }
+    return pl.DataFrame(cursor.fetchall(), schema=esquema, orient="row")
+
+
+def consultar_laeq_dosis(con: sqlite3.Connection,
+                         escenario: str = "completo",
+                         device_model: str | None = None,
+                         desde: str | None = None,
+                         hasta: str | None = None,
+                         dosis_min: float | None = None) -> pl.DataFrame:
+    """
+    Consulta LAeq y dosis entre grabaciones.
+
+    Parameters
+    ----------
+    con : sqlite3.Connection
+        Conexión a la base.
+    escenario : str, optional
+        Escenario a consultar.
+    device_model : str, optional
+        Filtra por modelo de dispositivo.
+    desde, hasta : str, optional
+        Fechas ISO (``YYYY-MM-DD``, UTC) inclusivas.
+    dosis_min : float, optional
+        Dosis mínima en %.
+
+    Returns
+    -------
+    pl.DataFrame
+        Una fila por grabación con metadatos, LAeq, dosis y duración.
+    """
+    condiciones, parametros = ["d.escenario = ?"], [escenario]
+    for sql, valor in (("g.device_model = ?", device_model), ("g.fecha >= ?", desde),
+                       ("g.fecha <= ?", hasta), ("d.dosis_pct >= ?", dosis_min)):
+        if valor is not None:
+            condiciones.append(sql)
+            parametros.append(valor)
+
+    cursor = con.execute(
+        "SELECT g.id, g.uuid, g.device_model, g.record_utc, g.fecha, g.tags, "
+        "d.laeq_db, d.dosis_pct, d.t_horas "
+        "FROM laeq_dosis d JOIN grabaciones g ON g.id = d.grabacion_id "
+        f"WHERE {' AND '.join(condiciones)} ORDER BY g.record_utc",
+        parametros,
+    )
+    nombres = [c[0] for c in cursor.description]
+    return pl.DataFrame(cursor.fetchall(), schema=nombres, orient="row")
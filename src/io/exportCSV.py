@@ -42,4 +42,19 @@ def exportar_estadisticos(stats: dict, ruta: str = "data/estadisticos.csv"):
     """
     df = pl.DataFrame(stats)
     df.write_csv(ruta)
-    logging.info(f"Estadísticos exportados a {ruta}")
\ No newline at end of file
+    logging.info(f"Estadísticos exportados a {ruta}")
+
+
+def exportar_bloques(bloques: pl.DataFrame, ruta: str = "data/bloques.csv"):
+    """
+    Exporta las métricas por bloque a CSV.
+
+    Parameters
+    ----------
+    bloques : pl.DataFrame
+        Salida de ``calcular_metricas_bloques`` o ``calcular_metricas_noches``.
+    ruta : str
+        Ruta de salida.
+    """
+    bloques.write_csv(ruta)
+    logging.info(f"Métricas por bloque exportadas a {ruta}")
@@ -0,0 +1,376 @@
+"""
+Lectura directa de exportaciones de NoiseCapture (zip o directorio).
+
+Una exportación contiene:
+- meta.properties: metadatos de la grabación y del dispositivo.
+- track.geojson: muestras de 1 s con nivel global, bandas de tercio de octava
+  y posición.
+
+El track se decodifica directamente a columnas contiguas de NumPy, sin pasar
+por un CSV intermedio.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+META_PROPERTIES = "meta.properties"
+TRACK_GEOJSON = "track.geojson"
+
+_PATRON_BANDA = re.compile(r"^leq_(\d+)$")
+
+
+@dataclass(frozen=True, slots=True)
+class MetaGrabacion:
+    """Metadatos tipados de ``meta.properties``."""
+
+    uuid: str = ""
+    version_number: int | None = None
+    version_name: str = ""
+    build_date: int | None = None
+    record_utc: int | None = None
+    time_length: int | None = None
+    leq_mean: float | None = None
+    device_manufacturer: str = ""
+    device_model: str = ""
+    device_product: str = ""
+    microphone_identifier: str = ""
+    method_calibration: str = ""
+    gain_calibration: float | None = None
+    user_profile: str = ""
+    pleasantness: int | None = None
+    tags: tuple[str, ...] = ()
+    min_spl: float | None = None
+    max_spl: float | None = None
+    sensibilidad: float | None = None
+    extra: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ExportacionNoiseCapture:
+    """
+    Exportación de NoiseCapture decodificada en columnas NumPy.
+
+    Las bandas se guardan con forma ``(n_bandas, n_muestras)`` para que cada
+    banda sea una fila contigua en memoria.
+    """
+
+    meta: MetaGrabacion
+    leq_mean: np.ndarray
+    leq_utc: np.ndarray
+    bandas_hz: np.ndarray
+    leq_bandas: np.ndarray
+    lon: np.ndarray
+    lat: np.ndarray
+    accuracy: np.ndarray
+
+    def __len__(self) -> int:
+        return self.leq_mean.shape[0]
+
+    def a_dataframe(self) -> pl.DataFrame:
+        """
+        Construye un DataFrame de Polars a partir de las columnas.
+
+        Returns
+        -------
+        pl.DataFrame
+            Columnas ``leq_utc``, ``leq_mean``, ``leq_<f>`` por banda,
+            ``lon``, ``lat`` y ``accuracy``.
+        """
+        columnas = {"leq_utc": self.leq_utc, "leq_mean": self.leq_mean}
+        for i, f in enumerate(self.bandas_hz):
+            columnas[f"leq_{int(f)}"] = self.leq_bandas[i]
+        columnas["lon"] = self.lon
+        columnas["lat"] = self.lat
+        columnas["accuracy"] = self.accuracy
+        return pl.DataFrame(columnas)
+
+
+def _parsear_properties(texto: str) -> dict[str, str]:
+    """Interpreta un fichero ``.properties`` de Java (clave=valor con escapes)."""
+    propiedades = {}
+    lineas = texto.splitlines()
+    i = 0
+    while i < len(lineas):
+        linea = lineas[i].lstrip()
+        i += 1
+        if not linea or linea[0] in "#!":
+            continue
+        # Continuación de línea: barra invertida final no escapada
+        while (len(linea) - len(linea.rstrip("\\"))) % 2 == 1 and i < len(lineas):
+            linea = linea[:-1] + lineas[i].lstrip()
+            i += 1
+
+        clave, valor = [], []
+        actual, j = clave, 0
+        while j < len(linea):
+            c = linea[j]
+            j += 1
+            if c == "\\" and j < len(linea):
+                c = linea[j]
+                j += 1
+                if c == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", linea[j:j + 4]):
+                    c = chr(int(linea[j:j + 4], 16))
+                    j += 4
+                else:
+                    c = {"n": "\n", "t": "\t", "r": "\r"}.get(c, c)
+            elif actual is clave and c in "=:":
+                actual = valor
+                continue
+            actual.append(c)
+        propiedades["".join(clave).strip()] = "".join(valor).strip()
+    return propiedades
+
+
+def _a_int(valor: str | None) -> int | None:
+    try:
+        return int(valor) if valor not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _a_float(valor: str | None) -> float | None:
+    try:
+        return float(valor) if valor not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def parsear_meta_properties(texto: str) -> MetaGrabacion:
+    """
+    Convierte el contenido de ``meta.properties`` en un registro tipado.
+
+    Parameters
+    ----------
+    texto : str
+        Contenido del fichero.
+
+    Returns
+    -------
+    MetaGrabacion
+        Metadatos de la grabación. Las claves no reconocidas se conservan
+        en ``extra``.
+    """
+    props = _parsear_properties(texto)
+
+    microfono = {}
+    ajustes = props.pop("microphone_settings", "")
+    if ajustes:
+        # NoiseCapture escribe una coma final antes de '}' que JSON no admite
+        try:
+            microfono = json.loads(re.sub(r",\s*}", "}", ajustes))
+        except json.JSONDecodeError:
+            logger.warning(f"microphone_settings no interpretable: {ajustes}")
+
+    tags = tuple(t.strip() for t in props.pop("tags", "").split(",") if t.strip())
+    conocidas = {f for f in MetaGrabacion.__dataclass_fields__} - {
+        "tags", "min_spl", "max_spl", "sensibilidad", "extra"
+    }
+
+    return MetaGrabacion(
+        uuid=props.get("uuid", ""),
+        version_number=_a_int(props.get("version_number")),
+        version_name=props.get("version_name", ""),
+        build_date=_a_int(props.get("build_date")),
+        record_utc=_a_int(props.get("record_utc")),
+        time_length=_a_int(props.get("time_length")),
+        leq_mean=_a_float(props.get("leq_mean")),
+        device_manufacturer=props.get("device_manufacturer", ""),
+        device_model=props.get("device_model", ""),
+        device_product=props.get("device_product", ""),
+        microphone_identifier=props.get("microphone_identifier", ""),
+        method_calibration=props.get("method_calibration", ""),
+        gain_calibration=_a_float(props.get("gain_calibration")),
+        user_profile=props.get("user_profile", ""),
+        pleasantness=_a_int(props.get("pleasantness")),
+        tags=tags,
+        min_spl=_a_float(str(microfono.get("min_spl", ""))),
+        max_spl=_a_float(str(microfono.get("max_spl", ""))),
+        sensibilidad=_a_float(str(microfono.get("sensitivity", ""))),
+        extra={k: v for k, v in props.items() if k not in conocidas},
+    )
+
+
+def leer_meta_properties(ruta: str) -> MetaGrabacion:
+    """
+    Lee ``meta.properties`` desde una exportación (zip o directorio) o
+    directamente desde el fichero.
+
+    Parameters
+    ----------
+    ruta : str
+        Ruta al zip, al directorio de exportación o al propio fichero.
+
+    Returns
+    -------
+    MetaGrabacion
+        Metadatos de la grabación.
+    """
+    if os.path.isfile(ruta) and not zipfile.is_zipfile(ruta):
+        with open(ruta, "r", encoding="latin-1") as f:
+            return parsear_meta_properties(f.read())
+    return parsear_meta_properties(
+        _leer_miembro(ruta, META_PROPERTIES).decode("latin-1")
+    )
+
+
+def _leer_miembro(ruta: str, nombre: str) -> bytes:
+    """Devuelve el contenido de ``nombre`` dentro de un zip o directorio."""
+    if os.path.isdir(ruta):
+        with open(os.path.join(ruta, nombre), "rb") as f:
+            return f.read()
+    if not zipfile.is_zipfile(ruta):
+        raise ValueError(f"'{ruta}' no es un zip ni un directorio de exportación.")
+    with zipfile.ZipFile(ruta) as zf:
+        candidatos = [n for n in zf.namelist() if os.path.basename(n) == nombre]
+        if not candidatos:
+            raise FileNotFoundError(f"'{nombre}' no encontrado en {ruta}")
+        return zf.read(candidatos[0])
+
+
+def decodificar_track(contenido: bytes | str) -> dict[str, np.ndarray]:
+    """
+    Decodifica un ``track.geojson`` en columnas NumPy contiguas.
+
+    Parameters
+    ----------
+    contenido : bytes | str
+        Contenido del GeoJSON.
+
+    Returns
+    -------
+    dict
+        Columnas ``leq_mean``, ``leq_utc``, ``bandas_hz``, ``leq_bandas``
+        (forma ``(n_bandas, n)``), ``lon``, ``lat`` y ``accuracy``. Los
+        valores ausentes se representan como NaN; las muestras sin
+        ``leq_utc`` se descartan (con un aviso), de modo que toda marca
+        de tiempo devuelta es real.
+
+    Raises
+    ------
+    ValueError
+        Si el GeoJSON no contiene la clave ``features``.
+    """
+    data = json.loads(contenido)
+    if "features" not in data:
+        raise ValueError("GeoJSON inválido: falta 'features'")
+
+    features = data["features"]
+    props = [f.get("properties") or {} for f in features]
+    sin_utc = sum(p.get("leq_utc") is None for p in props)
+    if sin_utc:
+        logger.warning(f"{sin_utc} muestras sin leq_utc descartadas")
+        features = [f for f, p in zip(features, props) if p.get("leq_utc") is not None]
+        props = [p for p in props if p.get("leq_utc") is not None]
+    n = len(features)
+
+    def columna(clave: str, dtype=np.float64, defecto=np.nan) -> np.ndarray:
+        return np.fromiter(
+            (v if (v := p.get(clave)) is not None else defecto for p in props),
+            dtype=dtype, count=n,
+        )
+
+    bandas = sorted(int(m.group(1)) for k in set().union(*props)
+                    if (m := _PATRON_BANDA.match(k)))
+    leq_bandas = np.empty((len(bandas), n), dtype=np.float64)
+    for i, f in enumerate(bandas):
+        leq_bandas[i] = columna(f"leq_{f}")
+
+    coords = [
+        (f.get("geometry") or {}).get("coordinates") or (np.nan, np.nan)
+        for f in features
+    ]
+    lonlat = np.array([c[:2] for c in coords], dtype=np.float64).reshape(n, 2)
+
+    return {
+        "leq_mean": columna("leq_mean"),
+        "leq_utc": columna("leq_utc", dtype=np.int64),
+        "bandas_hz": np.asarray(bandas, dtype=np.int64),
+        "leq_bandas": leq_bandas,
+        "lon": np.ascontiguousarray(lonlat[:, 0]),
+        "lat": np.ascontiguousarray(lonlat[:, 1]),
+        "accuracy": columna("accuracy"),
+    }
+
+
+def leer_exportacion_noisecapture(ruta: str) -> ExportacionNoiseCapture:
+    """
+    Lee una exportación de NoiseCapture (zip o directorio) sin CSV intermedio.
+
+    Parameters
+    ----------
+    ruta : str
+        Ruta al zip o al directorio con ``meta.properties`` y ``track.geojson``.
+
+    Returns
+    -------
+    ExportacionNoiseCapture
+        Metadatos y columnas del track.
+    """
+    logger.info(f"Leyendo exportación NoiseCapture: {ruta}")
+    try:
+        meta = parsear_meta_properties(
+            _leer_miembro(ruta, META_PROPERTIES).decode("latin-1")
+        )
+    except FileNotFoundError:
+        logger.warning(f"Exportación sin {META_PROPERTIES}: {ruta}")
+        meta = MetaGrabacion()
+
+    columnas = decodificar_track(_leer_miembro(ruta, TRACK_GEOJSON))
+    exportacion = ExportacionNoiseCapture(meta=meta, **columnas)
+    logger.info(f"Track decodificado: {len(exportacion)} muestras, "
+                f"{len(exportacion.bandas_hz)} bandas")
+    return exportacion
+
+
+if __name__ == "__main__":
+    # Benchmark: exportación -> resultados, ruta directa frente a ruta CSV
+    import argparse
+    import tempfile
+    import time
+
+    from ..integration import calcular_metodos_integracion
+    from ..utils import calcular_dosis, calcular_laeq_t, db_a_intensidad
+    from .read import leer_csv
+
+    parser = argparse.ArgumentParser(description="Mide el tiempo exportación -> resultados.")
+    parser.add_argument("exportacion", help="Zip o directorio de NoiseCapture")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    def resultados(db: np.ndarray) -> float:
+        intensidad = db_a_intensidad(db)
+        calcular_metodos_integracion(np.arange(1, len(db) + 1), intensidad)
+        laeq = calcular_laeq_t(intensidad, 1.0, 0.0)
+        return calcular_dosis(laeq, len(db) / 3600)
+
+    t0 = time.perf_counter()
+    exp = leer_exportacion_noisecapture(args.exportacion)
+    resultados(exp.leq_mean)
+    t_directo = time.perf_counter() - t0
+
+    from ..utils.geojson_to_csv import geojson_to_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        geojson = os.path.join(tmp, TRACK_GEOJSON)
+        with open(geojson, "wb") as f:
+            f.write(_leer_miembro(args.exportacion, TRACK_GEOJSON))
+        csv_path = os.path.join(tmp, "datos.csv")
+        t0 = time.perf_counter()
+        geojson_to_csv(geojson, csv_path, log_file=os.path.join(tmp, "conversion.log"))
+        resultados(leer_csv(csv_path)["leq_mean"].to_numpy())
+        t_csv = time.perf_counter() - t0
+
+    print(f"muestras: {len(exp)}")
+    print(f"ruta directa : {t_directo * 1000:9.1f} ms")
+    print(f"ruta CSV     : {t_csv * 1000:9.1f} ms  (x{t_csv / t_directo:.1f})")
@@ -0,0 +1,16 @@
+"""Servicios de larga duración sobre el pipeline."""
+
+from .cluster import Coordinador, resumir_exportacion, trabajar
+from .server import ServicioAcustico, calcular_operacion
+from .watcher import MetricasIngesta, VigilanteExportaciones, procesar_exportacion
+
+__all__ = [
+    "Coordinador",
+    "MetricasIngesta",
+    "ServicioAcustico",
+    "VigilanteExportaciones",
+    "calcular_operacion",
+    "procesar_exportacion",
+    "resumir_exportacion",
+    "trabajar",
+]
@@ -0,0 +1,464 @@
+"""
+Procesamiento distribuido del archivo: coordinador y trabajadores por TCP.
+
+El coordinador reparte las exportaciones en lotes (``shards``) y los cede a
+los trabajadores con un plazo (``lease``). Un trabajador pide un lote,
+renueva el plazo mientras lo procesa y devuelve un resultado compacto por
+exportación. Si el trabajador falla, se desconecta o deja vencer el plazo,
+el lote vuelve a la cola hasta ``max_intentos``. El coordinador es el único
+que escribe en la base SQLite de resultados (un ``guardar_lote`` por lote,
+en un hilo escritor fuera del bucle de eventos).
+
+Protocolo: una línea JSON por mensaje.
+- trabajador -> ``{"tipo": "pedir"}``; respuesta ``tarea`` (``id``,
+  ``cesion``, ``rutas``, ``lease_s``), ``esperar`` (``s``) o ``fin``.
+- trabajador -> ``{"tipo": "renovar", "id": ..., "cesion": ...}``.
+- trabajador -> ``{"tipo": "resultado", "id": ..., "cesion": ...,
+  "resultados": [...], "errores": {ruta: error}}`` o ``{"tipo": "fallo",
+  "id": ..., "cesion": ..., "error": ...}``; respuesta ``ok``.
+
+``cesion`` identifica la cesión vigente de un lote: los mensajes de una
+cesión caducada (plazo vencido y lote cedido de nuevo) se ignoran.
+
+Los fallos se registran por exportación (``fallidos[(lote, ruta)]``): un
+lote con alguna exportación fallida cuenta como completado para el resto,
+pero la CLI del coordinador termina con código 1.
+
+Las rutas se envían tal cual, así que en varias máquinas el archivo debe
+estar en un sistema de ficheros compartido con la misma ruta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+
+from ..io import abrir_base_resultados, guardar_lote
+from .watcher import procesar_exportacion
+
+logger = logging.getLogger(__name__)
+
+_CAMPOS_META = ("uuid", "device_manufacturer", "device_model", "device_product", "record_utc",
+                "time_length", "leq_mean", "tags", "pleasantness", "version_name")
+# Un resultado lleva la serie completa en base64 (~5.3 bytes por muestra)
+LIMITE_LINEA = 256 * 1024 * 1024
+
+
+def resumir_exportacion(ruta: str) -> dict:
+    """
+    Ejecuta la cadena de análisis sobre una exportación y devuelve un
+    resultado compacto serializable a JSON.
+
+    Los niveles viajan en float32 little-endian codificados en base64
+    (4 bytes por muestra; error de redondeo < 1e-5 dB en el rango de un
+    micrófono), de modo que el coordinador puede recalcular L10/L50/L90 y
+    eventos.
+    """
+    salida = procesar_exportacion(ruta)
+    meta = salida.pop("meta")
+    niveles = salida.pop("niveles_db")
+    salida["meta"] = {c: getattr(meta, c, None) for c in _CAMPOS_META}
+    salida["meta"]["tags"] = list(salida["meta"]["tags"] or ())
+    f32 = np.asarray(niveles, dtype="<f4")
+    salida["niveles_f32"] = base64.b64encode(f32.tobytes()).decode("ascii")
+    salida["origen"] = ruta
+    return salida
+
+
+def _registro(resultado: dict) -> dict:
+    """Argumentos de ``guardar_grabacion`` a partir de un resultado compacto."""
+    niveles = np.frombuffer(base64.b64decode(resultado["niveles_f32"]), dtype="<f4")
+    return dict(
+        meta=SimpleNamespace(**resultado["meta"]),
+        escenario="completo",
+        resultados=resultado["resultados"],
+        errores=resultado["errores"],
+        estadisticos=resultado["estadisticos"],
+        laeq=resultado["laeq"],
+        dosis=resultado["dosis"],
+        T_horas=resultado["T_horas"],
+        niveles_db=niveles.astype(np.float64),
+        origen=resultado.get("origen"),
+    )
+
+
+def _a_json(valor):
+    """Convierte escalares de numpy al serializar."""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"{type(valor).__name__} no serializable")
+
+
+async def _enviar(escritor: asyncio.StreamWriter, mensaje: dict) -> None:
+    escritor.write(json.dumps(mensaje, default=_a_json).encode() + b"\n")
+    await escritor.drain()
+
+
+async def _recibir(lector: asyncio.StreamReader) -> dict | None:
+    linea = await lector.readline()
+    return json.loads(linea) if linea else None
+
+
+class Coordinador:
+    """
+    Cola de trabajo TCP con plazos y reintentos.
+
+    Parameters
+    ----------
+    rutas : list[str]
+        Exportaciones (zip o directorio) a procesar.
+    tam_lote : int, optional
+        Exportaciones por lote.
+    lease_s : float, optional
+        Plazo de un lote sin renovación antes de volver a la cola.
+    max_intentos : int, optional
+        Cesiones máximas de un lote antes de darlo por fallido.
+    host, puerto : optional
+        Dirección de escucha (por defecto solo localhost; ``"0.0.0.0"`` para
+        aceptar trabajadores remotos; ``puerto=0`` elige uno libre).
+    ruta_base : str, optional
+        Base SQLite donde fusionar los resultados (``None`` para no guardar).
+    """
+
+    def __init__(self,
+                 rutas: list[str],
+                 tam_lote: int = 4,
+                 lease_s: float = 60.0,
+                 max_intentos: int = 3,
+                 host: str = "127.0.0.1",
+                 puerto: int = 8765,
+                 ruta_base: str | None = None):
+        self.lotes = {i: list(rutas[j:j + tam_lote])
+                      for i, j in enumerate(range(0, len(rutas), tam_lote))}
+        self.lease_s = lease_s
+        self.max_intentos = max_intentos
+        self.host = host
+        self.puerto = puerto
+        self.ruta_base = ruta_base
+
+        self.resultados: list[dict] = []
+        self.fallidos: dict[tuple[int, str], str] = {}
+        self._lotes_fallidos: set[int] = set()
+        self._pendientes: deque[int] = deque(self.lotes)
+        self._cedidos: dict[int, tuple[str, float, int]] = {}
+        self._intentos: dict[int, int] = {i: 0 for i in self.lotes}
+        self._completados: set[int] = set()
+        self._conexiones: set[asyncio.StreamWriter] = set()
+        self._terminado = asyncio.Event()
+        self._con = None
+        self._escritor: ThreadPoolExecutor | None = None
+        self._inicio = time.monotonic()
+
+    @property
+    def terminado(self) -> bool:
+        return len(self._completados) + len(self._lotes_fallidos) == len(self.lotes)
+
+    def estado(self) -> dict:
+        """Lotes pendientes, cedidos, completados y fallidos; exportaciones."""
+        return {
+            "lotes": len(self.lotes),
+            "pendientes": len(self._pendientes),
+            "cedidos": len(self._cedidos),
+            "completados": len(self._completados),
+            "lotes_fallidos": len(self._lotes_fallidos),
+            "exportaciones_procesadas": len(self.resultados),
+            "exportaciones_fallidas": len(self.fallidos),
+            "segundos": time.monotonic() - self._inicio,
+        }
+
+    def _vigente(self, lote: int, cesion: int | None) -> bool:
+        """True si ``cesion`` es la cesión en curso del lote."""
+        cedido = self._cedidos.get(lote)
+        return cedido is not None and cedido[2] == cesion
+
+    def _ceder(self, trabajador: str) -> tuple[int, int] | None:
+        """Cede el siguiente lote pendiente: (lote, cesión) o None."""
+        if not self._pendientes:
+            return None
+        lote = self._pendientes.popleft()
+        self._intentos[lote] += 1
+        cesion = self._intentos[lote]
+        self._cedidos[lote] = (trabajador, time.monotonic() + self.lease_s, cesion)
+        return lote, cesion
+
+    def _devolver(self, lote: int, motivo: str) -> None:
+        """Devuelve un lote a la cola o marca como fallidas sus exportaciones."""
+        self._cedidos.pop(lote, None)
+        if lote in self._completados or lote in self._lotes_fallidos:
+            return
+        if self._intentos[lote] >= self.max_intentos:
+            self._lotes_fallidos.add(lote)
+            for ruta in self.lotes[lote]:
+                self.fallidos[(lote, ruta)] = motivo
+            logger.error(f"Lote {lote} fallido tras {self._intentos[lote]} intentos: {motivo}")
+            self._comprobar_fin()
+        else:
+            self._pendientes.append(lote)
+            logger.warning(f"Lote {lote} reencolado: {motivo}")
+
+    def _comprobar_fin(self) -> None:
+        if self.terminado:
+            self._terminado.set()
+
+    def _revisar_plazos(self) -> None:
+        ahora = time.monotonic()
+        for lote, (trabajador, vence, _) in list(self._cedidos.items()):
+            if ahora > vence:
+                self._devolver(lote, f"plazo vencido ({trabajador})")
+
+    def _fallar(self, lote: int, cesion: int | None, motivo: str) -> None:
+        """Fallo informado por un trabajador: solo cuenta si su cesión sigue vigente."""
+        if not self._vigente(lote, cesion):
+            logger.info(f"Fallo del lote {lote} de una cesión caducada ignorado: {motivo}")
+            return
+        self._devolver(lote, motivo)
+
+    async def _completar(self, lote: int, cesion: int | None,
+                         resultados: list[dict], errores: dict[str, str]) -> None:
+        """
+        Registra el resultado de un lote. Se acepta de la cesión vigente o,
+        si el lote no está cedido a otro (plazo vencido y aún en cola), de
+        una cesión anterior; en ese caso sale de la cola.
+        """
+        if lote in self._completados or lote in self._lotes_fallidos:
+            logger.info(f"Resultado duplicado del lote {lote} ignorado")
+            return
+        if lote in self._cedidos and not self._vigente(lote, cesion):
+            logger.info(f"Resultado del lote {lote} de una cesión caducada ignorado "
+                        f"(cedido a {self._cedidos[lote][0]})")
+            return
+        self._cedidos.pop(lote, None)
+        if lote in self._pendientes:
+            self._pendientes.remove(lote)
+        self._completados.add(lote)
+        self.resultados.extend(resultados)
+        for ruta, error in errores.items():
+            self.fallidos[(lote, ruta)] = error
+            logger.error(f"Lote {lote}: {ruta}: {error}")
+        if self._con is not None and resultados:
+            registros = [_registro(r) for r in resultados]
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self._escritor, guardar_lote, self._con, registros)
+            except Exception as exc:
+                logger.exception(f"No se pudo guardar el lote {lote} en la base: {exc}")
+        logger.info(f"Lote {lote} completado ({len(resultados)} exportaciones); {self.estado()}")
+        self._comprobar_fin()
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        trabajador = "{}:{}".format(*escritor.get_extra_info("peername")[:2])
+        propios: set[tuple[int, int]] = set()
+        self._conexiones.add(escritor)
+        try:
+            while (mensaje := await _recibir(lector)) is not None:
+                tipo = mensaje.get("tipo")
+                trabajador = mensaje.get("trabajador", trabajador)
+                if tipo == "pedir":
+                    self._revisar_plazos()
+                    if self.terminado:
+                        await _enviar(escritor, {"tipo": "fin"})
+                        break
+                    cedido = self._ceder(trabajador)
+                    if cedido is None:
+                        await _enviar(escritor, {"tipo": "esperar", "s": min(self.lease_s / 4, 1.0)})
+                        continue
+                    lote, cesion = cedido
+                    propios.add(cedido)
+                    await _enviar(escritor, {"tipo": "tarea", "id": lote, "cesion": cesion,
+                                             "rutas": self.lotes[lote], "lease_s": self.lease_s})
+                elif tipo == "renovar":
+                    lote, cesion = mensaje["id"], mensaje.get("cesion")
+                    if self._vigente(lote, cesion):
+                        self._cedidos[lote] = (trabajador, time.monotonic() + self.lease_s, cesion)
+                elif tipo == "resultado":
+                    lote, cesion = mensaje["id"], mensaje.get("cesion")
+                    propios.discard((lote, cesion))
+                    await self._completar(lote, cesion, mensaje.get("resultados", []),
+                                          mensaje.get("errores", {}))
+                    await _enviar(escritor, {"tipo": "ok"})
+                elif tipo == "fallo":
+                    lote, cesion = mensaje["id"], mensaje.get("cesion")
+                    propios.discard((lote, cesion))
+                    self._fallar(lote, cesion, f"{trabajador}: {mensaje.get('error')}")
+                    await _enviar(escritor, {"tipo": "ok"})
+        except (ConnectionError, json.JSONDecodeError) as exc:
+            logger.warning(f"Conexión con {trabajador} interrumpida: {exc}")
+        finally:
+            for lote, cesion in propios:
+                if self._vigente(lote, cesion):
+                    self._devolver(lote, f"{trabajador} desconectado")
+            self._conexiones.discard(escritor)
+            escritor.close()
+
+    async def _vigilar_plazos(self) -> None:
+        while not self._terminado.is_set():
+            await asyncio.sleep(min(self.lease_s / 4, 1.0))
+            self._revisar_plazos()
+
+    async def ejecutar(self) -> dict:
+        """
+        Atiende trabajadores hasta que todos los lotes terminan.
+
+        Returns
+        -------
+        dict
+            Estado final (``estado()``) más ``fallidos`` ((lote, ruta) ->
+            motivo).
+        """
+        loop = asyncio.get_running_loop()
+        # Un solo hilo escritor: la conexión SQLite se crea y se usa en él
+        self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor")
+        if self.ruta_base is not None:
+            self._con = await loop.run_in_executor(self._escritor, abrir_base_resultados,
+                                                   self.ruta_base)
+        servidor = await asyncio.start_server(self._atender, self.host, self.puerto,
+                                             limit=LIMITE_LINEA)
+        self.puerto = servidor.sockets[0].getsockname()[1]
+        logger.info(f"Coordinador en {self.host}:{self.puerto} con {len(self.lotes)} lotes")
+        vigilancia = asyncio.create_task(self._vigilar_plazos())
+        self._comprobar_fin()
+        try:
+            await self._terminado.wait()
+            # Margen para que los trabajadores conectados reciban "fin"
+            await asyncio.sleep(min(self.lease_s / 4, 1.0))
+        finally:
+            vigilancia.cancel()
+            servidor.close()
+            for escritor in list(self._conexiones):
+                escritor.close()
+            await servidor.wait_closed()
+            if self._con is not None:
+                await loop.run_in_executor(self._escritor, self._con.close)
+            self._escritor.shutdown(wait=True)
+        resumen = self.estado() | {"fallidos": dict(self.fallidos)}
+        logger.info(f"Coordinador terminado: {resumen}")
+        return resumen
+
+
+async def trabajar(host: str,
+                   puerto: int,
+                   nombre: str | None = None,
+                   procesador: Callable[[str], dict] = resumir_exportacion,
+                   reintentos_conexion: int = 10) -> int:
+    """
+    Bucle de un trabajador: pide lotes, los procesa y devuelve resultados.
+
+    Cada exportación se procesa en un hilo para que la renovación del plazo
+    siga activa; los errores por exportación se informan sin invalidar el
+    resto del lote.
+
+    Parameters
+    ----------
+    host, puerto : str, int
+        Dirección del coordinador.
+    nombre : str, optional
+        Identificador del trabajador (por defecto ``host:pid``).
+    procesador : Callable, optional
+        Función ``ruta -> dict`` serializable a JSON.
+    reintentos_conexion : int, optional
+        Intentos de conexión (uno por segundo) antes de rendirse.
+
+    Returns
+    -------
+    int
+        Número de lotes procesados.
+    """
+    nombre = nombre or f"{socket.gethostname()}:{os.getpid()}"
+    for intento in range(reintentos_conexion):
+        try:
+            lector, escritor = await asyncio.open_connection(host, puerto, limit=LIMITE_LINEA)
+            break
+        except OSError:
+            if intento == reintentos_conexion - 1:
+                raise
+            await asyncio.sleep(1.0)
+
+    loop = asyncio.get_running_loop()
+    procesados = 0
+    try:
+        while True:
+            await _enviar(escritor, {"tipo": "pedir", "trabajador": nombre})
+            mensaje = await _recibir(lector)
+            if mensaje is None or mensaje["tipo"] == "fin":
+                break
+            if mensaje["tipo"] == "esperar":
+                await asyncio.sleep(mensaje["s"])
+                continue
+
+            lote, lease_s = mensaje["id"], mensaje["lease_s"]
+            cedido = {"id": lote, "cesion": mensaje.get("cesion"), "trabajador": nombre}
+
+            async def renovar():
+                while True:
+                    await asyncio.sleep(lease_s / 3)
+                    await _enviar(escritor, {"tipo": "renovar", **cedido})
+
+            renovacion = asyncio.create_task(renovar())
+            resultados, errores = [], {}
+            try:
+                for ruta in mensaje["rutas"]:
+                    try:
+                        resultados.append(await loop.run_in_executor(None, procesador, ruta))
+                    except Exception as exc:
+                        errores[ruta] = str(exc)
+            finally:
+                renovacion.cancel()
+            if not resultados and errores:
+                error = "; ".join(f"{r}: {e}" for r, e in errores.items())
+                await _enviar(escritor, {"tipo": "fallo", **cedido, "error": error})
+            else:
+                await _enviar(escritor, {"tipo": "resultado", **cedido,
+                                         "resultados": resultados, "errores": errores})
+                procesados += 1
+            await _recibir(lector)
+    finally:
+        escritor.close()
+    logger.info(f"Trabajador {nombre} terminado: {procesados} lotes")
+    return procesados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..io.database import RUTA_BASE
+    from .watcher import _es_exportacion
+
+    parser = argparse.ArgumentParser(description="Procesamiento distribuido de exportaciones.")
+    sub = parser.add_subparsers(dest="modo", required=True)
+    p_coord = sub.add_parser("coordinador", help="Reparte las exportaciones de un archivo")
+    p_coord.add_argument("archivo", help="Directorio con exportaciones (zip o directorio)")
+    p_coord.add_argument("--host", default="127.0.0.1",
+                         help="Dirección de escucha (0.0.0.0 para trabajadores remotos)")
+    p_coord.add_argument("--puerto", type=int, default=8765)
+    p_coord.add_argument("--tam-lote", type=int, default=4)
+    p_coord.add_argument("--lease", type=float, default=60.0, help="Plazo de un lote (s)")
+    p_coord.add_argument("--base", default=RUTA_BASE, help="Base SQLite de resultados")
+    p_trab = sub.add_parser("trabajador", help="Procesa lotes de un coordinador")
+    p_trab.add_argument("--host", default="127.0.0.1")
+    p_trab.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    logging.getLogger("src.integration.metods").setLevel(logging.WARNING)
+
+    if args.modo == "coordinador":
+        rutas = sorted(e.path for e in os.scandir(args.archivo)
+                       if not e.name.startswith(".") and _es_exportacion(e))
+        coordinador = Coordinador(rutas, args.tam_lote, args.lease, host=args.host,
+                                  puerto=args.puerto, ruta_base=args.base)
+        resumen = asyncio.run(coordinador.ejecutar())
+        for (lote, ruta), motivo in resumen["fallidos"].items():
+            logger.error(f"Exportación fallida (lote {lote}): {ruta}: {motivo}")
+        raise SystemExit(1 if resumen["fallidos"] else 0)
+    asyncio.run(trabajar(args.host, args.puerto))
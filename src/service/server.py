@@ -0,0 +1,376 @@
+"""
+Servicio HTTP local (asyncio) para LAeq, dosis e integración bajo demanda.
+
+Evita arrancar ``main.py`` (intérprete, matplotlib, E/S de CSV) por cada
+consulta. Rutas:
+- ``POST /intensidad``: dB -> intensidad.
+- ``POST /laeq``: LAeq,T y duración.
+- ``POST /dosis``: LAeq,T, dosis y duración.
+- ``POST /integracion``: integrales por método (trapecios, Simpson).
+- ``POST /analisis``: todo lo anterior salvo la serie de intensidad.
+- ``GET /metricas``: peticiones, lotes y latencias p50/p99.
+
+El cuerpo puede ser JSON (``{"db": [...], "dt": 1.0}`` o
+``{"intensidad": [...]}``) o binario ``application/octet-stream`` con
+float64 little-endian (``?tipo=db|intensidad&dt=1.0`` en la URL). Las
+peticiones que llegan casi a la vez se agrupan en lotes que se calculan en
+un executor, fuera del bucle de eventos. Cada lote se reparte en grupos de
+como mucho ``max_muestras_lote`` muestras que se calculan en paralelo, de
+modo que una serie grande no retrasa a las pequeñas de su mismo lote.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from ..integration import calcular_metodos_integracion
+from ..utils import calcular_dosis, calcular_laeq_t, db_a_intensidad
+
+logger = logging.getLogger(__name__)
+
+OPERACIONES = ("intensidad", "laeq", "dosis", "integracion", "analisis")
+_ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorPeticion(ValueError):
+    """Petición mal formada (respuesta 400)."""
+
+
+def calcular_operacion(operacion: str, valores: np.ndarray, tipo: str, dt: float) -> dict:
+    """
+    Calcula una operación del servicio sobre una serie.
+
+    Parameters
+    ----------
+    operacion : str
+        Una de ``OPERACIONES``.
+    valores : np.ndarray
+        Serie en dB o en intensidad (W/m²).
+    tipo : str
+        ``"db"`` o ``"intensidad"``.
+    dt : float
+        Intervalo entre muestras en segundos.
+
+    Returns
+    -------
+    dict
+        Resultado serializable a JSON.
+    """
+    if len(valores) == 0:
+        raise ErrorPeticion("La serie está vacía.")
+    intensidad = db_a_intensidad(valores) if tipo == "db" else valores
+    if operacion == "intensidad":
+        return {"intensidad": intensidad.tolist()}
+
+    salida = {}
+    T_horas = len(intensidad) * dt / 3600
+    if operacion in ("laeq", "dosis", "analisis"):
+        laeq = float(calcular_laeq_t(intensidad, dt, 0.0))
+        salida.update({"laeq_db": laeq, "T_horas": T_horas})
+        if operacion != "laeq":
+            salida["dosis_pct"] = float(calcular_dosis(laeq, T_horas))
+    if operacion in ("integracion", "analisis"):
+        if len(intensidad) < 2:
+            raise ErrorPeticion("Se requieren al menos 2 puntos para integrar.")
+        t = np.arange(1, len(intensidad) + 1) * dt
+        salida["integracion"] = {m: None if v is None else float(v)
+                                 for m, v in calcular_metodos_integracion(t, intensidad).items()}
+    return salida
+
+
+def _calcular_lote(lote: list[tuple]) -> list[dict | Exception]:
+    """Calcula un lote de peticiones; los errores se devuelven por elemento."""
+    salidas = []
+    for operacion, valores, tipo, dt in lote:
+        try:
+            salidas.append(calcular_operacion(operacion, valores, tipo, dt))
+        except Exception as exc:
+            salidas.append(exc)
+    return salidas
+
+
+def _agrupar_por_tamano(tamanos: list[int], max_muestras: int) -> list[list[int]]:
+    """
+    Reparte índices en grupos de como mucho ``max_muestras`` muestras (una
+    serie mayor va sola), conservando el orden.
+    """
+    grupos: list[list[int]] = []
+    actual: list[int] = []
+    total = 0
+    for i, n in enumerate(tamanos):
+        if actual and total + n > max_muestras:
+            grupos.append(actual)
+            actual, total = [], 0
+        actual.append(i)
+        total += n
+    if actual:
+        grupos.append(actual)
+    return grupos
+
+
+def _leer_serie(cuerpo: bytes, tipo_contenido: str, consulta: dict) -> tuple[np.ndarray, str, float]:
+    """Interpreta el cuerpo (JSON o float64 binario) -> (valores, tipo, dt)."""
+    dt = float(consulta.get("dt", ["1.0"])[0])
+    if tipo_contenido.startswith("application/octet-stream"):
+        if len(cuerpo) % 8:
+            raise ErrorPeticion("El cuerpo binario debe contener float64 (múltiplo de 8 bytes).")
+        tipo = consulta.get("tipo", ["db"])[0]
+        valores = np.frombuffer(cuerpo, dtype="<f8")
+    else:
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except json.JSONDecodeError as exc:
+            raise ErrorPeticion(f"JSON inválido: {exc}") from exc
+        if not isinstance(datos, dict):
+            raise ErrorPeticion("El cuerpo JSON debe ser un objeto con la clave 'db' o "
+                                "'intensidad'.")
+        if "db" in datos:
+            tipo, valores = "db", datos["db"]
+        elif "intensidad" in datos:
+            tipo, valores = "intensidad", datos["intensidad"]
+        else:
+            raise ErrorPeticion("Se esperaba la clave 'db' o 'intensidad'.")
+        try:
+            dt = float(datos.get("dt", dt))
+            valores = np.asarray(valores, dtype=np.float64)
+        except (TypeError, ValueError) as exc:
+            raise ErrorPeticion(f"Valores no numéricos: {exc}") from exc
+    if tipo not in ("db", "intensidad"):
+        raise ErrorPeticion("tipo debe ser 'db' o 'intensidad'.")
+    if dt <= 0:
+        raise ErrorPeticion("dt debe ser positivo.")
+    return valores, tipo, dt
+
+
+class ServicioAcustico:
+    """
+    Servidor HTTP/1.1 mínimo sobre ``asyncio.start_server``.
+
+    Parameters
+    ----------
+    host : str, optional
+        Dirección de escucha (por defecto solo localhost).
+    puerto : int, optional
+        Puerto (0 para uno libre; ver ``puerto`` tras ``iniciar``).
+    ventana_lote_ms : float, optional
+        Tiempo máximo que una petición espera a que se forme un lote.
+    max_lote : int, optional
+        Tamaño máximo de lote.
+    executor : Executor, optional
+        Executor para el cálculo (por defecto un ``ThreadPoolExecutor``
+        propio; NumPy libera el GIL en las operaciones vectoriales). Un
+        executor recibido no se cierra en ``detener``.
+    max_cuerpo_bytes : int, optional
+        Tamaño máximo del cuerpo de una petición.
+    max_muestras_lote : int, optional
+        Muestras máximas por llamada al executor; los lotes mayores se
+        reparten en varias llamadas concurrentes.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 puerto: int = 8080,
+                 ventana_lote_ms: float = 2.0,
+                 max_lote: int = 32,
+                 executor: Executor | None = None,
+                 max_cuerpo_bytes: int = 256 * 1024 * 1024,
+                 max_muestras_lote: int = 1 << 16):
+        self.host = host
+        self.puerto = puerto
+        self.ventana_lote_s = ventana_lote_ms / 1000
+        self.max_lote = max_lote
+        self._executor_propio = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self.max_cuerpo_bytes = max_cuerpo_bytes
+        self.max_muestras_lote = max_muestras_lote
+
+        self._servidor: asyncio.AbstractServer | None = None
+        self._lote: list[tuple[tuple, asyncio.Future]] = []
+        self._temporizador: asyncio.TimerHandle | None = None
+        self._latencias_ms: deque = deque(maxlen=10_000)
+        self._peticiones = 0
+        self._lotes = 0
+        self._elementos_lote = 0
+
+    async def iniciar(self) -> None:
+        """Abre el socket de escucha."""
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        logger.info(f"Servicio acústico escuchando en http://{self.host}:{self.puerto}")
+
+    async def servir(self) -> None:
+        """Inicia (si hace falta) y atiende peticiones indefinidamente."""
+        if self._servidor is None:
+            await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def detener(self) -> None:
+        """Cierra el socket y libera el executor si lo creó el servicio."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self._executor_propio:
+            self.executor.shutdown(wait=False)
+
+    def metricas(self) -> dict:
+        """Peticiones atendidas, tamaño medio de lote y latencias p50/p99 (ms)."""
+        p50, p99 = (np.percentile(self._latencias_ms, [50, 99]) if self._latencias_ms
+                    else (np.nan, np.nan))
+        return {
+            "peticiones": self._peticiones,
+            "lotes": self._lotes,
+            "tamano_medio_lote": self._elementos_lote / self._lotes if self._lotes else 0.0,
+            "latencia_p50_ms": float(p50),
+            "latencia_p99_ms": float(p99),
+        }
+
+    # -- Agrupación en lotes -------------------------------------------------
+
+    def _encolar(self, peticion: tuple) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._lote.append((peticion, futuro))
+        if len(self._lote) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.ventana_lote_s, self._despachar)
+        return futuro
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._lote = self._lote, []
+        if not lote:
+            return
+        self._lotes += 1
+        self._elementos_lote += len(lote)
+        loop = asyncio.get_running_loop()
+        tamanos = [len(peticion[1]) for peticion, _ in lote]
+        for indices in _agrupar_por_tamano(tamanos, self.max_muestras_lote):
+            grupo = [lote[i] for i in indices]
+            calculo = loop.run_in_executor(self.executor, _calcular_lote, [p for p, _ in grupo])
+            calculo.add_done_callback(lambda tarea, grupo=grupo: self._repartir(grupo, tarea))
+
+    @staticmethod
+    def _repartir(grupo: list[tuple[tuple, asyncio.Future]], tarea: asyncio.Future) -> None:
+        error = tarea.exception()
+        salidas = [error] * len(grupo) if error else tarea.result()
+        for (_, futuro), salida in zip(grupo, salidas):
+            if futuro.done():
+                continue
+            if isinstance(salida, Exception):
+                futuro.set_exception(salida)
+            else:
+                futuro.set_result(salida)
+
+    # -- HTTP ----------------------------------------------------------------
+
+    async def _responder(self, escritor: asyncio.StreamWriter, estado: int,
+                         cuerpo: dict, mantener: bool) -> None:
+        datos = json.dumps(cuerpo).encode()
+        cabecera = (
+            f"HTTP/1.1 {estado} {_ESTADOS.get(estado, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+        ).encode()
+        escritor.write(cabecera + datos)
+        await escritor.drain()
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                # La latencia se mide desde la línea de petición (no incluye
+                # la espera entre peticiones de una conexión persistente)
+                try:
+                    linea_peticion = await lector.readuntil(b"\r\n")
+                    t0 = time.perf_counter()
+                    cabeceras = {}
+                    while (linea := await lector.readuntil(b"\r\n")) != b"\r\n":
+                        clave, separador, valor = linea.decode("latin-1").partition(":")
+                        if separador:
+                            cabeceras[clave.strip().lower()] = valor.strip()
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._responder(escritor, 400, {"error": "Cabecera demasiado larga."}, False)
+                    break
+                peticion = linea_peticion.decode("latin-1").strip()
+                try:
+                    metodo, objetivo, version = peticion.split(" ", 2)
+                except ValueError:
+                    await self._responder(escritor, 400, {"error": "Línea de petición inválida."}, False)
+                    break
+                mantener = (cabeceras.get("connection", "").lower() != "close"
+                            and version.upper() == "HTTP/1.1")
+
+                try:
+                    longitud = int(cabeceras.get("content-length", "0") or 0)
+                except ValueError:
+                    longitud = -1
+                if longitud < 0:
+                    await self._responder(escritor, 400, {"error": "Content-Length inválido."}, False)
+                    break
+                if longitud > self.max_cuerpo_bytes:
+                    await self._responder(escritor, 413, {"error": "Cuerpo demasiado grande."}, False)
+                    break
+                cuerpo = await lector.readexactly(longitud) if longitud else b""
+
+                estado, respuesta = await self._enrutar(metodo, objetivo, cabeceras, cuerpo)
+                await self._responder(escritor, estado, respuesta, mantener)
+                self._peticiones += 1
+                self._latencias_ms.append((time.perf_counter() - t0) * 1000)
+                if not mantener:
+                    break
+        finally:
+            escritor.close()
+
+    async def _enrutar(self, metodo: str, objetivo: str, cabeceras: dict,
+                       cuerpo: bytes) -> tuple[int, dict]:
+        url = urlsplit(objetivo)
+        ruta = url.path.strip("/")
+        if ruta == "metricas":
+            return (200, self.metricas()) if metodo == "GET" else (405, {"error": "Use GET."})
+        if ruta not in OPERACIONES:
+            return 404, {"error": f"Ruta desconocida: /{ruta}"}
+        if metodo != "POST":
+            return 405, {"error": "Use POST."}
+        try:
+            valores, tipo, dt = _leer_serie(cuerpo, cabeceras.get("content-type", ""),
+                                            parse_qs(url.query))
+            return 200, await self._encolar((ruta, valores, tipo, dt))
+        except (ErrorPeticion, ValueError) as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            logger.exception(f"Error en /{ruta}: {exc}")
+            return 500, {"error": str(exc)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de LAeq, dosis e integración.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--ventana-lote-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    logging.getLogger("src.integration.metods").setLevel(logging.WARNING)
+
+    servicio = ServicioAcustico(args.host, args.puerto, args.ventana_lote_ms)
+    try:
+        asyncio.run(servicio.servir())
+    except KeyboardInterrupt:
+        logger.info("Servicio detenido.")
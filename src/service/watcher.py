@@ -0,0 +1,333 @@
+"""
+Demonio de ingesta: vigila una bandeja de entrada de exportaciones.
+
+Las exportaciones de NoiseCapture (zip o directorio con ``track.geojson``)
+que llegan a la bandeja se detectan por sondeo desde un bucle asyncio. Se
+encolan solo cuando su tamaño y fecha de modificación se mantienen estables
+durante ``espera_estable_s`` (escrituras parciales) y se procesan en un pool
+acotado de procesos con ``analizar_grabacion``. Los resultados van a la base
+SQLite de resultados y la firma de cada exportación procesada (o fallida) se
+guarda en un fichero de estado, de modo que un reinicio no repite trabajo.
+
+Las escrituras (base y fichero de estado) se hacen en un único hilo escritor,
+fuera del bucle de eventos. Una exportación que falla no se reintenta hasta
+que cambie su firma, tampoco tras un reinicio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+from ..integration import analizar_grabacion
+from ..io import abrir_base_resultados, guardar_grabacion, leer_exportacion_noisecapture
+from ..io.database import RUTA_BASE
+from ..io.noisecapture import TRACK_GEOJSON
+from ..utils import Grabacion
+
+logger = logging.getLogger(__name__)
+
+
+def procesar_exportacion(ruta: str) -> dict:
+    """
+    Lee una exportación y ejecuta la cadena de análisis en memoria.
+
+    Returns
+    -------
+    dict
+        Salida de ``analizar_grabacion`` más ``meta`` y ``niveles_db``.
+    """
+    exportacion = leer_exportacion_noisecapture(ruta)
+    grabacion = Grabacion.desde_exportacion(exportacion).truncar_25_6k()
+    salida = analizar_grabacion(grabacion, truncar=False)
+    salida["meta"] = exportacion.meta
+    salida["niveles_db"] = grabacion.db
+    return salida
+
+
+def _firma(ruta: str) -> tuple[int, int] | None:
+    """(tamaño total, mtime máximo en ns) de un fichero o directorio."""
+    try:
+        if os.path.isdir(ruta):
+            stats = [os.stat(e.path) for e in os.scandir(ruta) if e.is_file()]
+        else:
+            stats = [os.stat(ruta)]
+    except FileNotFoundError:
+        return None
+    if not stats:
+        return None
+    return sum(s.st_size for s in stats), max(s.st_mtime_ns for s in stats)
+
+
+def _es_exportacion(entrada: os.DirEntry) -> bool:
+    if entrada.is_file():
+        return entrada.name.lower().endswith(".zip")
+    return entrada.is_dir() and os.path.exists(os.path.join(entrada.path, TRACK_GEOJSON))
+
+
+@dataclass
+class MetricasIngesta:
+    """Contadores del demonio: cola, latencia y rendimiento."""
+
+    encoladas: int = 0
+    procesadas: int = 0
+    fallidas: int = 0
+    inicio: float = field(default_factory=time.monotonic)
+    latencias_s: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def resumen(self, profundidad_cola: int, en_curso: int) -> dict:
+        """Instantánea de los contadores."""
+        transcurrido = max(time.monotonic() - self.inicio, 1e-9)
+        p50, p99 = (np.percentile(self.latencias_s, [50, 99]) if self.latencias_s
+                    else (np.nan, np.nan))
+        return {
+            "profundidad_cola": profundidad_cola,
+            "en_curso": en_curso,
+            "encoladas": self.encoladas,
+            "procesadas": self.procesadas,
+            "fallidas": self.fallidas,
+            "latencia_p50_s": float(p50),
+            "latencia_p99_s": float(p99),
+            "rendimiento_por_min": 60 * self.procesadas / transcurrido,
+        }
+
+
+class VigilanteExportaciones:
+    """
+    Vigila ``bandeja`` y procesa las exportaciones nuevas o modificadas.
+
+    Parameters
+    ----------
+    bandeja : str
+        Directorio de entrada.
+    ruta_base : str, optional
+        Base SQLite de resultados.
+    ruta_estado : str, optional
+        Fichero JSON con las firmas ya procesadas y fallidas (por defecto
+        ``<bandeja>/.procesados.json``).
+    intervalo_s : float, optional
+        Periodo de sondeo de la bandeja.
+    espera_estable_s : float, optional
+        Tiempo que una exportación debe permanecer sin cambios antes de
+        encolarse.
+    trabajadores : int, optional
+        Tamaño del pool de procesos.
+    procesador : Callable, optional
+        Función ``ruta -> dict`` (por defecto ``procesar_exportacion``);
+        debe poder serializarse con pickle si se usa un pool de procesos.
+    executor : Executor, optional
+        Pool a utilizar en lugar de crear un ``ProcessPoolExecutor``.
+    """
+
+    def __init__(self,
+                 bandeja: str,
+                 ruta_base: str = RUTA_BASE,
+                 ruta_estado: str | None = None,
+                 intervalo_s: float = 2.0,
+                 espera_estable_s: float = 5.0,
+                 trabajadores: int = 2,
+                 procesador: Callable[[str], dict] = procesar_exportacion,
+                 executor: Executor | None = None):
+        self.bandeja = bandeja
+        self.ruta_base = ruta_base
+        self.ruta_estado = ruta_estado or os.path.join(bandeja, ".procesados.json")
+        self.intervalo_s = intervalo_s
+        self.espera_estable_s = espera_estable_s
+        self.trabajadores = trabajadores
+        self.procesador = procesador
+        self.executor = executor
+        self.metricas = MetricasIngesta()
+
+        self._procesados, self._fallidos = self._cargar_estado()
+        self._candidatos: dict[str, tuple[tuple[int, int], float]] = {}
+        self._pendientes: set[str] = set()
+        self._en_curso = 0
+        self._cola: asyncio.Queue | None = None
+
+    def _cargar_estado(self) -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+        """Firmas procesadas y fallidas guardadas (acepta el formato antiguo)."""
+        if not os.path.exists(self.ruta_estado):
+            return {}, {}
+        with open(self.ruta_estado, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        if "procesados" not in estado:
+            # Formato antiguo: solo {ruta: firma} de las procesadas
+            return estado, {}
+        return estado["procesados"], estado.get("fallidos", {})
+
+    def _instantanea_estado(self) -> dict:
+        """Copia del estado: el hilo escritor no ve mutaciones posteriores."""
+        return {"procesados": dict(self._procesados), "fallidos": dict(self._fallidos)}
+
+    def _guardar_estado(self, estado: dict) -> None:
+        temporal = self.ruta_estado + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+        os.replace(temporal, self.ruta_estado)
+
+    def _guardar(self, con, ruta: str, salida: dict) -> None:
+        """Guarda un resultado en la base (hilo escritor)."""
+        guardar_grabacion(
+            con,
+            meta=salida.get("meta"),
+            escenario="completo",
+            resultados=salida["resultados"],
+            errores=salida["errores"],
+            estadisticos=salida["estadisticos"],
+            laeq=salida["laeq"],
+            dosis=salida["dosis"],
+            T_horas=salida["T_horas"],
+            niveles_db=salida.get("niveles_db"),
+            origen=ruta,
+        )
+
+    def estado(self) -> dict:
+        """Contadores actuales (cola, latencia p50/p99, rendimiento)."""
+        profundidad = self._cola.qsize() if self._cola is not None else 0
+        return self.metricas.resumen(profundidad, self._en_curso)
+
+    def explorar(self) -> list[str]:
+        """
+        Recorre la bandeja y devuelve las exportaciones que pasan a la cola:
+        estables durante ``espera_estable_s`` y no procesadas (ni fallidas)
+        con esa firma.
+        """
+        ahora = time.monotonic()
+        listas = []
+        vistas = set()
+        for entrada in os.scandir(self.bandeja):
+            if entrada.name.startswith(".") or not _es_exportacion(entrada):
+                continue
+            ruta = entrada.path
+            vistas.add(ruta)
+            firma = _firma(ruta)
+            if firma is None or ruta in self._pendientes:
+                continue
+            if list(firma) in (self._procesados.get(ruta), self._fallidos.get(ruta)):
+                self._candidatos.pop(ruta, None)
+                continue
+            previa = self._candidatos.get(ruta)
+            if previa is None or previa[0] != firma:
+                self._candidatos[ruta] = (firma, ahora)
+            elif ahora - previa[1] >= self.espera_estable_s:
+                del self._candidatos[ruta]
+                listas.append(ruta)
+        for ruta in set(self._candidatos) - vistas:
+            del self._candidatos[ruta]
+        return listas
+
+    async def _vigilar(self, detener: asyncio.Event) -> None:
+        while not detener.is_set():
+            for ruta in self.explorar():
+                self._pendientes.add(ruta)
+                self.metricas.encoladas += 1
+                await self._cola.put((ruta, time.monotonic()))
+                logger.info(f"Encolada: {ruta}")
+            try:
+                await asyncio.wait_for(detener.wait(), self.intervalo_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _trabajar(self, executor: Executor, escritor: Executor, con) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            ruta, encolada = await self._cola.get()
+            self._en_curso += 1
+            firma = _firma(ruta)
+            try:
+                salida = await loop.run_in_executor(executor, self.procesador, ruta)
+                await loop.run_in_executor(escritor, self._guardar, con, ruta, salida)
+                if firma is not None:
+                    self._procesados[ruta] = list(firma)
+                self._fallidos.pop(ruta, None)
+                self.metricas.procesadas += 1
+                self.metricas.latencias_s.append(time.monotonic() - encolada)
+                logger.info(f"Procesada: {ruta} (LAeq = {salida['laeq']:.2f} dB(A))")
+            except Exception as exc:
+                self.metricas.fallidas += 1
+                if firma is not None:
+                    self._fallidos[ruta] = list(firma)
+                logger.exception(f"Fallo al procesar {ruta} (no se reintenta hasta que "
+                                 f"cambie): {exc}")
+            try:
+                # La instantánea se toma tras actualizar el estado y el hilo
+                # escritor las guarda en orden: cada una incluye a las previas
+                await loop.run_in_executor(escritor, self._guardar_estado,
+                                           self._instantanea_estado())
+            except Exception as exc:
+                logger.exception(f"No se pudo guardar el estado de ingesta: {exc}")
+            finally:
+                self._pendientes.discard(ruta)
+                self._en_curso -= 1
+                self._cola.task_done()
+
+    async def _informar(self, detener: asyncio.Event, periodo_s: float) -> None:
+        while not detener.is_set():
+            try:
+                await asyncio.wait_for(detener.wait(), periodo_s)
+            except asyncio.TimeoutError:
+                logger.info(f"Estado de ingesta: {self.estado()}")
+
+    async def ejecutar(self, detener: asyncio.Event | None = None,
+                       periodo_informe_s: float = 60.0) -> None:
+        """
+        Ejecuta el demonio hasta que se active ``detener``; al detenerse
+        termina de procesar lo ya encolado.
+        """
+        detener = detener or asyncio.Event()
+        self._cola = asyncio.Queue()
+        propio = self.executor is None
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.trabajadores)
+        # Un solo hilo escritor: la conexión SQLite se crea y se usa en él
+        escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor")
+        loop = asyncio.get_running_loop()
+        con = await loop.run_in_executor(escritor, abrir_base_resultados, self.ruta_base)
+        logger.info(f"Vigilando {self.bandeja} con {self.trabajadores} trabajadores")
+
+        trabajadores = [asyncio.create_task(self._trabajar(executor, escritor, con))
+                        for _ in range(self.trabajadores)]
+        informe = asyncio.create_task(self._informar(detener, periodo_informe_s))
+        try:
+            await self._vigilar(detener)
+            await self._cola.join()
+        finally:
+            for tarea in trabajadores + [informe]:
+                tarea.cancel()
+            await asyncio.gather(*trabajadores, informe, return_exceptions=True)
+            await loop.run_in_executor(escritor, con.close)
+            escritor.shutdown(wait=True)
+            if propio:
+                executor.shutdown(wait=True)
+            logger.info(f"Demonio detenido: {self.estado()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Procesa exportaciones que llegan a una bandeja.")
+    parser.add_argument("bandeja", help="Directorio vigilado")
+    parser.add_argument("--base", default=RUTA_BASE, help="Base SQLite de resultados")
+    parser.add_argument("--trabajadores", type=int, default=2)
+    parser.add_argument("--intervalo", type=float, default=2.0, help="Periodo de sondeo (s)")
+    parser.add_argument("--espera", type=float, default=5.0, help="Estabilidad requerida (s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+    vigilante = VigilanteExportaciones(args.bandeja, args.base,
+                                       intervalo_s=args.intervalo,
+                                       espera_estable_s=args.espera,
+                                       trabajadores=args.trabajadores)
+    try:
+        asyncio.run(vigilante.ejecutar())
+    except KeyboardInterrupt:
+        logger.info("Interrumpido por el usuario.")
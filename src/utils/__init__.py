@@ -1,16 +1,40 @@
 """Utilidades generales."""
 
-from .validations import max_filas_validas
+from .validations import SerieValidada, max_filas_validas, validar_serie
 from .truncate import truncar_a_25_6k
-from .acustic import calcular_dosis, calcular_laeq_t
+from .acustic import (
+    calcular_dosis,
+    calcular_dosis_escenarios,
+    calcular_laeq_t,
+    calcular_laeq_ventanas,
+)
 from .remove_percentage import quitar_porcentaje_homogeneo
-from .transforms import db_a_intensidad
+from .transforms import (
+    centidb_a_intensidad,
+    db_a_centidb,
+    db_a_intensidad,
+    nivel_medio_energetico,
+    suma_compensada,
+)
+from .recording import Grabacion, como_intensidad
+from .tasks import ejecutar_grafo
 
 __all__ = [
     "max_filas_validas",
+    "SerieValidada",
+    "validar_serie",
     "truncar_a_25_6k",
     "calcular_dosis",
+    "calcular_dosis_escenarios",
     "calcular_laeq_t",
+    "calcular_laeq_ventanas",
     "quitar_porcentaje_homogeneo",
     "db_a_intensidad",
+    "db_a_centidb",
+    "centidb_a_intensidad",
+    "nivel_medio_energetico",
+    "suma_compensada",
+    "Grabacion",
+    "como_intensidad",
+    "ejecutar_grafo",
 ]
@@ -1,7 +1,12 @@
 """Cálculos acústicos: LAeq,T y dosis de ruido."""
 
+from __future__ import annotations
 
 import numpy as np
+import polars as pl
+
+from .recording import como_intensidad
+from .transforms import suma_compensada
 
 
 def calcular_laeq_t(intensidades: np.ndarray, dt: float, energia_total: float) -> float:
@@ -10,8 +15,9 @@ def calcular_laeq_t(intensidades: np.ndarray, dt: float, energia_total: float) -
 
     Parameters
     ----------
-    intensidades : np.ndarray
-        Valores de intensidad I(t).
+    intensidades : np.ndarray | Grabacion
+        Valores de intensidad I(t) o grabación. Se admite float32: la
+        suma se acumula en float64 con compensación (``suma_compensada``).
     dt : float
         Intervalo de tiempo entre muestras (en segundos).
 
@@ -21,7 +27,8 @@ def calcular_laeq_t(intensidades: np.ndarray, dt: float, energia_total: float) -
         LAeq,T en dB(A).
     """
     I_ref = 1e-12
-    energia_total = np.sum(intensidades) * dt
+    intensidades = como_intensidad(intensidades)
+    energia_total = suma_compensada(intensidades) * dt
     T = len(intensidades) * dt
     laeq = 10 * np.log10((energia_total / T) / I_ref)
     return laeq
@@ -46,3 +53,130 @@ def calcular_dosis(laeq: float, T_horas: float) -> float:
     lex8h = laeq + 10 * np.log10(T_horas / 8)
     dosis = 100 * (2 ** ((lex8h - 85) / 3))
     return dosis
+
+
+def calcular_dosis_escenarios(laeq: float | np.ndarray,
+                              T_horas: float | np.ndarray,
+                              criterios_db: tuple[float, ...] = (80.0, 85.0, 90.0),
+                              intercambios_db: tuple[float, ...] = (3.0, 5.0),
+                              duraciones_h: tuple[float, ...] | None = None,
+                              duracion_ref_h: float = 8.0,
+                              normalizacion: str = "intercambio",
+                              grabaciones: list | None = None) -> pl.DataFrame:
+    """
+    Evalúa la dosis de ruido sobre una rejilla de criterios, tasas de
+    intercambio y duraciones, para una o varias grabaciones a la vez.
+
+    Todo el cálculo es una única operación vectorizada con broadcasting
+    ``(grabación, criterio, intercambio, duración)``.
+
+    Parameters
+    ----------
+    laeq : float | np.ndarray
+        LAeq,T en dB(A) de cada grabación.
+    T_horas : float | np.ndarray
+        Duración medida de cada grabación en horas.
+    criterios_db : tuple, optional
+        Niveles de criterio Lc en dB(A).
+    intercambios_db : tuple, optional
+        Tasas de intercambio q en dB (3 dB igual energía, 5 dB OSHA).
+    duraciones_h : tuple, optional
+        Duraciones de exposición proyectadas en horas. Si no se indica, se
+        usa la duración medida de cada grabación.
+    duracion_ref_h : float, optional
+        Duración de referencia Tc del criterio.
+    normalizacion : str, optional
+        ``"intercambio"`` (por defecto): el término temporal se deriva de q
+        en cada fila, (q/log10 2)·log10(T/Tc), es decir,
+        D = 100·(T/Tc)·2^((L−Lc)/q) (OSHA/NIOSH).
+        ``"energia"``: igual energía, 10·log10(T/Tc), como ``calcular_dosis``
+        (RD 286/2006); con Lc = 85 dB da la misma dosis que ella. Solo es
+        coherente con q = 3 dB.
+    grabaciones : list, optional
+        Identificadores de las grabaciones (por defecto 0..n-1).
+
+    Returns
+    -------
+    pl.DataFrame
+        Una fila por combinación: ``grabacion``, ``laeq_db``,
+        ``criterio_db``, ``intercambio_db``, ``duracion_h``,
+        ``nivel_normalizado_db`` (nivel equivalente a Tc con la tasa q) y
+        ``dosis_pct``.
+    """
+    if normalizacion not in ("intercambio", "energia"):
+        raise ValueError("normalizacion debe ser 'intercambio' o 'energia'.")
+    if normalizacion == "energia" and any(q != 3.0 for q in intercambios_db):
+        raise ValueError("normalizacion 'energia' solo es coherente con intercambios_db = (3,).")
+    laeq = np.atleast_1d(np.asarray(laeq, dtype=np.float64))
+    T_horas = np.broadcast_to(np.asarray(T_horas, dtype=np.float64), laeq.shape)
+    n = laeq.shape[0]
+    grabaciones = np.arange(n) if grabaciones is None else np.asarray(grabaciones)
+    if grabaciones.shape != (n,):
+        raise ValueError("grabaciones debe tener un identificador por LAeq.")
+
+    L = laeq[:, None, None, None]
+    Lc = np.asarray(criterios_db, dtype=np.float64)[None, :, None, None]
+    q = np.asarray(intercambios_db, dtype=np.float64)[None, None, :, None]
+    if duraciones_h is None:
+        T = T_horas[:, None, None, None]
+    else:
+        T = np.asarray(duraciones_h, dtype=np.float64)[None, None, None, :]
+
+    factor = 10.0 if normalizacion == "energia" else q / np.log10(2)
+    with np.errstate(divide="ignore"):
+        nivel = L + factor * np.log10(T / duracion_ref_h)
+    dosis = 100 * np.exp2((nivel - Lc) / q)
+
+    forma = dosis.shape
+
+    def columna(a: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(a, forma).ravel()
+
+    return pl.DataFrame({
+        "grabacion": columna(grabaciones[:, None, None, None]),
+        "laeq_db": columna(L),
+        "criterio_db": columna(Lc),
+        "intercambio_db": columna(q),
+        "duracion_h": columna(T),
+        "nivel_normalizado_db": columna(nivel),
+        "dosis_pct": dosis.ravel(),
+    })
+
+
+def calcular_laeq_ventanas(intensidades: np.ndarray,
+                           dt: float,
+                           ventana_s: float = 60.0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula la serie de LAeq por ventanas consecutivas de ``ventana_s``.
+
+    Parameters
+    ----------
+    intensidades : np.ndarray | Grabacion
+        Valores de intensidad I(t) o grabación.
+    dt : float
+        Intervalo de tiempo entre muestras (en segundos).
+    ventana_s : float, optional
+        Duración de cada ventana en segundos. La última ventana puede ser
+        incompleta.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Inicio de cada ventana (s) y su LAeq en dB(A).
+
+    Notes
+    -----
+    La energía de cada ventana se acumula en float64 con ``np.add.reduceat``
+    (suma secuencial, sin compensación): el error relativo es del orden de
+    m·2^-53 para ventanas de m muestras, despreciable frente a la
+    cuantización de los niveles.
+    """
+    I_ref = 1e-12
+    intensidades = como_intensidad(intensidades)
+    m = max(int(round(ventana_s / dt)), 1)
+    inicios = np.arange(0, len(intensidades), m)
+    energia = (np.add.reduceat(intensidades, inicios, dtype=np.float64) if len(inicios)
+               else np.empty(0))
+    muestras = np.diff(np.append(inicios, len(intensidades)))
+    laeq = 10 * np.log10((energia / muestras) / I_ref)
+    return inicios * dt, laeq
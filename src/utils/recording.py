@@ -0,0 +1,239 @@
+"""
+Contenedor compacto de una grabación con vistas sin copia.
+
+Una ``Grabacion`` posee un único array contiguo de niveles en dB y calcula la
+intensidad de forma perezosa (una sola vez). El truncado 25 + 6k, las ventanas
+y la reducción homogénea devuelven vistas sobre el mismo buffer, de modo que
+el pico de memoria por grabación queda en torno a una o dos copias de los
+datos. La serie validada (``SerieValidada``) también se construye una sola vez
+y todos los cálculos sobre la grabación parten de ella.
+"""
+
+from __future__ import annotations
+
+import logging
+from fractions import Fraction
+
+import numpy as np
+import polars as pl
+from numpy.lib.stride_tricks import as_strided
+
+from .transforms import (
+    centidb_a_db,
+    centidb_a_intensidad,
+    db_a_centidb,
+    db_a_intensidad,
+)
+from .validations import SerieValidada, max_filas_validas
+
+logger = logging.getLogger(__name__)
+
+
+class Grabacion:
+    """
+    Serie de niveles en dB muestreada a paso constante.
+
+    Parameters
+    ----------
+    db : np.ndarray
+        Niveles en dB. Se copia solo si no es float64 contiguo.
+    dt : float, optional
+        Intervalo entre muestras en segundos.
+    meta : object, optional
+        Metadatos asociados (p. ej. ``MetaGrabacion``).
+    compacta : bool, optional
+        Si es True, los niveles se guardan en centi-dB int16 (4x menos
+        memoria) y la intensidad se obtiene con una tabla de búsqueda.
+    simple : bool, optional
+        Si es True, niveles e intensidad se guardan en float32 (mitad de
+        memoria). Las reducciones acumulan en float64 con compensación, así
+        que el error de LAeq queda acotado por el redondeo de cada muestra:
+        ≤ 4·10⁻⁶ dB por guardar los dB (semi-ulp de float32 a 120 dB) y
+        ≤ 2.6·10⁻⁷ dB por guardar la intensidad, frente a ≤ 0.005 dB en
+        modo compacto.
+    """
+
+    __slots__ = ("_db", "_n", "dt", "meta", "_intensidad", "_serie")
+
+    def __init__(self, db: np.ndarray, dt: float = 1.0, meta=None,
+                 compacta: bool = False, simple: bool = False):
+        if compacta and simple:
+            raise ValueError("compacta y simple son excluyentes.")
+        db = np.asarray(db)
+        if simple:
+            db = np.ascontiguousarray(db, dtype=np.float32)
+        elif compacta:
+            db = np.ascontiguousarray(db) if db.dtype == np.int16 else db_a_centidb(db)
+        else:
+            db = np.ascontiguousarray(db, dtype=np.float64)
+        if db.ndim != 1:
+            raise ValueError("La serie en dB debe ser unidimensional.")
+        self._db = db
+        self._n = db.shape[0]
+        self.dt = dt
+        self.meta = meta
+        self._intensidad = None
+        self._serie = None
+
+    @classmethod
+    def _vista(cls, db: np.ndarray, n: int, dt: float, meta,
+               intensidad: np.ndarray | None = None) -> Grabacion:
+        """Crea una grabación sobre ``db`` sin copiar ni validar."""
+        g = cls.__new__(cls)
+        g._db = db
+        g._n = n
+        g.dt = dt
+        g.meta = meta
+        g._intensidad = intensidad
+        g._serie = None
+        return g
+
+    @classmethod
+    def desde_csv(cls, ruta: str, columna: str = "leq_mean", dt: float = 1.0,
+                  **opciones) -> Grabacion:
+        """
+        Lee únicamente la columna de niveles de un CSV.
+
+        Parameters
+        ----------
+        ruta : str
+            Ruta al archivo CSV.
+        columna : str, optional
+            Columna con los niveles en dB.
+        dt : float, optional
+            Intervalo entre muestras en segundos.
+        **opciones
+            ``compacta`` o ``simple`` (ver la clase).
+        """
+        logger.info(f"Leyendo columna '{columna}' de: {ruta}")
+        df = pl.read_csv(ruta, columns=[columna])
+        return cls(df[columna].to_numpy(), dt=dt, **opciones)
+
+    @classmethod
+    def desde_exportacion(cls, exportacion, dt: float = 1.0) -> Grabacion:
+        """
+        Crea una grabación a partir de una ``ExportacionNoiseCapture``
+        reutilizando su columna ``leq_mean`` sin copiarla.
+        """
+        return cls(exportacion.leq_mean, dt=dt, meta=exportacion.meta)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __repr__(self) -> str:
+        return f"Grabacion(n={self._n}, dt={self.dt})"
+
+    @property
+    def compacta(self) -> bool:
+        """True si los niveles se almacenan en centi-dB int16."""
+        return self._db.dtype == np.int16
+
+    @property
+    def simple(self) -> bool:
+        """True si los niveles se almacenan en float32."""
+        return self._db.dtype == np.float32
+
+    def _datos(self) -> np.ndarray:
+        """Niveles almacenados (float64, float32 o int16) como array 1D de longitud n."""
+        return self._db.reshape(-1)[:self._n]
+
+    @property
+    def db(self) -> np.ndarray:
+        """Niveles en dB (vista; copia tras una reducción no contigua o en modo compacto)."""
+        datos = self._datos()
+        return centidb_a_db(datos) if self.compacta else datos
+
+    @property
+    def intensidad(self) -> np.ndarray:
+        """Intensidad en W/m², calculada en el primer acceso y reutilizada."""
+        if self._intensidad is None:
+            if self.compacta:
+                intensidad = centidb_a_intensidad(self._db)
+            else:
+                intensidad = db_a_intensidad(self._db)
+            self._intensidad = intensidad.reshape(-1)[:self._n]
+        return self._intensidad
+
+    @property
+    def serie(self) -> SerieValidada:
+        """
+        Tiempo e intensidad validados (NaN interpolados, recorte según
+        ``meta``), construidos en el primer acceso y reutilizados. La
+        integración, la LAeq, la dosis y los estadísticos parten de esta
+        misma serie.
+        """
+        if self._serie is None:
+            self._serie = SerieValidada.desde_grabacion(self)
+        return self._serie
+
+    @property
+    def tiempo(self) -> np.ndarray:
+        """Eje temporal 1..n (en segundos si ``dt`` != 1)."""
+        t = np.arange(1, self._n + 1)
+        return t if self.dt == 1.0 else t * self.dt
+
+    def ventana(self, inicio: int, fin: int | None = None) -> Grabacion:
+        """
+        Devuelve la ventana ``[inicio, fin)`` como vista.
+
+        Si la intensidad ya está calculada, la ventana comparte su caché.
+        """
+        if self._db.ndim != 1:
+            return Grabacion(self._datos(), self.dt, self.meta,
+                             self.compacta, self.simple).ventana(inicio, fin)
+        inicio, fin, _ = slice(inicio, fin).indices(self._n)
+        fin = max(fin, inicio)
+        intensidad = None if self._intensidad is None else self._intensidad[inicio:fin]
+        return Grabacion._vista(self._db[inicio:fin], fin - inicio, self.dt,
+                                self.meta, intensidad)
+
+    def truncar_25_6k(self) -> Grabacion:
+        """Vista truncada al máximo tamaño válido según 25 + 6k."""
+        return self.ventana(0, max(max_filas_validas(self._n), 0))
+
+    def reducir(self, porcentaje: float) -> Grabacion:
+        """
+        Elimina un porcentaje de muestras de forma homogénea.
+
+        Selecciona los mismos índices que ``quitar_porcentaje_homogeneo``
+        (``int(i * 100 / (100 - porcentaje))``) y trunca a 25 + 6k. Cuando el
+        paso es un racional exacto ``p/q`` cuyas posiciones conservadas forman
+        un prefijo de cada bloque de ``p`` muestras (p. ej. 20 % -> 4 de cada
+        5), el resultado es una vista con strides; en otro caso se copia.
+
+        Parameters
+        ----------
+        porcentaje : float
+            Porcentaje a eliminar (entre 0 y 100).
+        """
+        if not (0 <= porcentaje < 100):
+            raise ValueError("El porcentaje debe estar entre 0 y 100 (sin incluir 100).")
+
+        step = 100 / (100 - porcentaje)
+        n_sel = int(self._n / step)
+        n_final = max(max_filas_validas(n_sel), 0)
+
+        frac = Fraction(step)
+        p, q = frac.numerator, frac.denominator
+        if (self._db.ndim == 1 and p <= 64
+                and all(j * p // q == j for j in range(q))):
+            bloques = -(-n_final // q)
+            if bloques == 0 or (bloques - 1) * p + q <= self._n:
+                paso = self._db.strides[0]
+                vista = as_strided(self._db, shape=(bloques, q),
+                                   strides=(p * paso, paso), writeable=False)
+                return Grabacion._vista(vista, n_final, self.dt, self.meta)
+
+        logger.debug(f"Reducción {porcentaje}% no expresable como vista; se copia.")
+        indices = (np.arange(n_final) * step).astype(np.int64)
+        return Grabacion(self._datos()[indices], self.dt, self.meta,
+                         self.compacta, self.simple)
+
+    def a_dataframe(self) -> pl.DataFrame:
+        """DataFrame con columnas ``["Tiempo (s)", "intensidad"]``."""
+        return pl.DataFrame({"Tiempo (s)": self.tiempo, "intensidad": self.intensidad})
+
+
+def como_intensidad(valor) -> np.ndarray:
+    """Devuelve la intensidad validada de una ``Grabacion`` o el propio array."""
+    return valor.serie.y if isinstance(valor, Grabacion) else valor
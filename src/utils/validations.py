@@ -1,5 +1,14 @@
 """Utilidades de validación."""
 
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 def max_filas_validas(n: int) -> int:
     """
@@ -17,3 +26,135 @@ def max_filas_validas(n: int) -> int:
     """
     k_max = (n - 25) // 6
     return 25 + 6 * k_max
+
+
+@dataclass(frozen=True, slots=True)
+class SerieValidada:
+    """
+    Serie (x, y) validada una sola vez para los métodos de integración.
+
+    Se construye con ``validar_serie`` o ``SerieValidada.desde_grabacion``;
+    los métodos de ``metods.py`` la aceptan en lugar de ``x`` y omiten sus
+    comprobaciones O(n) (longitudes, equiespaciado).
+
+    Attributes
+    ----------
+    x, y : np.ndarray
+        Ejes de igual longitud, ``y`` sin NaN.
+    h : float | None
+        Paso constante, o None si los puntos no son equiespaciados.
+    n_nan : int
+        Muestras NaN de la entrada sustituidas por interpolación lineal.
+    recorte : np.ndarray | None
+        Máscara de muestras en los límites del dispositivo (None si no se
+        indicaron límites).
+    """
+
+    x: np.ndarray
+    y: np.ndarray
+    h: float | None
+    n_nan: int = 0
+    recorte: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self.y.shape[0]
+
+    @property
+    def admite_simpson_1_3(self) -> bool:
+        """True si el número de puntos es impar y ≥ 3."""
+        return len(self) >= 3 and len(self) % 2 == 1
+
+    @property
+    def admite_simpson_3_8(self) -> bool:
+        """True si n ≥ 4 y n ≡ 1 (mod 3)."""
+        return len(self) >= 4 and (len(self) - 1) % 3 == 0
+
+    @property
+    def n_recortadas(self) -> int:
+        """Número de muestras recortadas (0 sin límites)."""
+        return 0 if self.recorte is None else int(np.count_nonzero(self.recorte))
+
+    @classmethod
+    def desde_grabacion(cls, grabacion) -> SerieValidada:
+        """
+        Valida el tiempo y la intensidad de una ``Grabacion``.
+
+        El eje temporal es equiespaciado por construcción (paso ``dt``), así
+        que no se recorre; el recorte se evalúa sobre los dB con
+        ``min_spl``/``max_spl`` de sus metadatos, si existen.
+        """
+        min_spl = getattr(grabacion.meta, "min_spl", None)
+        max_spl = getattr(grabacion.meta, "max_spl", None)
+        limites = min_spl is not None or max_spl is not None
+        return validar_serie(grabacion.tiempo, grabacion.intensidad,
+                             h=float(grabacion.dt),
+                             niveles_db=grabacion.db if limites else None,
+                             min_spl=min_spl, max_spl=max_spl)
+
+
+def validar_serie(x: np.ndarray,
+                  y: np.ndarray,
+                  h: float | None = None,
+                  niveles_db: np.ndarray | None = None,
+                  min_spl: float | None = None,
+                  max_spl: float | None = None) -> SerieValidada:
+    """
+    Valida y limpia una serie en una sola pasada vectorizada.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Ejes independiente y dependiente.
+    h : float, optional
+        Paso conocido de ``x``; si se indica no se comprueba el
+        equiespaciado.
+    niveles_db : np.ndarray, optional
+        Niveles en dB sobre los que evaluar el recorte (por defecto ``y``).
+    min_spl, max_spl : float, optional
+        Límites del dispositivo; las muestras en o más allá de ellos se
+        marcan en ``recorte`` (no se modifican).
+
+    Returns
+    -------
+    SerieValidada
+
+    Raises
+    ------
+    ValueError
+        Si las longitudes difieren, hay menos de 2 puntos o ``y`` es todo NaN.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    n = y.shape[0]
+    if x.shape[0] != n:
+        raise ValueError("Los arrays x e y deben tener la misma longitud.")
+    if n < 2:
+        raise ValueError("Se requieren al menos 2 puntos.")
+
+    if h is None:
+        dx = np.diff(x)
+        h = float(dx[0]) if np.allclose(dx, dx[0]) else None
+
+    # Una reducción basta para descartar NaN; la máscara solo si aparecen
+    n_nan = 0
+    if np.isnan(np.add.reduce(y)):
+        nan = np.isnan(y)
+        n_nan = int(np.count_nonzero(nan))
+        if n_nan == n:
+            raise ValueError("La serie no contiene valores válidos.")
+        if n_nan:
+            y = y.astype(np.float64)
+            y[nan] = np.interp(x[nan], x[~nan], y[~nan])
+            logger.warning(f"{n_nan} muestras NaN sustituidas por interpolación lineal")
+
+    recorte = None
+    if min_spl is not None or max_spl is not None:
+        niveles = y if niveles_db is None else np.asarray(niveles_db)
+        recorte = np.zeros(n, dtype=bool)
+        if min_spl is not None:
+            recorte |= niveles <= min_spl
+        if max_spl is not None:
+            recorte |= niveles >= max_spl
+        if (n_recortadas := int(np.count_nonzero(recorte))):
+            logger.warning(f"{n_recortadas} muestras en los límites del dispositivo "
+                           f"({min_spl}–{max_spl} dB)")
+    return SerieValidada(x, y, h, n_nan, recorte)